@@ -0,0 +1,133 @@
+import os
+import re
+import json
+
+from build_manifest import file_sha256, sha256_bytes
+
+# 静态资源指纹：生成的样式表和 js/ 下的脚本按内容哈希复制为 assets/<目录>/<名称>.<哈希>.<扩展名>，
+# 页面引用带哈希的文件名，可以配合 immutable 长期缓存，内容变化时文件名随之变化
+ASSET_DIR = 'assets'
+FINGERPRINT_SOURCES = ('css/site.css', 'js/config.js', 'js/auth.js', 'js/archive.js', 'js/search.js', 'js/market.js')
+HASH_LENGTH = 10
+HASHED_NAME = re.compile(r'\.[0-9a-f]{%d}(?=\.[^./]+$)' % HASH_LENGTH)
+# 每个源文件的当前和上一代指纹副本。HTML 有 300 秒缓存，部署新版本后旧页面还会请求上一代文件，
+# 所以上一代至少保留到下一次指纹变化时才删除
+ASSET_INDEX_PATH = '.asset_fingerprints.json'
+ASSET_INDEX_VERSION = 1
+
+
+def fingerprinted_path(path, sha256):
+    stem, ext = os.path.splitext(path)
+    return f"{ASSET_DIR}/{stem}.{sha256[:HASH_LENGTH]}{ext}"
+
+
+def source_of(path):
+    # assets/js/auth.0123456789.js -> js/auth.js；不是指纹文件时原样返回
+    if not path.startswith(ASSET_DIR + '/'):
+        return path
+    return HASHED_NAME.sub('', path[len(ASSET_DIR) + 1:], count=1)
+
+
+def load_asset_index(path=ASSET_INDEX_PATH):
+    if not os.path.exists(path):
+        return {"version": ASSET_INDEX_VERSION, "sources": {}}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    if index.get('version') != ASSET_INDEX_VERSION:
+        return {"version": ASSET_INDEX_VERSION, "sources": {}}
+    return index
+
+
+def save_asset_index(index, path=ASSET_INDEX_PATH):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'), sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def build_fingerprinted_assets(sources=FINGERPRINT_SOURCES, index_path=ASSET_INDEX_PATH):
+    """Copy each source to its content-hashed name and return ``{source: hashed path}``.
+
+    Existing copies are left alone (the name is the content). When a
+    source's hash changes, the previous copy is kept for one more
+    generation so pages cached from the last deploy can still load it;
+    older copies are removed. Copies the index does not know yet (first
+    run, fresh clone) are adopted as the previous generation.
+    """
+    assets = {}
+    for path in sources:
+        if not os.path.exists(path):
+            continue
+        hashed = fingerprinted_path(path, file_sha256(path))
+        if not os.path.exists(hashed):
+            os.makedirs(os.path.dirname(hashed), exist_ok=True)
+            with open(path, 'rb') as f:
+                data = f.read()
+            with open(hashed + '.tmp', 'wb') as f:
+                f.write(data)
+            os.replace(hashed + '.tmp', hashed)
+            print(f"Fingerprinted {path} -> {hashed}")
+        assets[path] = hashed
+
+    # 现有副本按源文件分组；.br/.gz 由 precompress.py 随源文件一起清理
+    copies = {}
+    for dirpath, dirs, files in os.walk(ASSET_DIR):
+        for filename in files:
+            if not filename.endswith(('.br', '.gz', '.tmp')):
+                path = os.path.join(dirpath, filename).replace('\\', '/')
+                copies.setdefault(source_of(path), []).append(path)
+
+    index = load_asset_index(index_path)
+    generations = {}
+    for source in sorted(set(copies) | set(assets) | set(index['sources'])):
+        current = assets.get(source)
+        record = index['sources'].get(source)
+        stale = sorted(path for path in copies.get(source, ()) if path != current)
+        if record is None:
+            previous = stale
+        elif record['current'] != current:
+            previous = [record['current']] if record['current'] in stale else []
+        elif current:
+            previous = [path for path in record['previous'] if path in stale]
+        else:
+            # 源文件已删除：上一代已经保留过一次构建
+            previous = []
+        for path in stale:
+            if path not in previous:
+                os.remove(path)
+                print(f"Removed stale asset {path}")
+        if current or previous:
+            generations[source] = {"current": current, "previous": previous}
+
+    if generations != index['sources']:
+        index['sources'] = generations
+        save_asset_index(index, index_path)
+    return assets
+
+
+def assets_digest(assets):
+    # 页面输入的一部分：指纹变化时需要重写引用这些脚本的页面
+    return sha256_bytes(repr(sorted(assets.items())))
+
+
+def asset_url(path, assets, base_path="/"):
+    return base_path + (assets or {}).get(path, path)
+
+
+def use_fingerprinted_asset(element, assets, page_dir):
+    # <script src> / <link href> 指向当前的指纹文件，保留原来的相对或绝对写法
+    attr = 'src' if element.tag == 'script' else 'href'
+    url = element.get_attribute(attr)
+    if not url or '://' in url or url.startswith(('data:', '//')):
+        return
+    if url.startswith('/'):
+        path = url[1:]
+    else:
+        path = os.path.normpath(os.path.join(page_dir, url)).replace('\\', '/')
+    hashed = assets.get(source_of(path))
+    if not hashed or hashed == path:
+        return
+    element.set_attribute(attr, '/' + hashed if url.startswith('/') else os.path.relpath(hashed, page_dir or '.').replace('\\', '/'))
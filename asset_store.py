@@ -0,0 +1,155 @@
+import os
+import json
+import shutil
+
+from build_manifest import file_fingerprint, file_unchanged, sha256_bytes, write_if_changed
+from html_rewriter import HTMLRewriter
+from image_pipeline import GENERATED_DIRS, STORE_DIR
+
+# 内容寻址的图片存储：每个图片按内容哈希在 imgs/store/ 中只保留一份，
+# 页面中的 <img src> 统一指向存储中的文件，哈希文件名可以长期缓存；
+# 所有页面改为引用存储后可以删除原图（--prune / update_latest.py --prune-originals）
+IMAGE_ROOT = 'imgs'
+STORE_INDEX_PATH = '.asset_store.json'
+STORE_INDEX_VERSION = 1
+STORE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif', '.svg')
+
+
+def blob_path(sha256, path):
+    ext = os.path.splitext(path)[1].lower()
+    return f"{STORE_DIR}/{sha256[:16]}{'.jpg' if ext == '.jpeg' else ext}"
+
+
+def find_store_sources(root=IMAGE_ROOT):
+    # 存储目录和生成的响应式变体不是源图
+    paths = []
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if os.path.join(dirpath, d).replace('\\', '/') not in GENERATED_DIRS)
+        for filename in sorted(files):
+            if filename.lower().endswith(STORE_EXTENSIONS):
+                paths.append(os.path.join(dirpath, filename).replace('\\', '/'))
+    return paths
+
+
+def load_store_index(path=STORE_INDEX_PATH):
+    if not os.path.exists(path):
+        return {"version": STORE_INDEX_VERSION, "files": {}}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    if index.get('version') != STORE_INDEX_VERSION:
+        return {"version": STORE_INDEX_VERSION, "files": {}}
+    return index
+
+
+def save_store_index(index, path=STORE_INDEX_PATH):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'), sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def build_asset_store(root=IMAGE_ROOT, index_path=STORE_INDEX_PATH):
+    """Copy every new or changed image into the store and return ``{original path: blob path}``.
+
+    Identical images share one blob. Records of originals that were pruned
+    are kept as long as their blob exists, so old references still resolve.
+    """
+    index = load_store_index(index_path)
+    files = index['files']
+    current = {}
+    added = 0
+    for path in find_store_sources(root):
+        record = files.get(path)
+        if record and os.path.exists(record['blob']) and file_unchanged(path, record):
+            current[path] = record
+            continue
+        fingerprint = file_fingerprint(path)
+        if fingerprint['size'] == 0:
+            continue
+        blob = blob_path(fingerprint['sha256'], path)
+        if not os.path.exists(blob):
+            os.makedirs(STORE_DIR, exist_ok=True)
+            shutil.copyfile(path, blob + '.tmp')
+            os.replace(blob + '.tmp', blob)
+            added += 1
+        current[path] = dict(fingerprint, blob=blob)
+    for path, record in files.items():
+        if path not in current and record.get('pruned') and os.path.exists(record['blob']):
+            current[path] = record
+
+    if current != files:
+        index['files'] = current
+        save_store_index(index, index_path)
+    if added:
+        blobs = {r['blob'] for r in current.values()}
+        print(f"Asset store: {added} new blob(s), {len(current)} image(s) in {len(blobs)} blob(s).")
+    return {path: record['blob'] for path, record in current.items()}
+
+
+def store_digest(mapping):
+    # 页面输入的一部分：映射变化时需要重写引用图片的页面
+    return sha256_bytes(json.dumps(mapping, sort_keys=True))
+
+
+def _store_url(url, mapping, page_dir):
+    if not url or '://' in url or url.startswith(('data:', '/')):
+        return None
+    blob = mapping.get(os.path.normpath(os.path.join(page_dir, url)).replace('\\', '/'))
+    if not blob:
+        return None
+    return os.path.relpath(blob, page_dir).replace('\\', '/')
+
+
+def use_store_source(element, mapping, page_dir):
+    # <img src> 以及 <source data-variant-of> 指向存储中的文件
+    attr = 'src' if element.tag == 'img' else 'data-variant-of'
+    url = _store_url(element.get_attribute(attr), mapping, page_dir)
+    if url and url != element.get_attribute(attr):
+        element.set_attribute(attr, url)
+
+
+def rewrite_page_sources(file_path, mapping):
+    """Point one page's local images at the store; returns True if it changed."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    page_dir = os.path.dirname(file_path)
+    rewriter = HTMLRewriter()
+    for tag in ('img', 'source'):
+        rewriter.on_element(tag, lambda element: use_store_source(element, mapping, page_dir))
+    return write_if_changed(file_path, rewriter.transform(content))
+
+
+def prune_originals(mapping, index_path=STORE_INDEX_PATH):
+    # 删除已经存入存储的原图；记录保留，旧路径仍可解析到存储文件
+    index = load_store_index(index_path)
+    removed = 0
+    for path, record in index['files'].items():
+        if path in mapping and os.path.exists(path) and os.path.exists(record['blob']):
+            os.remove(path)
+            record['pruned'] = True
+            removed += 1
+    if removed:
+        save_store_index(index, index_path)
+    return removed
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Move images into the content-addressed store and point pages at it.")
+    parser.add_argument("--prune", action="store_true",
+                        help="Delete the original files once every page references the store")
+    args = parser.parse_args()
+
+    mapping = build_asset_store()
+    pages = []
+    for root, dirs, files in os.walk('content'):
+        if 'index.html' in files:
+            pages.append(os.path.join(root, 'index.html'))
+    changed = sum(rewrite_page_sources(page, mapping) for page in sorted(pages))
+    blobs = set(mapping.values())
+    print(f"{len(mapping)} image(s) stored as {len(blobs)} blob(s); rewrote {changed} of {len(pages)} page(s).")
+    if args.prune:
+        print(f"Pruned {prune_originals(mapping)} original file(s).")
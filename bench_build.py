@@ -0,0 +1,256 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import datetime
+import platform
+import contextlib
+
+import update_latest as site
+from digest_index import build_digest_index
+
+# 站点构建的基准测试：生成指定天数的合成语料，分阶段计时，结果输出为 JSON
+DEFAULT_SIZES = (30, 365, 3650)
+BENCH_RESULTS_PATH = 'bench_results.json'
+CORPUS_END_DATE = datetime.date(2026, 2, 8)
+
+# 离线运行：行情数据使用固定的假数据
+STUB_MARKET_DATA = {
+    "btc": {"usd": 65000, "usd_24h_change": -1.5},
+    "eth": {"usd": 2000, "usd_24h_change": 0.8},
+    "fng": {"value": "20", "value_classification": "Extreme Fear"},
+}
+
+PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <title>Crypto Insight - {dotted}</title>
+    <script src="https://cdn.tailwindcss.com"></script>
+    <script>
+        function handleImageError(img) {{ img.src = 'https://via.placeholder.com/800x450'; }}
+        async function fetchMarketData() {{
+            const priceResponse = await fetch('https://api.coingecko.com/api/v3/simple/price?ids=bitcoin,ethereum&vs_currencies=usd&include_24hr_change=true');
+            document.getElementById('last-update-time').innerText = new Date().toLocaleTimeString();
+        }}
+        window.addEventListener('DOMContentLoaded', () => {{
+            fetchMarketData();
+            setInterval(fetchMarketData, 60000);
+        }});
+    </script>
+</head>
+<body class="flex min-h-screen">
+    <!-- Sidebar -->
+    <aside class="hidden lg:flex flex-col w-64 p-6 sidebar sticky top-0 h-screen"></aside>
+    <main class="flex-1 p-6 lg:p-12 max-w-7xl mx-auto">
+        <header class="mb-12">
+            <span>Live Market Status • Last updated: <span id="last-update-time">Loading...</span></span>
+            <h1 class="text-4xl font-extrabold">Crypto Insight {dotted}</h1>
+            <p class="text-xl font-black text-orange-500" id="btc-price-display">$Loading... <span class="text-xs font-normal text-gray-400">Loading...</span></p>
+            <p class="text-xl font-black text-blue-500" id="eth-price-display">$Loading... <span class="text-xs font-normal text-gray-400">Loading...</span></p>
+            <p class="text-xl font-black text-red-500" id="sentiment-display">Loading... <span class="text-xs font-normal text-gray-400">Loading...</span></p>
+        </header>
+        <div class="grid grid-cols-1 md:grid-cols-3 gap-6">
+{cards}
+        </div>
+    </main>
+</body>
+</html>
+'''
+
+CARD_TEMPLATE = '''            <div class="bento-card p-6">
+                <img src="../../../../imgs/{path}/item_{n}.jpg" alt="Item {n}" class="card-img">
+                <h3 class="text-lg font-bold mb-2">Synthetic headline {n} for {date}</h3>
+                <p class="text-sm text-gray-400">{summary}</p>
+                <a href="https://example.com/{date}/{n}" class="text-xs text-orange-500">Source</a>
+            </div>'''
+
+MD_ITEM_TEMPLATE = '''### {n}. Synthetic headline {n} for {date}
+**摘要**：{summary}
+**来源**：[Example News](https://example.com/{date}/{n})
+'''
+
+SUMMARY_TEXT = "比特币价格在关键支撑位附近震荡，机构资金流向与宏观政策预期共同影响市场情绪，分析师提示短期波动风险。"
+
+
+def generate_corpus(root, days, end_date=CORPUS_END_DATE, items=7):
+    """Write ``days`` daily pages and matching markdown digests under ``root``."""
+    for i in range(days):
+        day = end_date - datetime.timedelta(days=i)
+        date_str = day.isoformat()
+        path = day.strftime('%Y/%m/%d')
+        cards = "\n".join(CARD_TEMPLATE.format(path=path, n=n, date=date_str, summary=SUMMARY_TEXT) for n in range(1, items + 1))
+        page_dir = os.path.join(root, 'content', *path.split('/'))
+        os.makedirs(page_dir, exist_ok=True)
+        with open(os.path.join(page_dir, 'index.html'), 'w', encoding='utf-8') as f:
+            f.write(PAGE_TEMPLATE.format(dotted=day.strftime('%Y.%m.%d'), cards=cards))
+
+        md = [f"# Crypto Insight - {day.strftime('%Y.%m.%d')}\n"]
+        md += [MD_ITEM_TEMPLATE.format(n=n, date=date_str, summary=SUMMARY_TEXT) for n in range(1, items + 1)]
+        with open(os.path.join(root, f"{date_str}.md"), 'w', encoding='utf-8') as f:
+            f.write("\n".join(md))
+
+
+@contextlib.contextmanager
+def bench_environment(root):
+    # 在语料目录中运行、替换行情接口、屏蔽构建日志
+    cwd = os.getcwd()
+    get_market_data = site.get_market_data
+    os.chdir(root)
+    site.get_market_data = lambda: STUB_MARKET_DATA
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            yield
+    finally:
+        site.get_market_data = get_market_data
+        os.chdir(cwd)
+
+
+def timed(phases, name, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    phases[name] = round(time.perf_counter() - start, 6)
+    return result
+
+
+def bench_phases(jobs=1):
+    """Run each build phase of update_latest() on its own and time it."""
+    phases = {}
+    all_indices = timed(phases, 'walk', site.find_pages)
+    digests = timed(phases, 'summaries', build_digest_index)
+    entries = site.build_entries(all_indices, digests)
+
+    def sidebars():
+        sidebar = site.compile_sidebar(site.build_date_index(entries))
+        for entry in entries:
+            site.render_sidebar(sidebar, entry['date'])
+        return sidebar
+    sidebar = timed(phases, 'sidebar', sidebars)
+
+    def archive():
+        shards = site.render_archive_shards(site.build_date_index(entries))
+        site.write_generated_dir(site.ARCHIVE_DIR, shards, {"outputs": {}})
+    timed(phases, 'archive', archive)
+
+    def search():
+        files = site.render_search_index(entries, digests)
+        site.write_generated_dir(site.SEARCH_DIR, files, {"outputs": {}})
+    timed(phases, 'search', search)
+
+    def portal():
+        with open('index.html', 'w', encoding='utf-8') as f:
+            f.write(site.render_portal_html(entries))
+    timed(phases, 'portal', portal)
+
+    freeze = (STUB_MARKET_DATA, "00:00:00")
+    tasks = [(entry['date'], entry['url'].lstrip('/'), i == 0, None, None if i == 0 else freeze)
+             for i, entry in enumerate(entries)]
+    results = timed(phases, 'rewrite', lambda: list(site.run_page_tasks(tasks, sidebar, jobs)))
+    failed = [r['date'] for r in results if r['error']]
+    if failed:
+        raise RuntimeError(f"{len(failed)} page(s) failed to rewrite, first: {failed[0]}")
+
+    def vercel():
+        with open('vercel.json', 'w', encoding='utf-8') as f:
+            f.write(site.render_vercel_config(entries[0]))
+    timed(phases, 'vercel', vercel)
+    return phases
+
+
+def tree_bytes(root):
+    return sum(os.path.getsize(os.path.join(r, f)) for r, _, files in os.walk(root) for f in files)
+
+
+def run_benchmark(days, jobs=1, keep=False):
+    """Benchmark one corpus size: isolated phases, a full build and an incremental no-op build."""
+    root = tempfile.mkdtemp(prefix=f'bench-{days}-')
+    try:
+        timings = {}
+        timed(timings, 'corpus', generate_corpus, root, days)
+        input_bytes = tree_bytes(os.path.join(root, 'content'))
+
+        with bench_environment(root):
+            phases = bench_phases(jobs)
+            timed(timings, 'full_build', site.update_latest, False, jobs)
+            timed(timings, 'incremental_noop', site.update_latest, True, jobs)
+
+        return {
+            "days": days,
+            "jobs": jobs,
+            "input_page_bytes": input_bytes,
+            "output_page_bytes": tree_bytes(os.path.join(root, 'content')),
+            "corpus_seconds": timings['corpus'],
+            "phases": phases,
+            "phases_total": round(sum(phases.values()), 6),
+            "full_build": timings['full_build'],
+            "incremental_noop": timings['incremental_noop'],
+        }
+    finally:
+        if keep:
+            print(f"Corpus kept at {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def compare_results(results, baseline, threshold):
+    # 与基线结果比较，返回变慢超过阈值的 (days, 指标, 基线耗时, 当前耗时)
+    base_by_days = {r['days']: r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        base = base_by_days.get(result['days'])
+        if not base:
+            continue
+        metrics = dict(result['phases'], full_build=result['full_build'], incremental_noop=result['incremental_noop'])
+        base_metrics = dict(base['phases'], full_build=base['full_build'], incremental_noop=base['incremental_noop'])
+        for name, seconds in metrics.items():
+            before = base_metrics.get(name)
+            # 太短的阶段噪声大，不参与比较
+            if before and max(before, seconds) >= 0.01 and seconds > before * threshold:
+                regressions.append((result['days'], name, before, seconds))
+    return regressions
+
+
+def print_result(result):
+    phases = "  ".join(f"{name}={seconds:.3f}s" for name, seconds in result['phases'].items())
+    print(f"{result['days']:>6} days  {phases}  full={result['full_build']:.3f}s  noop={result['incremental_noop']:.3f}s")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark update_latest.py on synthetic corpora of N days.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated corpus sizes in days (e.g. 30,365,3650,36500)")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Worker processes for the page rewrite (0 = CPU count)")
+    parser.add_argument("--output", "-o", default=BENCH_RESULTS_PATH, help="Where to write the JSON results")
+    parser.add_argument("--compare", metavar="PATH", help="Previous results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio reported as a regression")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated corpora")
+    args = parser.parse_args()
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    results = []
+    for days in (int(s) for s in args.sizes.split(',') if s.strip()):
+        result = run_benchmark(days, jobs, args.keep)
+        print_result(result)
+        results.append(result)
+
+    report = {
+        "generated_at": datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare_results(results, json.load(f), args.threshold)
+        for days, name, before, after in regressions:
+            print(f"Regression: {days} days {name} {before:.3f}s -> {after:.3f}s")
+        if regressions:
+            sys.exit(1)
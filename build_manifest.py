@@ -0,0 +1,101 @@
+import os
+import json
+import hashlib
+
+# 增量构建清单：记录每个输入/输出文件的 mtime、大小和内容哈希
+MANIFEST_PATH = '.build_manifest.json'
+MANIFEST_VERSION = 2
+
+
+def sha256_bytes(data):
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_fingerprint(path):
+    st = os.stat(path)
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": file_sha256(path)}
+
+
+def file_unchanged(path, record):
+    """Return True if ``path`` still matches the fingerprint ``record``.
+
+    mtime + size is the fast path; if only the mtime moved (e.g. a fresh
+    checkout) the content hash decides.
+    """
+    if not record:
+        return False
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+    if st.st_size != record.get('size'):
+        return False
+    if st.st_mtime_ns == record.get('mtime_ns'):
+        return True
+    return file_sha256(path) == record.get('sha256')
+
+
+def write_if_changed(path, data):
+    """Write ``data`` (str or bytes) to ``path`` unless the file already holds exactly these bytes.
+
+    Real changes go to a temp file that replaces ``path`` in one rename, so
+    readers never see a half-written file. Identical content leaves the file
+    and its mtime alone. Returns True if the file was written.
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+    except FileNotFoundError:
+        pass
+    # 进程号区分临时文件，并行写入不同文件时不会冲突
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return True
+
+
+def empty_manifest():
+    return {"version": MANIFEST_VERSION, "generator": None, "pages": {}, "outputs": {}}
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return empty_manifest()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable build manifest {path}: {e}")
+        return empty_manifest()
+    if manifest.get('version') != MANIFEST_VERSION:
+        print("Build manifest version changed, starting from scratch.")
+        return empty_manifest()
+    for key in ("pages", "outputs"):
+        manifest.setdefault(key, {})
+    return manifest
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import datetime
+import contextlib
+
+# 构建计时与统计：各阶段/各页面的耗时 (wall/CPU)、读写字节数，最后输出 JSON 报告
+BUILD_REPORT_PATH = 'build_report.json'
+# 报告格式变化时递增，方便指标管道区分
+BUILD_REPORT_VERSION = 1
+
+
+class Timer:
+    """Wall-clock and CPU time of a block, in seconds."""
+
+    def __init__(self):
+        self.wall = 0.0
+        self.cpu = 0.0
+        self._start = None
+
+    def __enter__(self):
+        self._start = (time.perf_counter(), time.process_time())
+        return self
+
+    def __exit__(self, *exc):
+        wall_start, cpu_start = self._start
+        self.wall = time.perf_counter() - wall_start
+        self.cpu = time.process_time() - cpu_start
+        return False
+
+
+class BuildReport:
+    """Collects phase timings, per-page timings and counters for one build.
+
+    Phases are recorded in the order they finish; running the same phase
+    name twice adds up. Page records come from the rewrite workers, so their
+    CPU time is the worker's own and is not part of the parent's phase CPU.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.datetime.now()
+        self.phases = {}
+        self.pages = []
+        self.counters = {"bytes_read": 0, "bytes_written": 0}
+        self.info = {}
+        self._start = (time.perf_counter(), time.process_time())
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        timer = Timer()
+        try:
+            with timer:
+                yield timer
+        finally:
+            current = self.phases.setdefault(name, {"wall": 0.0, "cpu": 0.0})
+            current['wall'] = round(current['wall'] + timer.wall, 6)
+            current['cpu'] = round(current['cpu'] + timer.cpu, 6)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_page(self, date_str, timing):
+        # timing: rewrite_page 返回的 {"wall", "cpu", "bytes_read", "bytes_written"}
+        self.pages.append(dict(timing, date=date_str))
+        self.count('bytes_read', timing.get('bytes_read', 0))
+        self.count('bytes_written', timing.get('bytes_written', 0))
+
+    def to_dict(self):
+        wall_start, cpu_start = self._start
+        page_wall = [p['wall'] for p in self.pages]
+        return {
+            "version": BUILD_REPORT_VERSION,
+            "started_at": self.started_at.strftime('%Y-%m-%dT%H:%M:%S'),
+            "total": {
+                "wall": round(time.perf_counter() - wall_start, 6),
+                "cpu": round(time.process_time() - cpu_start, 6),
+            },
+            "phases": self.phases,
+            "counters": self.counters,
+            "pages": {
+                "count": len(self.pages),
+                "wall": round(sum(page_wall), 6),
+                "cpu": round(sum(p['cpu'] for p in self.pages), 6),
+                "max_wall": round(max(page_wall, default=0.0), 6),
+                # 最慢的页面排在前面
+                "slowest": sorted(self.pages, key=lambda p: p['wall'], reverse=True)[:10],
+                "all": self.pages,
+            },
+            "info": self.info,
+        }
+
+    def save(self, path=BUILD_REPORT_PATH):
+        report = self.to_dict()
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return report
+
+
+def print_summary(report):
+    print(f"Build finished in {report['total']['wall']:.3f}s (cpu {report['total']['cpu']:.3f}s)")
+    for name, timing in report['phases'].items():
+        print(f"  {name:<12} {timing['wall']:>8.3f}s  cpu {timing['cpu']:.3f}s")
+    pages = report['pages']
+    if pages['count']:
+        print(f"  {pages['count']} page(s): {pages['wall']:.3f}s total, slowest {pages['max_wall']:.3f}s")
+    counters = report['counters']
+    print(f"  read {counters['bytes_read']} bytes, wrote {counters['bytes_written']} bytes")
+
+
+@contextlib.contextmanager
+def profiled(path, top=25):
+    """Run the block under cProfile, dump the stats to ``path`` and print the top entries."""
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        print(f"Wrote cProfile stats to {path}")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(top)
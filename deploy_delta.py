@@ -0,0 +1,110 @@
+import os
+import json
+import datetime
+
+from build_manifest import file_fingerprint, file_unchanged
+
+# 部署增量清单：与上次确认部署的状态比较，列出新增、修改和删除的文件，部署时只上传这些文件。
+# 部署完成后运行 python deploy_delta.py --ack，把本次增量记入已部署状态
+DEPLOY_ROOTS = ('index.html', 'vercel.json', 'market.json', 'sw.js', 'sw-manifest.json', 'content', 'assets', 'css', 'js', 'imgs', 'archive', 'search')
+DEPLOY_STATE_PATH = '.deploy_state.json'
+DEPLOY_DELTA_PATH = 'deploy_delta.json'
+DEPLOY_DELTA_VERSION = 1
+# 写入中的临时文件，以及 precompress.py 生成的压缩副本（被 .gitignore 忽略，不随部署上传）
+SKIPPED_SUFFIXES = ('.tmp', '.br', '.gz')
+
+
+def find_deploy_files(roots=DEPLOY_ROOTS):
+    paths = []
+    for root in roots:
+        if os.path.isfile(root):
+            paths.append(root)
+            continue
+        for dirpath, dirs, files in os.walk(root):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+            for filename in sorted(files):
+                # 隐藏文件、临时文件和压缩副本不部署
+                if not filename.startswith('.') and not filename.endswith(SKIPPED_SUFFIXES):
+                    paths.append(os.path.join(dirpath, filename).replace('\\', '/'))
+    return paths
+
+
+def load_deploy_state(path=DEPLOY_STATE_PATH):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if state.get('version') != DEPLOY_DELTA_VERSION:
+        return {}
+    return state.get('files', {})
+
+
+def save_deploy_state(files, path=DEPLOY_STATE_PATH):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"version": DEPLOY_DELTA_VERSION, "files": files}, f, separators=(',', ':'), sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def compute_delta(roots=DEPLOY_ROOTS, state_path=DEPLOY_STATE_PATH):
+    """Compare the deployable files with the last acknowledged deploy.
+
+    Files whose size and mtime match the state are not read; the others
+    are hashed, so a rewrite with identical bytes does not count as a change.
+    Returns ``{"added", "changed", "removed", "unchanged", "files"}`` where
+    ``files`` holds the fingerprints of the added and changed files.
+    """
+    deployed = load_deploy_state(state_path)
+    delta = {"added": [], "changed": [], "removed": [], "unchanged": 0, "files": {}}
+    current = set()
+    for path in find_deploy_files(roots):
+        current.add(path)
+        record = deployed.get(path)
+        if file_unchanged(path, record):
+            delta['unchanged'] += 1
+            continue
+        delta['changed' if record else 'added'].append(path)
+        delta['files'][path] = file_fingerprint(path)
+    delta['removed'] = sorted(set(deployed) - current)
+    return delta
+
+
+def write_deploy_delta(roots=DEPLOY_ROOTS, state_path=DEPLOY_STATE_PATH, delta_path=DEPLOY_DELTA_PATH):
+    delta = compute_delta(roots, state_path)
+    report = dict(version=DEPLOY_DELTA_VERSION, generated_at=datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%S'), **delta)
+    tmp_path = delta_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, delta_path)
+    print(f"Deploy delta: {len(delta['added'])} added, {len(delta['changed'])} changed, "
+          f"{len(delta['removed'])} removed, {delta['unchanged']} unchanged ({delta_path})")
+    return delta
+
+
+def acknowledge_delta(state_path=DEPLOY_STATE_PATH, delta_path=DEPLOY_DELTA_PATH):
+    # 只记入增量清单中列出的文件：部署之后新产生的修改留到下一次
+    with open(delta_path, 'r', encoding='utf-8') as f:
+        delta = json.load(f)
+    files = load_deploy_state(state_path)
+    files.update(delta['files'])
+    for path in delta['removed']:
+        files.pop(path, None)
+    save_deploy_state(files, state_path)
+    return delta
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="List the files that changed since the last acknowledged deploy.")
+    parser.add_argument("--ack", action="store_true",
+                        help=f"Mark the files in {DEPLOY_DELTA_PATH} as deployed instead of computing a new delta")
+    args = parser.parse_args()
+
+    if args.ack:
+        delta = acknowledge_delta()
+        print(f"Acknowledged {len(delta['files'])} uploaded and {len(delta['removed'])} removed file(s).")
+    else:
+        write_deploy_delta()
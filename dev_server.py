@@ -0,0 +1,178 @@
+import os
+import re
+import json
+import time
+import threading
+import posixpath
+import urllib.parse
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+from asset_store import STORE_DIR
+from image_pipeline import VARIANT_DIR
+
+# 本地预览：轮询监视源文件，变化平息后调用增量构建；同时按 vercel.json 的
+# cleanUrls / rewrites / headers 规则在本地提供页面，并像 Vercel 一样支持 ETag
+WATCH_ROOTS = ('content', 'imgs', 'js')
+DATE_MD = re.compile(r'^\d{4}-\d{2}-\d{2}\.md$')
+CONTENT_DATE = re.compile(r'^content/(\d{4})/(\d{2})/(\d{2})/')
+# 构建自己写入的目录和文件不触发重建
+IGNORED_DIRS = {STORE_DIR, VARIANT_DIR}
+IGNORED_SUFFIXES = ('.br', '.gz', '.tmp')
+POLL_INTERVAL = 0.3
+# 最后一次变化之后等待这么久没有新的变化才开始构建，合并编辑器保存时的连续事件
+DEBOUNCE = 0.2
+DEFAULT_PORT = 8000
+
+
+def snapshot(roots=WATCH_ROOTS):
+    """Return ``{path: (mtime_ns, size)}`` for the watched files."""
+    files = {}
+    for name in os.listdir('.'):
+        if DATE_MD.match(name):
+            st = os.stat(name)
+            files[name] = (st.st_mtime_ns, st.st_size)
+    for root in roots:
+        for dirpath, dirs, filenames in os.walk(root):
+            dirs[:] = [d for d in dirs if os.path.join(dirpath, d).replace('\\', '/') not in IGNORED_DIRS]
+            for filename in filenames:
+                if filename.startswith('.') or filename.endswith(IGNORED_SUFFIXES):
+                    continue
+                path = os.path.join(dirpath, filename).replace('\\', '/')
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files[path] = (st.st_mtime_ns, st.st_size)
+    return files
+
+
+def diff_snapshots(before, after):
+    return sorted(path for path in set(before) | set(after) if before.get(path) != after.get(path))
+
+
+def changed_scope(changed):
+    """Map the changed paths to ``(dates, images_changed)`` for an incremental rebuild.
+
+    ``dates`` are the days whose page or .md report changed; ``js/`` changes
+    reach the pages through the asset fingerprints instead.
+    """
+    dates = set()
+    for path in changed:
+        m = CONTENT_DATE.match(path)
+        if m:
+            dates.add("-".join(m.groups()))
+        elif DATE_MD.match(path):
+            dates.add(path[:-len('.md')])
+    return dates, any(path.startswith('imgs/') for path in changed)
+
+
+def watch(build, roots=WATCH_ROOTS, interval=POLL_INTERVAL, debounce=DEBOUNCE):
+    """Call ``build(changed_paths)`` whenever the watched files change; runs until interrupted.
+
+    The snapshot is taken again after each build, so the pages the build
+    rewrites itself do not trigger another one.
+    """
+    current = snapshot(roots)
+    while True:
+        time.sleep(interval)
+        latest = snapshot(roots)
+        if latest == current:
+            continue
+        # 等到一段时间内没有新的变化
+        while True:
+            time.sleep(debounce)
+            settled = snapshot(roots)
+            if settled == latest:
+                break
+            latest = settled
+        changed = diff_snapshots(current, latest)
+        print(f"\n--- {len(changed)} file(s) changed: {', '.join(changed[:5])}{' ...' if len(changed) > 5 else ''}")
+        start = time.perf_counter()
+        try:
+            build(changed)
+        except Exception as e:
+            # 构建失败不退出监视，修正后再次保存即可
+            print(f"Build failed: {type(e).__name__}: {e}")
+        print(f"--- Rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms, watching for changes")
+        current = snapshot(roots)
+
+
+def load_vercel_rules(path='vercel.json'):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        config = {}
+    return config
+
+
+def source_pattern(source):
+    # vercel.json 的 source 只用到了字面路径和 (.*) 这类正则分组
+    return re.compile(source if '(' in source else re.escape(source))
+
+
+class PreviewHandler(SimpleHTTPRequestHandler):
+    """Serve the site like Vercel would: rewrites, cleanUrls and header rules from vercel.json."""
+
+    def translate_path(self, path):
+        config = load_vercel_rules()
+        url_path = urllib.parse.unquote(urllib.parse.urlsplit(path).path)
+        for rewrite in config.get('rewrites', []):
+            if source_pattern(rewrite['source']).fullmatch(url_path):
+                url_path = rewrite['destination']
+                break
+        fs_path = super().translate_path(url_path)
+        if config.get('cleanUrls') and not os.path.exists(fs_path) and os.path.exists(fs_path + '.html'):
+            fs_path += '.html'
+        return fs_path
+
+    def send_head(self):
+        config = load_vercel_rules()
+        url_path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        if config.get('cleanUrls') and url_path.endswith('.html'):
+            # cleanUrls：带 .html 的地址重定向到不带扩展名的地址
+            clean = url_path[:-len('.html')]
+            clean = posixpath.dirname(clean) if clean.endswith('/index') else clean
+            self.send_response(308)
+            self.send_header('Location', clean or '/')
+            self.end_headers()
+            return None
+        fs_path = self.translate_path(self.path)
+        if os.path.isdir(fs_path) and os.path.exists(os.path.join(fs_path, 'index.html')) and not url_path.endswith('/'):
+            # Vercel 直接提供目录的 index.html，不追加斜杠重定向
+            self.path = urllib.parse.urlsplit(self.path)._replace(path=url_path + '/').geturl()
+        self._rule_headers = [(header['key'], header['value']) for rule in config.get('headers', [])
+                              if source_pattern(rule['source']).fullmatch(url_path)
+                              for header in rule['headers']]
+        fs_path = self.translate_path(self.path)
+        # 目录（含 cleanUrls 的页面地址）实际提供的是其中的 index.html
+        if os.path.isdir(fs_path):
+            fs_path = os.path.join(fs_path, 'index.html')
+        if os.path.isfile(fs_path):
+            # 与 Vercel 一样提供 ETag，带 If-None-Match 的请求在文件未变化时返回 304
+            st = os.stat(fs_path)
+            etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+            self._rule_headers.append(('ETag', etag))
+            if etag in self.headers.get('If-None-Match', ''):
+                self.send_response(304)
+                self.end_headers()
+                return None
+        return super().send_head()
+
+    def end_headers(self):
+        for key, value in getattr(self, '_rule_headers', ()):
+            self.send_header(key, value)
+        self._rule_headers = ()
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        print(f"[preview] {self.address_string()} {format % args}")
+
+
+def serve(port=DEFAULT_PORT, directory='.'):
+    """Start the preview server in a daemon thread and return it."""
+    handler = lambda *args, **kwargs: PreviewHandler(*args, directory=directory, **kwargs)
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Preview server running at http://127.0.0.1:{port}/")
+    return server
@@ -0,0 +1,149 @@
+import os
+import re
+import json
+
+from build_manifest import file_fingerprint, file_unchanged
+
+# 每日 markdown 摘要的持久化索引：标题、摘要和来源链接，按文件哈希增量更新
+DIGEST_INDEX_PATH = '.digest_index.json'
+# 解析逻辑变化时递增，旧索引会被整体重建
+DIGEST_INDEX_VERSION = 1
+
+MD_NAME_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})\.md$')
+NO_SUMMARY = ["暂无摘要信息"]
+
+TITLE_PATTERN = re.compile(r'^#\s+(.+?)\s*$', re.M)
+HEADING_PATTERN = re.compile(r'^#{3,}\s+(?:\d+\.\s*)?(.+?)\s*$')
+BULLET_TITLE_PATTERN = re.compile(r'^\s*(?:[*-]|\d+\.)\s+\*\*(.+?)\*\*\s*$')
+SUMMARY_PATTERN = re.compile(r'\*\*摘要\*\*[：:]\s*(.*)$')
+SOURCE_PATTERN = re.compile(r'\*\*来源\*\*[：:]\s*\[(.*?)\]\((.*?)\)')
+
+
+def select_summaries(content, limit=3, max_len=80):
+    # 提取前三个摘要作为精选
+    summaries = re.findall(r'\*\*摘要\*\*：(.*?)(?=\n|$)', content)
+    if not summaries:
+        # 兼容旧格式或不同符号
+        summaries = re.findall(r'\*\*摘要\*\*:(.*?)(?=\n|$)', content)
+
+    if summaries:
+        # 只取前三个，并限制字数
+        selected = []
+        for s in summaries[:limit]:
+            s = s.strip()
+            if len(s) > max_len:
+                s = s[:max_len - 3] + "..."
+            selected.append(s)
+        return selected
+    return list(NO_SUMMARY)
+
+
+def parse_digest(content):
+    """Parse one daily report into its title, portal summaries and news items.
+
+    Item titles come from the closest ``###`` heading or bold bullet line
+    before each ``**摘要**`` line; the ``**来源**`` link that follows is
+    attached to the same item.
+    """
+    title_match = TITLE_PATTERN.search(content)
+    items = []
+    pending_title = None
+    for line in content.split('\n'):
+        heading = HEADING_PATTERN.match(line) or BULLET_TITLE_PATTERN.match(line)
+        if heading:
+            pending_title = heading.group(1).strip()
+            continue
+        summary = SUMMARY_PATTERN.search(line)
+        if summary:
+            items.append({"title": pending_title, "summary": summary.group(1).strip(), "source": None})
+            pending_title = None
+            continue
+        source = SOURCE_PATTERN.search(line)
+        if source and items and items[-1]['source'] is None:
+            items[-1]['source'] = {"name": source.group(1).strip(), "url": source.group(2).strip()}
+    return {
+        "title": title_match.group(1) if title_match else None,
+        "summaries": select_summaries(content),
+        "items": items,
+    }
+
+
+def empty_digest_index():
+    return {"version": DIGEST_INDEX_VERSION, "days": {}}
+
+
+def load_digest_index(path=DIGEST_INDEX_PATH):
+    if not os.path.exists(path):
+        return empty_digest_index()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable digest index {path}: {e}")
+        return empty_digest_index()
+    if index.get('version') != DIGEST_INDEX_VERSION:
+        return empty_digest_index()
+    index.setdefault('days', {})
+    return index
+
+
+def save_digest_index(index, path=DIGEST_INDEX_PATH):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def update_digest_index(index, md_dir='.'):
+    """Re-parse only the markdown files whose fingerprint changed.
+
+    Returns the number of days added, changed or removed.
+    """
+    days = index['days']
+    seen = set()
+    changed = 0
+    for name in os.listdir(md_dir):
+        name_match = MD_NAME_PATTERN.match(name)
+        if not name_match:
+            continue
+        date_str = name_match.group(1)
+        md_path = os.path.join(md_dir, name)
+        seen.add(date_str)
+        if file_unchanged(md_path, days.get(date_str)):
+            continue
+        with open(md_path, 'r', encoding='utf-8') as f:
+            digest = parse_digest(f.read())
+        days[date_str] = dict(file_fingerprint(md_path), **digest)
+        changed += 1
+    for date_str in set(days) - seen:
+        del days[date_str]
+        changed += 1
+    return changed
+
+
+def build_digest_index(path=DIGEST_INDEX_PATH, md_dir='.'):
+    # 加载索引、增量更新，有变化时写回磁盘
+    index = load_digest_index(path)
+    if update_digest_index(index, md_dir):
+        save_digest_index(index, path)
+    return index
+
+
+def get_summaries(index, date_str):
+    day = index['days'].get(date_str)
+    return day['summaries'] if day else list(NO_SUMMARY)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the digest index of the daily YYYY-MM-DD.md reports.")
+    parser.add_argument("--dump", metavar="DATE", help="Print the indexed digest for one date")
+    args = parser.parse_args()
+
+    index = load_digest_index()
+    changed = update_digest_index(index)
+    if changed:
+        save_digest_index(index)
+    print(f"Digest index: {len(index['days'])} day(s), {changed} updated.")
+    if args.dump:
+        print(json.dumps(index['days'].get(args.dump), ensure_ascii=False, indent=2))
@@ -1,33 +1,181 @@
 import os
+import re
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image, ImageDraw, ImageFont
 
-def create_placeholder_image(text, filename, color=(70, 70, 70)):
-    # Create a 800x600 image
-    img = Image.new('RGB', (800, 600), color=color)
-    d = ImageDraw.Draw(img)
-    
-    # Draw some text
+from digest_index import parse_digest
+
+# 占位图：按清单或当天 markdown 的新闻标题生成，文件名取渲染参数的哈希，
+# 参数不变时重复运行不会重新绘制
+IMAGE_SIZE = (800, 600)
+# 绘制逻辑变化时递增，所有占位图会换用新文件名
+PLACEHOLDER_VERSION = 1
+PALETTE = [
+    (255, 153, 0), (59, 130, 246), (239, 68, 68), (139, 92, 246),
+    (34, 197, 94), (234, 179, 8), (107, 114, 128),
+]
+# 标题多为中文，依次尝试常见的 CJK 字体，都没有时使用 Pillow 自带字体
+FONT_CANDIDATES = [
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/System/Library/Fonts/PingFang.ttc",
+    "C:/Windows/Fonts/msyh.ttc",
+]
+DEFAULT_FONT_SIZE = 32
+# 标题 -> 文件名的索引写成隐藏文件：verify_assets.py、部署增量和监视都会跳过它，不会被当成图片校验
+INDEX_NAME = '.placeholders.json'
+LEGACY_INDEX_NAME = 'placeholders.json'
+
+
+def find_font(font_path=None):
+    if font_path:
+        return font_path
+    return next((path for path in FONT_CANDIDATES if os.path.exists(path)), None)
+
+
+def placeholder_spec(date_str, text, color=None, font_path=None, font_size=DEFAULT_FONT_SIZE):
+    # 颜色未指定时由标题决定，同一标题每次得到相同颜色
+    digest = hashlib.sha256(text.encode('utf-8')).digest()
+    color = list(color) if color else list(PALETTE[digest[0] % len(PALETTE)])
+    spec = {
+        "text": text, "color": color, "size": list(IMAGE_SIZE),
+        "font": os.path.basename(font_path) if font_path else None, "font_size": font_size,
+        "version": PLACEHOLDER_VERSION,
+    }
+    spec_hash = hashlib.sha256(json.dumps(spec, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+    path = os.path.join('imgs', *date_str.split('-'), f"ph-{spec_hash[:12]}.jpg").replace('\\', '/')
+    return dict(spec, date=date_str, path=path)
+
+
+# 字体在每个进程中只加载一次
+_font = None
+
+def init_worker(font_path, font_size):
+    global _font
     try:
-        # Try to use a default font
-        font = ImageFont.load_default()
-    except:
-        font = None
-        
-    d.text((50, 250), text, fill=(255, 255, 255))
-    
-    # Save the image
-    path = os.path.join('imgs/2026/02/01', filename)
-    img.save(path)
-    print(f"Created {path}")
-
-# Ensure directory exists
-os.makedirs('imgs/2026/02/01', exist_ok=True)
-
-# Create images for today's news
-create_placeholder_image("BTC ETF Outflow - Jan 2026", "btc_outflow.jpg", color=(255, 153, 0))
-create_placeholder_image("Hyperunit Whale ETH Exit", "whale_exit.jpg", color=(59, 130, 246))
-create_placeholder_image("Step Finance Hack Investigation", "step_hack.jpg", color=(239, 68, 68))
-create_placeholder_image("Tether 2025 Profit Report", "tether_profit.jpg", color=(139, 92, 246))
-create_placeholder_image("Strategic BTC Reserve Blueprint", "btc_reserve.jpg", color=(34, 197, 94))
-create_placeholder_image("Binance Macro Risk Report", "binance_report.jpg", color=(234, 179, 8))
-create_placeholder_image("White House Stablecoin Summit", "whitehouse_summit.jpg", color=(107, 114, 128))
+        _font = ImageFont.truetype(font_path, font_size) if font_path else ImageFont.load_default(size=font_size)
+    except (OSError, TypeError):
+        # 旧版 Pillow 的 load_default 不支持 size
+        _font = ImageFont.load_default()
+
+
+def wrap_text(draw, text, font, max_width):
+    # 按像素宽度折行；中文没有空格，逐字符累加
+    lines, current = [], ""
+    for char in text:
+        if draw.textlength(current + char, font=font) > max_width and current:
+            lines.append(current.rstrip())
+            current = char.lstrip()
+        else:
+            current += char
+    if current:
+        lines.append(current)
+    return lines
+
+
+def render_placeholder(spec):
+    img = Image.new('RGB', tuple(spec['size']), color=tuple(spec['color']))
+    d = ImageDraw.Draw(img)
+    width, height = spec['size']
+    lines = wrap_text(d, spec['text'], _font, width - 100)
+    line_height = spec['font_size'] * 1.4
+    y = (height - line_height * len(lines)) / 2
+    for line in lines:
+        d.text((50, y), line, fill=(255, 255, 255), font=_font)
+        y += line_height
+
+    os.makedirs(os.path.dirname(spec['path']), exist_ok=True)
+    tmp_path = spec['path'] + '.tmp'
+    img.save(tmp_path, format='JPEG', quality=85)
+    os.replace(tmp_path, spec['path'])
+    return spec['path']
+
+
+def headlines_from_md(date_str, md_dir='.'):
+    md_path = os.path.join(md_dir, f"{date_str}.md")
+    if not os.path.exists(md_path):
+        print(f"No markdown report for {date_str}")
+        return []
+    with open(md_path, 'r', encoding='utf-8') as f:
+        digest = parse_digest(f.read())
+    return [item['title'] for item in digest['items'] if item['title']]
+
+
+def load_placeholder_manifest(path):
+    """Read ``[{"date": "YYYY-MM-DD", "text": "...", "color": [r, g, b]}, ...]``."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def update_placeholder_index(specs):
+    # 每个日期目录下记录 标题 -> 文件名，方便页面引用
+    by_dir = {}
+    for spec in specs:
+        by_dir.setdefault(os.path.dirname(spec['path']), {})[spec['text']] = os.path.basename(spec['path'])
+    for directory, names in by_dir.items():
+        index_path = os.path.join(directory, INDEX_NAME)
+        legacy_path = os.path.join(directory, LEGACY_INDEX_NAME)
+        index = {}
+        # 旧版本写在 placeholders.json 中的记录并入新索引
+        for path in (legacy_path, index_path):
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    index.update(json.load(f))
+        migrated = not os.path.exists(legacy_path)
+        if migrated and all(index.get(text) == name for text, name in names.items()):
+            continue
+        index.update(names)
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=2, sort_keys=True)
+        if os.path.exists(legacy_path):
+            os.remove(legacy_path)
+
+
+def generate_placeholders(specs, jobs=1, font_path=None, font_size=DEFAULT_FONT_SIZE):
+    """Render the placeholders whose file does not exist yet; returns the new paths."""
+    todo = list({spec['path']: spec for spec in specs if not os.path.exists(spec['path'])}.values())
+    created = []
+    if jobs > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(font_path, font_size)) as pool:
+            created = list(pool.map(render_placeholder, todo, chunksize=max(1, len(todo) // (jobs * 4))))
+    elif todo:
+        init_worker(font_path, font_size)
+        created = [render_placeholder(spec) for spec in todo]
+    for path in created:
+        print(f"Created {path}")
+    print(f"{len(created)} placeholder(s) created, {len(specs) - len(todo)} unchanged.")
+    update_placeholder_index(specs)
+    return created
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate placeholder images for daily reports.")
+    parser.add_argument("dates", nargs="*", help="Dates (YYYY-MM-DD) whose .md headlines get placeholders")
+    parser.add_argument("--month", action="append", default=[], metavar="YYYY-MM",
+                        help="Every date of this month that has a .md report")
+    parser.add_argument("--manifest", help="JSON list of {date, text, color} entries to render (in addition to any dates)")
+    parser.add_argument("--jobs", "-j", type=int, default=0, help="Worker processes (0 = one per CPU)")
+    parser.add_argument("--font", help="TrueType/OpenType font to use (should cover CJK)")
+    parser.add_argument("--font-size", type=int, default=DEFAULT_FONT_SIZE)
+    args = parser.parse_args()
+
+    font_path = find_font(args.font)
+    if not font_path:
+        print("No CJK font found, using the Pillow default font (pass --font for Chinese headlines).")
+
+    entries = []
+    if args.manifest:
+        entries = load_placeholder_manifest(args.manifest)
+    dates = list(args.dates)
+    for month in args.month:
+        dates += sorted(name[:-3] for name in os.listdir('.') if re.match(rf'^{re.escape(month)}-\d{{2}}\.md$', name))
+    for date_str in dates:
+        entries += [{"date": date_str, "text": text} for text in headlines_from_md(date_str)]
+    if not entries:
+        parser.error("nothing to generate: pass dates, --month or --manifest")
+
+    specs = [placeholder_spec(e['date'], e['text'], e.get('color'), font_path, args.font_size) for e in entries]
+    generate_placeholders(specs, args.jobs or os.cpu_count() or 1, font_path, args.font_size)
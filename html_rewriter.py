@@ -0,0 +1,300 @@
+import re
+from html import escape
+
+# 单次扫描的 HTML 重写器：按标签/ID 注册处理函数，一次遍历完成所有替换
+TAG_PATTERN = re.compile(r'''
+    (?P<comment><!--.*?-->)
+  | (?P<decl><![^>]*>)
+  | </(?P<end>[a-zA-Z][\w:-]*)\s*>
+  | <(?P<start>[a-zA-Z][\w:-]*)(?P<attrs>(?:\s+[^\s/>"'=]+(?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s>"']+))?)*)\s*(?P<close>/?)>
+''', re.S | re.X)
+ATTR_PATTERN = re.compile(r'''([^\s/>"'=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>"']+)))?''')
+
+VOID_ELEMENTS = frozenset('area base br col embed hr img input link meta param source track wbr'.split())
+RAW_TEXT_ELEMENTS = frozenset(['script', 'style'])
+RAW_TEXT_END = {name: re.compile(rf'</{name}\s*>', re.I) for name in RAW_TEXT_ELEMENTS}
+
+
+class Element:
+    """A start tag seen by the rewriter, handed to the registered handlers.
+
+    Handlers change the output through ``set_attribute``, ``remove_attribute``,
+    ``set_inner_content``, ``append`` (insert before the end tag) and
+    ``replace``. ``inner_html`` is only available for handlers registered
+    with ``buffer=True``.
+    """
+
+    def __init__(self, tag, raw, attrs_text, self_closing):
+        self.tag = tag
+        self.raw = raw
+        self.self_closing = self_closing or tag in VOID_ELEMENTS
+        self.inner_html = None
+        self._attrs_text = attrs_text
+        self._attrs = None
+        self._start = None
+        self._inner = None
+        self._append = []
+        self._replace = None
+        self._replace_comment = None
+
+    @property
+    def attrs(self):
+        if self._attrs is None:
+            self._attrs = {}
+            for m in ATTR_PATTERN.finditer(self._attrs_text):
+                value = next((v for v in m.group(2, 3, 4) if v is not None), '')
+                self._attrs.setdefault(m.group(1).lower(), value)
+        return self._attrs
+
+    def get_attribute(self, name):
+        return self.attrs.get(name)
+
+    def has_attribute(self, name):
+        return name in self.attrs
+
+    def _find_attribute(self, name):
+        # 按属性逐个解析，属性值里出现的同名文字和以该名称开头的其他属性 (srcset/src) 不会被误当成该属性
+        current = self._start or self.raw
+        end = len(current) - (2 if current.endswith('/>') else 1)
+        existing = next((m for m in ATTR_PATTERN.finditer(current, 1 + len(self.tag), end)
+                         if m.group(1).lower() == name.lower()), None)
+        return current, end, existing
+
+    def set_attribute(self, name, value):
+        attr = f'{name}="{escape(value, quote=True)}"'
+        current, end, existing = self._find_attribute(name)
+        if existing:
+            self._start = current[:existing.start()] + attr + current[existing.end():]
+        else:
+            self._start = current[:end].rstrip() + ' ' + attr + current[end:]
+        self.attrs[name] = value
+
+    def remove_attribute(self, name):
+        current, end, existing = self._find_attribute(name)
+        if existing:
+            self._start = current[:existing.start()].rstrip() + current[existing.end():]
+            self.attrs.pop(name.lower(), None)
+
+    def set_inner_content(self, html):
+        self._inner = html
+
+    def append(self, html):
+        self._append.append(html)
+
+    def replace(self, html, with_comment=None):
+        # with_comment: 紧挨在元素前面的标记注释（如 <!-- Sidebar -->）一起替换
+        self._replace = html
+        self._replace_comment = with_comment
+
+    def start_tag(self):
+        return self._start or self.raw
+
+
+class _Open:
+    # 等待结束标签的元素；depth 记录内部同名标签的嵌套层数
+    __slots__ = ('element', 'depth', 'skip', 'buffer')
+
+    def __init__(self, element, skip=False, buffer=None):
+        self.element = element
+        self.depth = 0
+        self.skip = skip
+        self.buffer = buffer
+
+
+class HTMLRewriter:
+    """Apply all registered transforms to a document in one pass.
+
+    Selectors are ``tag``, ``#id`` or ``tag#id``. Text handlers receive the
+    raw content of ``<script>``/``<style>`` elements and return the new text,
+    or None to drop the whole element (with the marker comment ``with_comment``
+    right before it, if given).
+    Handlers do not run inside content that is being replaced or buffered.
+    """
+
+    def __init__(self):
+        self._element_handlers = []
+        self._text_handlers = {}
+
+    def on_element(self, selector, handler, buffer=False):
+        tag, _, element_id = selector.partition('#')
+        self._element_handlers.append((tag.lower() or None, element_id or None, handler, buffer))
+        return self
+
+    def on_text(self, tag, handler, with_comment=None):
+        self._text_handlers.setdefault(tag.lower(), []).append((handler, with_comment))
+        return self
+
+    def _matching_handlers(self, element):
+        for tag, element_id, handler, buffer in self._element_handlers:
+            if tag and tag != element.tag:
+                continue
+            if element_id and element.get_attribute('id') != element_id:
+                continue
+            yield handler, buffer
+
+    def transform(self, html):
+        out = []
+        open_elements = []
+        state = {"skip": 0, "buffer": None, "eat_newline": False}
+
+        def emit(chunk):
+            if state['skip']:
+                return
+            if state['eat_newline']:
+                state['eat_newline'] = False
+                if chunk.startswith('\n'):
+                    chunk = chunk[1:]
+            if state['buffer'] is not None:
+                state['buffer'].append(chunk)
+            else:
+                out.append(chunk)
+
+        def emit_replacement(element):
+            target = out if state['buffer'] is None else state['buffer']
+            if element._replace_comment:
+                _strip_trailing_comment(target, element._replace_comment)
+            # 替换为空且元素独占一行时，连同这一行删除
+            if element._replace == '' and target and target[-1].rstrip(' \t').endswith('\n'):
+                target[-1] = target[-1].rstrip(' \t')
+                state['eat_newline'] = True
+                return
+            emit(element._replace)
+
+        # 没有处理函数的标签走快速路径，只做嵌套计数
+        handler_tags = {tag for tag, _, _, _ in self._element_handlers if tag}
+        any_tag_ids = any(tag is None for tag, _, _, _ in self._element_handlers)
+
+        pos = 0
+        length = len(html)
+        while pos < length:
+            m = TAG_PATTERN.search(html, pos)
+            if not m:
+                emit(html[pos:])
+                break
+            if m.start() > pos:
+                emit(html[pos:m.start()])
+            token = m.group(0)
+            pos = m.end()
+
+            if m.group('comment') or m.group('decl'):
+                emit(token)
+                continue
+
+            end_name = m.group('end')
+            if end_name:
+                name = end_name.lower()
+                current = next((o for o in reversed(open_elements) if o.element.tag == name), None)
+                if current is None or current.depth:
+                    if current:
+                        current.depth -= 1
+                    emit(token)
+                    continue
+                open_elements.remove(current)
+                element = current.element
+                if current.skip:
+                    state['skip'] -= 1
+                if current.buffer is not None:
+                    state['buffer'] = None
+                    element.inner_html = ''.join(current.buffer)
+                    for handler, _ in self._matching_handlers(element):
+                        handler(element)
+                    if element._replace is not None:
+                        emit_replacement(element)
+                        continue
+                    emit(element.start_tag())
+                    emit(element._inner if element._inner is not None else element.inner_html)
+                elif element._replace is not None:
+                    continue
+                for chunk in element._append:
+                    emit(chunk)
+                emit(token)
+                continue
+
+            name = m.group('start').lower()
+            attrs_text = m.group('attrs')
+            if not (name in handler_tags or name in RAW_TEXT_ELEMENTS or (any_tag_ids and 'id=' in attrs_text)):
+                if not (m.group('close') or name in VOID_ELEMENTS):
+                    for o in open_elements:
+                        if o.element.tag == name:
+                            o.depth += 1
+                emit(token)
+                continue
+            element = Element(name, token, attrs_text, bool(m.group('close')))
+            if not element.self_closing:
+                for o in open_elements:
+                    if o.element.tag == name:
+                        o.depth += 1
+
+            handlers = []
+            if not state['skip'] and state['buffer'] is None:
+                handlers = list(self._matching_handlers(element))
+            if any(buffer for _, buffer in handlers) and not element.self_closing:
+                # 缓冲元素内容，结束标签出现时再调用处理函数
+                state['buffer'] = []
+                open_elements.append(_Open(element, buffer=state['buffer']))
+                continue
+            for handler, _ in handlers:
+                handler(element)
+
+            if element._replace is not None:
+                emit_replacement(element)
+                if not element.self_closing:
+                    state['skip'] += 1
+                    open_elements.append(_Open(element, skip=True))
+                continue
+
+            emit(element.start_tag())
+            if element.self_closing:
+                continue
+
+            if name in RAW_TEXT_ELEMENTS:
+                end = RAW_TEXT_END[name].search(html, pos)
+                text_end = end.start() if end else length
+                text = html[pos:text_end]
+                drop_comment = None
+                if element._inner is not None:
+                    text = element._inner
+                elif not state['skip'] and state['buffer'] is None:
+                    for handler, drop_comment in self._text_handlers.get(name, ()):
+                        text = handler(text)
+                        if text is None:
+                            break
+                pos = end.end() if end else length
+                if text is None:
+                    # 删除整个元素：撤回刚输出的开始标签（及前面的标记注释），元素独占一行时连同这一行删除
+                    out.pop()
+                    if drop_comment:
+                        _strip_trailing_comment(out, drop_comment)
+                    if out and out[-1].rstrip(' \t').endswith('\n') and html.startswith('\n', pos):
+                        out[-1] = out[-1].rstrip(' \t')
+                        pos += 1
+                    continue
+                emit(text)
+                for chunk in element._append:
+                    emit(chunk)
+                if end:
+                    emit(end.group(0))
+                continue
+
+            if element._inner is not None:
+                emit(element._inner)
+                state['skip'] += 1
+                open_elements.append(_Open(element, skip=True))
+            elif element._append:
+                open_elements.append(_Open(element))
+
+        # 文档结束但元素未闭合：保留缓冲的原始内容
+        for o in open_elements:
+            if o.buffer is not None:
+                out.append(o.element.raw)
+                out.extend(o.buffer)
+        return ''.join(out)
+
+
+def _strip_trailing_comment(chunks, comment):
+    # 删除输出末尾的标记注释及其后的空白
+    i = len(chunks)
+    while i and not chunks[i - 1].strip():
+        i -= 1
+    if i and chunks[i - 1] == comment:
+        del chunks[i - 1:]
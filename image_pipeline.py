@@ -0,0 +1,192 @@
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from build_manifest import file_fingerprint, file_unchanged, sha256_bytes
+
+# 响应式图片：为 imgs/ 下的 JPEG/PNG 生成多个宽度的 WebP（可选 AVIF）版本，
+# 文件名取源图内容哈希，源图不变时不会重新编码
+IMAGE_ROOT = 'imgs'
+VARIANT_DIR = 'imgs/_variants'
+# asset_store.py 的内容寻址存储；和变体一样是生成的文件，遍历源图时跳过
+STORE_DIR = 'imgs/store'
+GENERATED_DIRS = frozenset([VARIANT_DIR, STORE_DIR])
+IMAGE_INDEX_PATH = '.image_variants.json'
+# 编码参数或索引格式变化时递增，旧索引整体失效
+IMAGE_INDEX_VERSION = 1
+
+VARIANT_WIDTHS = (400, 800, 1200)
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+ENCODE_OPTIONS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 6},
+    "avif": {"format": "AVIF", "quality": 60},
+}
+MIME_TYPES = {"webp": "image/webp", "avif": "image/avif"}
+# 卡片在桌面端三列、移动端单列
+DEFAULT_SIZES = "(min-width: 768px) 33vw, 100vw"
+
+
+def variant_path(sha256, width, fmt):
+    return f"{VARIANT_DIR}/{sha256[:16]}-{width}.{fmt}"
+
+
+def find_source_images(root=IMAGE_ROOT):
+    paths = []
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if os.path.join(dirpath, d).replace('\\', '/') not in GENERATED_DIRS)
+        for filename in sorted(files):
+            if filename.lower().endswith(SOURCE_EXTENSIONS):
+                paths.append(os.path.join(dirpath, filename).replace('\\', '/'))
+    return paths
+
+
+def encode_variants(task):
+    """Encode the missing variants of one source image (runs in a pool worker).
+
+    Returns ``{"path", "width", "height", "variants", "error"}``; variants
+    whose file already exists are reused without decoding them again.
+    """
+    path, sha256, formats = task
+    result = {"path": path, "width": None, "height": None, "variants": [], "error": None}
+    try:
+        from PIL import Image
+        with Image.open(path) as img:
+            img.load()
+            width, height = img.size
+            result.update(width=width, height=height)
+            if img.mode not in ('RGB', 'RGBA'):
+                img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+            # 不放大：超过原图宽度的尺寸用原图宽度代替
+            widths = sorted({min(w, width) for w in VARIANT_WIDTHS})
+            for fmt in formats:
+                for w in widths:
+                    out = variant_path(sha256, w, fmt)
+                    if not os.path.exists(out):
+                        resized = img if w == width else img.resize((w, round(height * w / width)), Image.LANCZOS)
+                        tmp = out + '.tmp'
+                        resized.save(tmp, **ENCODE_OPTIONS[fmt])
+                        os.replace(tmp, out)
+                    result['variants'].append({"format": fmt, "width": w, "path": out})
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def load_image_index(path=IMAGE_INDEX_PATH):
+    if not os.path.exists(path):
+        return {"version": IMAGE_INDEX_VERSION, "images": {}}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    if index.get('version') != IMAGE_INDEX_VERSION:
+        return {"version": IMAGE_INDEX_VERSION, "images": {}}
+    return index
+
+
+def save_image_index(index, path=IMAGE_INDEX_PATH):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'), sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _variants_present(record, formats):
+    return (set(record.get('formats', ())) == set(formats)
+            and all(os.path.exists(v['path']) for v in record['variants']))
+
+
+def build_image_variants(root=IMAGE_ROOT, formats=("webp",), jobs=1, index_path=IMAGE_INDEX_PATH, sources=None):
+    """Bring the variant index up to date and return ``{source path: record}``.
+
+    ``sources`` replaces the walk of ``root`` (the build passes the store
+    blobs, which outlive the pruned originals). Sources whose size/mtime
+    (or content hash) and variant files are unchanged are skipped without
+    decoding. Without Pillow, only the still-valid records are returned and
+    nothing is encoded.
+    """
+    index = load_image_index(index_path)
+    images = index['images']
+    formats = tuple(formats)
+
+    current = {}
+    tasks = []
+    if sources is None:
+        sources = find_source_images(root)
+    for path in sources:
+        if not path.lower().endswith(SOURCE_EXTENSIONS):
+            continue
+        record = images.get(path)
+        if record and file_unchanged(path, record['file']) and _variants_present(record, formats):
+            current[path] = record
+            continue
+        fingerprint = file_fingerprint(path)
+        if fingerprint['size'] == 0:
+            continue
+        tasks.append(((path, fingerprint['sha256'], formats), fingerprint))
+
+    if tasks:
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            print(f"Pillow is not installed, skipping {len(tasks)} image(s) without variants.")
+            tasks = []
+
+    if tasks:
+        os.makedirs(VARIANT_DIR, exist_ok=True)
+        # 内容相同的源图只编码一次，共用同一组变体
+        unique = {}
+        for task, _ in tasks:
+            unique.setdefault(task[1], task)
+        if jobs > 1 and len(unique) > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = dict(zip(unique, pool.map(encode_variants, unique.values())))
+        else:
+            results = {sha256: encode_variants(task) for sha256, task in unique.items()}
+        encoded = 0
+        for (path, sha256, _), fingerprint in tasks:
+            result = results[sha256]
+            if result['error']:
+                print(f"Could not encode variants for {path}: {result['error']}")
+                continue
+            current[path] = {
+                "file": fingerprint, "formats": list(formats),
+                "width": result['width'], "height": result['height'], "variants": result['variants'],
+            }
+            encoded += 1
+        print(f"Image variants: {encoded} image(s) processed ({len(unique)} unique), {len(current) - encoded} unchanged.")
+
+    if current != images:
+        index['images'] = current
+        save_image_index(index, index_path)
+    return current
+
+
+def images_digest(images):
+    # 页面输入的一部分：变体集合变化时需要重写引用图片的页面
+    return sha256_bytes(json.dumps({p: r['variants'] for p, r in images.items()}, sort_keys=True))
+
+
+def responsive_attributes(record, page_dir):
+    """Return ``{format: srcset}`` plus the intrinsic size for an indexed image.
+
+    URLs are relative to ``page_dir`` so they work like the original ``src``.
+    """
+    srcsets = {}
+    for variant in record['variants']:
+        url = os.path.relpath(variant['path'], page_dir).replace('\\', '/')
+        srcsets.setdefault(variant['format'], []).append(f"{url} {variant['width']}w")
+    return {fmt: ", ".join(items) for fmt, items in srcsets.items()}, record['width'], record['height']
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate responsive WebP/AVIF variants for the images under imgs/.")
+    parser.add_argument("--avif", action="store_true", help="Also encode AVIF variants")
+    parser.add_argument("--jobs", "-j", type=int, default=0, help="Encoder processes (0 = one per CPU)")
+    args = parser.parse_args()
+
+    formats = ("avif", "webp") if args.avif else ("webp",)
+    images = build_image_variants(formats=formats, jobs=args.jobs or os.cpu_count() or 1)
+    print(f"{len(images)} image(s) indexed in {IMAGE_INDEX_PATH}")
@@ -0,0 +1,113 @@
+// History Archive 懒加载：展开时才请求 /archive/ 下的年份索引和按月分片
+(function() {
+    const ARCHIVE_BASE = '/archive/';
+    const DAY_ACTIVE_CLASS = 'text-orange-500 bg-orange-500/10 font-bold';
+    const DAY_LINK_CLASS = 'text-gray-500 hover:text-orange-500 hover:bg-orange-500/5';
+
+    const cache = {};
+    function fetchShard(name) {
+        if (!cache[name]) {
+            cache[name] = fetch(ARCHIVE_BASE + name).then(function(response) {
+                if (!response.ok) throw new Error('HTTP ' + response.status);
+                return response.json();
+            }).catch(function(error) {
+                delete cache[name];
+                throw error;
+            });
+        }
+        return cache[name];
+    }
+
+    // 当前页面的日期 (YYYY-MM-DD)，从 /content/YYYY/MM/DD/ 路径中解析
+    function currentDate() {
+        const match = window.location.pathname.match(/\/content\/(\d{4})\/(\d{2})\/(\d{2})/);
+        return match ? match[1] + '-' + match[2] + '-' + match[3] : null;
+    }
+
+    function escapeHtml(text) {
+        return String(text).replace(/[&<>"']/g, function(c) {
+            return { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' }[c];
+        });
+    }
+
+    function renderMonth(shard, current) {
+        return shard.weeks.map(function(week) {
+            const isOpen = week.days.some(function(day) { return day.date === current; });
+            const days = week.days.map(function(day) {
+                const cls = day.date === current ? DAY_ACTIVE_CLASS : DAY_LINK_CLASS;
+                return '<a href="' + escapeHtml(day.url) + '" class="block text-[11px] ' + cls + ' py-1 border-l border-white/5 pl-3 -ml-[1px] rounded-md transition-all">' + day.date + '</a>';
+            }).join(' ');
+            return '<details class="group/week ml-2"' + (isOpen ? ' open' : '') + '>' +
+                '<summary class="flex items-center justify-between text-[11px] text-gray-500 p-1 cursor-pointer hover:text-orange-500 dark:hover:text-white list-none">' +
+                '<span>' + escapeHtml(week.label) + '</span>' +
+                '<i class="fa-solid fa-chevron-right text-[7px] transition-transform group-open/week:rotate-90"></i>' +
+                '</summary><div class="pl-2 mt-1 space-y-1">' + days + '</div></details>';
+        }).join(' ');
+    }
+
+    function renderIndex(index, current) {
+        const currentMonth = current ? current.slice(0, 7) : null;
+        return index.years.map(function(year) {
+            const months = year.months.map(function(month) {
+                const key = year.year + '-' + month.month;
+                return '<details class="group/month ml-2" data-archive-month="' + key + '"' + (key === currentMonth ? ' open' : '') + '>' +
+                    '<summary class="flex items-center justify-between text-[12px] text-gray-400 p-1 cursor-pointer hover:text-orange-500 dark:hover:text-white list-none">' +
+                    '<span>' + month.month + '月</span>' +
+                    '<i class="fa-solid fa-chevron-right text-[8px] transition-transform group-open/month:rotate-90"></i>' +
+                    '</summary><div class="pl-2 mt-1 space-y-1"></div></details>';
+            }).join('');
+            const isOpen = currentMonth && currentMonth.slice(0, 4) === year.year;
+            return '<details class="group/year"' + (isOpen ? ' open' : '') + '>' +
+                '<summary class="flex items-center justify-between text-sm text-gray-300 p-2 cursor-pointer hover:text-orange-500 dark:hover:text-white list-none">' +
+                '<span class="flex items-center gap-2"><i class="fa-solid fa-folder text-xs text-orange-500/50"></i> ' + year.year + '年</span>' +
+                '<i class="fa-solid fa-chevron-right text-[10px] transition-transform group-open/year:rotate-90"></i>' +
+                '</summary><div class="pl-2 mt-1 space-y-1">' + months + '</div></details>';
+        }).join('');
+    }
+
+    function loadMonth(details, current) {
+        if (details.dataset.loaded) return;
+        details.dataset.loaded = '1';
+        const body = details.querySelector('div');
+        fetchShard(details.dataset.archiveMonth + '.json').then(function(shard) {
+            body.innerHTML = renderMonth(shard, current);
+        }).catch(function() {
+            delete details.dataset.loaded;
+        });
+    }
+
+    function loadArchive(container) {
+        if (container.dataset.loaded) return;
+        container.dataset.loaded = '1';
+        const current = currentDate();
+        fetchShard('index.json').then(function(index) {
+            container.innerHTML = renderIndex(index, current);
+            container.querySelectorAll('details[data-archive-month]').forEach(function(details) {
+                if (details.open) loadMonth(details, current);
+                details.addEventListener('toggle', function() {
+                    if (details.open) loadMonth(details, current);
+                });
+            });
+        }).catch(function() {
+            delete container.dataset.loaded;
+            container.innerHTML = '<p class="text-[11px] text-gray-500 p-2">历史存档加载失败，请稍后重试</p>';
+        });
+    }
+
+    function init() {
+        document.querySelectorAll('[data-archive-root]').forEach(function(container) {
+            const details = container.closest('details');
+            if (!details) return;
+            if (details.open) loadArchive(container);
+            details.addEventListener('toggle', function() {
+                if (details.open) loadArchive(container);
+            });
+        });
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', init);
+    } else {
+        init();
+    }
+})();
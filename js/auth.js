@@ -4,10 +4,66 @@ if (typeof window.supabaseClient === 'undefined') {
     window.supabaseClient = null;
 }
 
+// 登录框只在第一次打开时插入页面，不再内联到每个页面中
+const AUTH_MODAL_HTML = `
+    <div id="authModal" class="hidden fixed inset-0 z-[100] items-center justify-center p-4 bg-black/60 backdrop-blur-sm">
+        <div class="w-full max-w-md bento-card p-8 relative overflow-hidden">
+            <button onclick="toggleAuthModal()" class="absolute top-4 right-4 text-gray-500 hover:text-white transition-colors">
+                <i class="fa-solid fa-xmark text-xl"></i>
+            </button>
+            <div class="text-center mb-8">
+                <div class="w-16 h-16 bg-orange-500/10 rounded-2xl flex items-center justify-center mx-auto mb-4">
+                    <i class="fa-solid fa-shield-halved text-orange-500 text-3xl"></i>
+                </div>
+                <h2 id="authTitle" class="text-2xl font-black tracking-tight">登录</h2>
+                <p class="text-gray-500 text-sm mt-2">加入 Crypto Insights，解锁更多深度内容</p>
+            </div>
+            <form onsubmit="handleAuthSubmit(event)" class="space-y-4">
+                <div>
+                    <label class="block text-xs font-bold text-gray-500 uppercase tracking-widest mb-2">邮箱地址</label>
+                    <input id="authEmail" type="email" required placeholder="name@example.com" class="w-full bg-black/20 dark:bg-white/5 border border-white/10 rounded-xl px-4 py-3 text-sm focus:border-orange-500 outline-none transition-colors">
+                </div>
+                <div>
+                    <label class="block text-xs font-bold text-gray-500 uppercase tracking-widest mb-2">密码</label>
+                    <input id="authPassword" type="password" required placeholder="••••••••" class="w-full bg-black/20 dark:bg-white/5 border border-white/10 rounded-xl px-4 py-3 text-sm focus:border-orange-500 outline-none transition-colors">
+                </div>
+                <button id="authSubmitBtn" type="submit" class="w-full bg-orange-500 hover:bg-orange-600 text-black font-bold py-3 rounded-xl transition-all active:scale-95">立即登录</button>
+            </form>
+            <div class="mt-6 text-center">
+                <button id="authToggleText" onclick="toggleAuthMode()" class="text-xs text-gray-500 hover:text-orange-500 transition-colors">没有账号？去注册</button>
+            </div>
+        </div>
+    </div>`;
+
+function mountAuthModal() {
+    document.body.insertAdjacentHTML('beforeend', AUTH_MODAL_HTML);
+    return document.getElementById('authModal');
+}
+
+// 图片加载失败时换成备用图片，再失败时显示占位图
+window.handleImageError = function(img) {
+    console.warn('Image failed to load:', img.src);
+    const fallbackUrls = [
+        'https://images.unsplash.com/photo-1639762681485-074b7f938ba0?auto=format&fit=crop&w=800&q=80',
+        'https://images.unsplash.com/photo-1621416894569-0f39ed31d247?auto=format&fit=crop&w=800&q=80',
+        'https://images.unsplash.com/photo-1622790698141-94e30457ef12?auto=format&fit=crop&w=800&q=80'
+    ];
+    if (img.dataset.triedFallback) {
+        img.src = 'https://via.placeholder.com/800x450/1a1a1a/ffffff?text=Image+Unavailable';
+        return;
+    }
+    img.dataset.triedFallback = 'true';
+    img.src = fallbackUrls[Math.floor(Math.random() * fallbackUrls.length)];
+};
+
+// 本脚本在页面末尾加载，之前已经加载失败的图片调用 onerror 时函数还不存在，这里补上
+document.querySelectorAll('img[onerror]').forEach((img) => {
+    if (img.complete && img.naturalWidth === 0) img.decode().catch(() => window.handleImageError(img));
+});
+
 // 将所有函数暴露到全局作用域
 window.toggleAuthModal = function() {
-    const modal = document.getElementById('authModal');
-    if (!modal) return;
+    const modal = document.getElementById('authModal') || mountAuthModal();
     modal.classList.toggle('hidden');
     modal.classList.toggle('flex');
 };
@@ -95,3 +151,13 @@ window.handleSignOut = async function() {
         console.error("Supabase client failed to initialize:", e);
     }
 })();
+
+// 离线缓存：sw.js 由构建生成，预缓存页面外壳和最近几天的页面。
+// 本地预览时不注册，避免监视模式下看到缓存的旧页面
+if ('serviceWorker' in navigator && !['localhost', '127.0.0.1'].includes(location.hostname)) {
+    window.addEventListener('load', () => {
+        navigator.serviceWorker.register('/sw.js').catch((error) => {
+            console.warn('Service worker registration failed:', error);
+        });
+    });
+}
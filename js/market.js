@@ -0,0 +1,45 @@
+// 行情组件：只读取定时生成的 /market.json，带 If-None-Match，数据没变时服务器返回 304
+(function() {
+    const FEED_URL = '/market.json';
+    let etag = null;
+
+    function formatChange(change) {
+        const color = change >= 0 ? 'text-green-500' : 'text-red-500';
+        return `<span class="text-xs font-normal ${color}">${change >= 0 ? '+' : ''}${change.toFixed(2)}%</span>`;
+    }
+
+    function setHtml(id, html) {
+        const element = document.getElementById(id);
+        if (element) element.innerHTML = html;
+    }
+
+    function render(feed) {
+        if (feed.btc && feed.btc.usd != null) {
+            setHtml('btc-price-display', `$${feed.btc.usd.toLocaleString()} ${formatChange(feed.btc.usd_24h_change || 0)}`);
+        }
+        if (feed.eth && feed.eth.usd != null) {
+            setHtml('eth-price-display', `$${feed.eth.usd.toLocaleString()} ${formatChange(feed.eth.usd_24h_change || 0)}`);
+        }
+        if (feed.fng && feed.fng.value != null) {
+            setHtml('sentiment-display', `${feed.fng.value_classification} <span class="text-xs font-normal text-gray-400">Index: ${feed.fng.value}</span>`);
+        }
+        const time = document.getElementById('last-update-time');
+        if (time) time.innerText = new Date(feed.updated_at).toLocaleTimeString();
+    }
+
+    // 页面原有的 DOMContentLoaded / setInterval 调用的就是这个函数
+    window.fetchMarketData = async function() {
+        try {
+            const response = await fetch(FEED_URL, {
+                cache: 'no-store',
+                headers: etag ? { 'If-None-Match': etag } : {}
+            });
+            if (response.status === 304) return;
+            if (!response.ok) throw new Error('HTTP ' + response.status);
+            etag = response.headers.get('ETag');
+            render(await response.json());
+        } catch (error) {
+            console.error('Failed to fetch market data:', error);
+        }
+    };
+})();
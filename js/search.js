@@ -0,0 +1,139 @@
+// 站内搜索：分词规则与 search_index.py 保持一致，只下载查询词所在的分片
+(function() {
+    const SEARCH_BASE = '/search/';
+    const MAX_RESULTS = 20;
+    const CJK_RUN = /[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+/g;
+    const LATIN_WORD = /[a-z0-9]+/g;
+
+    const cache = {};
+    function fetchJson(name) {
+        if (!cache[name]) {
+            cache[name] = fetch(SEARCH_BASE + name).then(function(response) {
+                if (!response.ok) throw new Error('HTTP ' + response.status);
+                return response.json();
+            }).catch(function(error) {
+                delete cache[name];
+                throw error;
+            });
+        }
+        return cache[name];
+    }
+
+    function tokenize(text) {
+        text = text.toLowerCase();
+        const terms = [];
+        (text.match(CJK_RUN) || []).forEach(function(run) {
+            if (run.length === 1) {
+                terms.push(run);
+            } else {
+                for (let i = 0; i < run.length - 1; i++) terms.push(run.slice(i, i + 2));
+            }
+        });
+        (text.match(LATIN_WORD) || []).forEach(function(word) {
+            if (word.length > 1) terms.push(word);
+        });
+        return Array.from(new Set(terms));
+    }
+
+    function shardKey(term, shardBits) {
+        const code = term.codePointAt(0);
+        return code < 128 ? term[0] : 'u' + (code >> shardBits).toString(16);
+    }
+
+    function decodePostings(deltas) {
+        const ids = new Set();
+        let current = 0;
+        for (let i = 0; i < deltas.length; i++) {
+            current += deltas[i];
+            ids.add(current);
+        }
+        return ids;
+    }
+
+    async function search(query) {
+        const terms = tokenize(query);
+        if (!terms.length) return [];
+        const meta = await fetchJson('meta.json');
+        const postings = await Promise.all(terms.map(function(term) {
+            const key = shardKey(term, meta.shard_bits);
+            if (meta.shards.indexOf(key) === -1) return new Set();
+            return fetchJson('t-' + key + '.json').then(function(shard) {
+                return decodePostings(shard[term] || []);
+            });
+        }));
+        // 所有词项都命中的文档，按文档编号倒序（即日期从新到旧）
+        postings.sort(function(a, b) { return a.size - b.size; });
+        const hits = Array.from(postings[0]).filter(function(id) {
+            return postings.every(function(ids) { return ids.has(id); });
+        }).sort(function(a, b) { return b - a; }).slice(0, MAX_RESULTS);
+
+        const chunks = await Promise.all(hits.map(function(id) {
+            return fetchJson('d-' + Math.floor(id / meta.doc_chunk) + '.json');
+        }));
+        return hits.map(function(id, i) { return chunks[i][id % meta.doc_chunk]; });
+    }
+
+    function escapeHtml(text) {
+        return String(text).replace(/[&<>"']/g, function(c) {
+            return { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' }[c];
+        });
+    }
+
+    function renderResults(container, results, query) {
+        if (!results.length) {
+            container.innerHTML = '<p class="text-xs text-gray-500 p-2">没有找到与 “' + escapeHtml(query) + '” 相关的内容</p>';
+            return;
+        }
+        container.innerHTML = results.map(function(doc) {
+            return '<a href="' + escapeHtml(doc[1]) + '" class="block p-2 rounded-lg hover:bg-orange-500/10 transition-colors">' +
+                '<span class="block text-[10px] font-mono text-gray-500">' + escapeHtml(doc[0]) + '</span>' +
+                '<span class="block text-xs font-bold text-gray-300">' + escapeHtml(doc[2]) + '</span>' +
+                '<span class="block text-[11px] text-gray-500 line-clamp-2">' + escapeHtml(doc[3]) + '</span>' +
+                '</a>';
+        }).join('');
+    }
+
+    function init() {
+        document.querySelectorAll('[data-search-root]').forEach(function(root) {
+            const input = root.querySelector('[data-search-input]');
+            const container = root.querySelector('[data-search-results]');
+            if (!input || !container) return;
+            let timer = null;
+            let latest = 0;
+
+            input.addEventListener('input', function() {
+                clearTimeout(timer);
+                const query = input.value.trim();
+                if (!query) {
+                    container.classList.add('hidden');
+                    return;
+                }
+                timer = setTimeout(function() {
+                    const request = ++latest;
+                    search(query).then(function(results) {
+                        // 只显示最后一次输入的结果
+                        if (request !== latest) return;
+                        renderResults(container, results, query);
+                        container.classList.remove('hidden');
+                    }).catch(function() {
+                        if (request !== latest) return;
+                        container.innerHTML = '<p class="text-xs text-gray-500 p-2">搜索索引加载失败，请稍后重试</p>';
+                        container.classList.remove('hidden');
+                    });
+                }, 150);
+            });
+            input.addEventListener('keydown', function(event) {
+                if (event.key === 'Escape') container.classList.add('hidden');
+            });
+            document.addEventListener('click', function(event) {
+                if (!root.contains(event.target)) container.classList.add('hidden');
+            });
+        });
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', init);
+    } else {
+        init();
+    }
+})();
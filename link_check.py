@@ -0,0 +1,226 @@
+import os
+import sys
+import json
+import time
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from digest_index import build_digest_index
+from html_rewriter import HTMLRewriter
+
+# 来源链接检查：收集 markdown 中的 **来源** 链接和页面中的外部链接，并发检查是否仍可访问。
+# 每个站点限制并发数并间隔请求，结果缓存一段时间，重复运行只检查过期或新增的链接
+LINK_CACHE_PATH = '.link_cache.json'
+LINK_REPORT_PATH = 'link_report.json'
+# 检查规则变化时递增，旧缓存整体失效
+LINK_CACHE_VERSION = 1
+
+OK_TTL = 7 * 86400
+# 失败的链接更快重试，临时故障不会在报告里停留一周
+BROKEN_TTL = 86400
+PER_HOST_LIMIT = 2
+PER_HOST_DELAY = 1.0
+REQUEST_TIMEOUT = 15
+USER_AGENT = "Mozilla/5.0 (compatible; CryptoInsights-linkcheck/1.0)"
+# 这些状态码通常是反爬或限流，不代表链接失效，单独列出
+BLOCKED_STATUSES = {401, 403, 429, 999}
+
+
+def collect_source_links(content_dir='content', md_dir='.'):
+    """Return ``{url: [location, ...]}`` for the markdown 来源 links and the pages' external links."""
+    links = {}
+
+    def add_link(url, location):
+        if url.startswith(('http://', 'https://')):
+            locations = links.setdefault(url, [])
+            if location not in locations:
+                locations.append(location)
+
+    def add_anchor(element, location):
+        # 页面中新窗口打开的外部链接就是各条新闻的来源
+        if element.get_attribute('target') == '_blank':
+            add_link(element.get_attribute('href') or '', location)
+
+    digests = build_digest_index(md_dir=md_dir)
+    for date_str, day in sorted(digests['days'].items()):
+        for item in day['items']:
+            if item.get('source'):
+                add_link(item['source']['url'], f"{date_str}.md")
+
+    for root, dirs, files in os.walk(content_dir):
+        dirs.sort()
+        if 'index.html' not in files:
+            continue
+        path = os.path.join(root, 'index.html').replace('\\', '/')
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        rewriter = HTMLRewriter()
+        rewriter.on_element('a', lambda element: add_anchor(element, path))
+        rewriter.transform(html)
+    return links
+
+
+class HostThrottle:
+    """Per-host concurrency limit plus a minimum delay between request starts."""
+
+    def __init__(self, limit=PER_HOST_LIMIT, delay=PER_HOST_DELAY):
+        self.limit = limit
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _host(self, host):
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = {"semaphore": threading.Semaphore(self.limit), "next": 0.0}
+            return self._hosts[host]
+
+    def run(self, url, fn):
+        state = self._host(urllib.parse.urlsplit(url).netloc.lower())
+        with state['semaphore']:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, state['next'])
+                state['next'] = start + self.delay
+            if start > now:
+                time.sleep(start - now)
+            return fn(url)
+
+
+def check_url(url, timeout=REQUEST_TIMEOUT):
+    """Request ``url`` (HEAD, falling back to GET) and return ``{"status", "final_url", "error"}``."""
+    result = {"status": None, "final_url": None, "error": None}
+    for method in ('HEAD', 'GET'):
+        request = urllib.request.Request(url, method=method, headers={"User-Agent": USER_AGENT})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                result.update(status=response.status, final_url=response.geturl(), error=None)
+        except urllib.error.HTTPError as e:
+            result.update(status=e.code, final_url=e.geturl(), error=None)
+        except Exception as e:
+            result.update(status=None, error=f"{type(e).__name__}: {e}")
+        # 有些站点不支持 HEAD，用 GET 再试一次
+        if result['status'] not in (405, 501) and not (method == 'HEAD' and result['error']):
+            break
+    return result
+
+
+def classify(result):
+    if result['status'] and result['status'] < 400:
+        return 'ok'
+    if result['status'] in BLOCKED_STATUSES:
+        return 'blocked'
+    return 'broken'
+
+
+def load_link_cache(path=LINK_CACHE_PATH):
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get('version') != LINK_CACHE_VERSION:
+        return {}
+    return cache.get('urls', {})
+
+
+def save_link_cache(urls, path=LINK_CACHE_PATH):
+    if not path:
+        return
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"version": LINK_CACHE_VERSION, "urls": urls}, f, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def cache_fresh(entry, now, ok_ttl=OK_TTL, broken_ttl=BROKEN_TTL):
+    ttl = ok_ttl if entry.get('state') == 'ok' else broken_ttl
+    return 0 <= now - entry.get('checked_at', 0) < ttl
+
+
+def interleave_hosts(urls):
+    # 按站点轮流排列 (a1, b1, a2, ...)，避免所有线程都在等同一个站点的请求间隔
+    by_host = {}
+    for url in urls:
+        by_host.setdefault(urllib.parse.urlsplit(url).netloc.lower(), []).append(url)
+    groups = list(by_host.values())
+    return [group[i] for i in range(max(map(len, groups), default=0)) for group in groups if i < len(group)]
+
+
+def check_links(links, jobs=16, per_host=PER_HOST_LIMIT, delay=PER_HOST_DELAY, timeout=REQUEST_TIMEOUT,
+                cache_path=LINK_CACHE_PATH, ok_ttl=OK_TTL, broken_ttl=BROKEN_TTL, check=None):
+    """Check every URL in ``links`` that is not freshly cached; returns ``{url: result}``.
+
+    ``check(url, timeout)`` defaults to ``check_url``; pass another callable
+    (or point the links at a local stub server) to test without network.
+    URLs are interleaved across hosts so the per-host delays overlap.
+    """
+    check = check or check_url
+    cache = load_link_cache(cache_path)
+    now = time.time()
+    results = {}
+    pending = []
+    for url in links:
+        entry = cache.get(url)
+        if entry and cache_fresh(entry, now, ok_ttl, broken_ttl):
+            results[url] = dict(entry, cached=True)
+        else:
+            pending.append(url)
+
+    throttle = HostThrottle(per_host, delay)
+
+    def run(url):
+        result = throttle.run(url, lambda u: check(u, timeout))
+        return url, dict(result, state=classify(result), checked_at=time.time())
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for url, result in pool.map(run, interleave_hosts(pending)):
+            results[url] = dict(result, cached=False)
+
+    # 只保留仍被引用的链接
+    save_link_cache({url: {k: v for k, v in r.items() if k != 'cached'} for url, r in results.items()}, cache_path)
+    return results
+
+
+def write_link_report(links, results, path=LINK_REPORT_PATH):
+    report = {"checked": sum(not r['cached'] for r in results.values()), "cached": sum(r['cached'] for r in results.values())}
+    for state in ('broken', 'blocked'):
+        report[state] = [
+            {"url": url, "status": r['status'], "error": r['error'], "locations": links[url]}
+            for url, r in sorted(results.items()) if r['state'] == state
+        ]
+    report['ok'] = sum(r['state'] == 'ok' for r in results.values())
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Check that the 来源 links of the daily digests still resolve.")
+    parser.add_argument("--jobs", "-j", type=int, default=16, help="Concurrent requests in total")
+    parser.add_argument("--per-host", type=int, default=PER_HOST_LIMIT, help="Concurrent requests per host")
+    parser.add_argument("--delay", type=float, default=PER_HOST_DELAY, help="Seconds between requests to the same host")
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT, help="Per-request timeout in seconds")
+    parser.add_argument("--ttl-days", type=float, default=OK_TTL / 86400, help="Days before a working link is checked again")
+    parser.add_argument("--report", default=LINK_REPORT_PATH, metavar="PATH", help="Where to write the JSON report")
+    parser.add_argument("--no-cache", action="store_true", help="Check every link and do not update the cache")
+    args = parser.parse_args()
+
+    links = collect_source_links()
+    print(f"--- Checking {len(links)} source link(s) ---")
+    results = check_links(links, args.jobs, args.per_host, args.delay, args.timeout,
+                          None if args.no_cache else LINK_CACHE_PATH, ok_ttl=args.ttl_days * 86400)
+    report = write_link_report(links, results, args.report)
+    for entry in report['broken']:
+        print(f"❌ {entry['url']}: {entry['status'] or entry['error']} ({', '.join(entry['locations'])})")
+    for entry in report['blocked']:
+        print(f"⚠️  {entry['url']}: HTTP {entry['status']} (blocked, not verified)")
+    print(f"{report['ok']} ok, {len(report['broken'])} broken, {len(report['blocked'])} blocked; "
+          f"{report['checked']} checked, {report['cached']} from cache. Wrote {args.report}")
+    sys.exit(1 if report['broken'] else 0)
@@ -0,0 +1,170 @@
+import os
+import json
+import time
+import threading
+import http.client
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+# 行情数据源：每个数据源单独设置超时时间
+MARKET_SOURCES = {
+    "price": {
+        "url": "https://api.coingecko.com/api/v3/simple/price?ids=bitcoin,ethereum&vs_currencies=usd&include_24hr_change=true",
+        "timeout": 10,
+    },
+    "fng": {
+        "url": "https://api.alternative.me/fng/",
+        "timeout": 10,
+    },
+}
+
+# 本地缓存，几分钟内重复构建时不再请求 API
+MARKET_CACHE_PATH = '.market_cache.json'
+MARKET_CACHE_TTL = 300
+
+
+class HTTPTransport:
+    """Minimal keep-alive HTTP(S) client.
+
+    Connections are pooled per scheme/host and reused across requests and
+    threads. Anything with a ``get(url, timeout) -> (status, body)`` method
+    can be passed instead, e.g. to test against a local stub server.
+    """
+
+    def __init__(self, user_agent="CryptoInsights-build/1.0"):
+        self.user_agent = user_agent
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, key, timeout):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock:
+                    conn.sock.settimeout(timeout)
+                return conn
+        scheme, netloc = key
+        conn_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return conn_class(netloc, timeout=timeout)
+
+    def _release(self, key, conn):
+        with self._lock:
+            self._idle.setdefault(key, []).append(conn)
+
+    def get(self, url, timeout):
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        conn = self._acquire(key, timeout)
+        try:
+            conn.request('GET', path, headers={"User-Agent": self.user_agent, "Accept": "application/json"})
+            response = conn.getresponse()
+            body = response.read()
+        except Exception:
+            conn.close()
+            raise
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        return response.status, body
+
+    def close(self):
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+
+def fetch_json(transport, url, timeout, retries=3, backoff=1.0, log=None):
+    # 失败时按指数退避重试：1s, 2s, 4s ...
+    log = log if log is not None else []
+    for attempt in range(retries):
+        try:
+            status, body = transport.get(url, timeout)
+            if status == 200:
+                return json.loads(body)
+            log.append(f"HTTP {status} for {url}")
+        except Exception as e:
+            log.append(f"Fetch failed for {url}: {e}")
+        if attempt < retries - 1:
+            time.sleep(backoff * (2 ** attempt))
+    return None
+
+
+def load_cached_market_data(cache_path=MARKET_CACHE_PATH, ttl=MARKET_CACHE_TTL):
+    if not cache_path or not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    age = time.time() - cached.get('fetched_at', 0)
+    if 0 <= age < ttl:
+        print(f"Using cached market data ({int(age)}s old).")
+        return cached.get('data')
+    return None
+
+
+def save_cached_market_data(data, cache_path=MARKET_CACHE_PATH):
+    if not cache_path:
+        return
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"fetched_at": time.time(), "data": data}, f)
+    os.replace(tmp_path, cache_path)
+
+
+def get_market_data(transport=None, sources=None, cache_path=MARKET_CACHE_PATH, ttl=MARKET_CACHE_TTL,
+                    retries=3, backoff=1.0):
+    """Fetch BTC/ETH prices and the Fear & Greed index.
+
+    Both sources are queried concurrently. Returns
+    ``{"btc": ..., "eth": ..., "fng": ...}`` or ``None`` if either source
+    fails after all retries.
+    """
+    cached = load_cached_market_data(cache_path, ttl)
+    if cached:
+        return cached
+
+    sources = sources or MARKET_SOURCES
+    own_transport = transport is None
+    transport = transport or HTTPTransport()
+    try:
+        logs = {name: [] for name in sources}
+        with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+            futures = {
+                name: pool.submit(fetch_json, transport, source['url'], source['timeout'], retries, backoff, logs[name])
+                for name, source in sources.items()
+            }
+            results = {name: future.result() for name, future in futures.items()}
+    finally:
+        if own_transport:
+            transport.close()
+    # 并发请求的日志按数据源顺序输出
+    for name in sources:
+        for line in logs[name]:
+            print(line)
+
+    price_data, fng_data = results.get('price'), results.get('fng')
+    if not (price_data and fng_data):
+        print("All market data fetch attempts failed.")
+        return None
+
+    data = {
+        "btc": price_data.get('bitcoin', {}),
+        "eth": price_data.get('ethereum', {}),
+        "fng": fng_data.get('data', [{}])[0]
+    }
+    try:
+        save_cached_market_data(data, cache_path)
+    except OSError as e:
+        print(f"Could not write market data cache {cache_path}: {e}")
+    return data
@@ -0,0 +1,70 @@
+import time
+import json
+import datetime
+
+from build_manifest import write_if_changed
+from market_data import get_market_data
+
+# 行情快照文件：由定时任务每分钟写一次，页面上的行情组件只读取这个静态文件
+# （带 ETag/If-None-Match），访问量再大也不会直接请求上游 API
+MARKET_JSON_PATH = 'market.json'
+MARKET_FEED_VERSION = 1
+FEED_INTERVAL = 60
+
+
+def build_market_feed(market_data, updated_at=None):
+    updated_at = updated_at or datetime.datetime.now(datetime.timezone.utc)
+    btc, eth, fng = market_data.get('btc', {}), market_data.get('eth', {}), market_data.get('fng', {})
+    return {
+        "version": MARKET_FEED_VERSION,
+        "updated_at": updated_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        "btc": {"usd": btc.get('usd'), "usd_24h_change": btc.get('usd_24h_change')},
+        "eth": {"usd": eth.get('usd'), "usd_24h_change": eth.get('usd_24h_change')},
+        "fng": {"value": fng.get('value'), "value_classification": fng.get('value_classification')},
+    }
+
+
+def publish_market_feed(market_data, path=MARKET_JSON_PATH, updated_at=None):
+    """Write ``market_data`` as the feed file (atomically); returns True if it changed."""
+    feed = build_market_feed(market_data, updated_at)
+    return write_if_changed(path, json.dumps(feed, ensure_ascii=False, separators=(',', ':')))
+
+
+def refresh_market_feed(path=MARKET_JSON_PATH, **kwargs):
+    # 请求失败时保留上一次的文件，页面继续显示旧数据，而不是写入空值
+    market_data = get_market_data(ttl=0, **kwargs)
+    if not market_data:
+        print(f"Market data unavailable, keeping the previous {path}.")
+        return False
+    changed = publish_market_feed(market_data, path)
+    print(f"{'Updated' if changed else 'Unchanged'} {path} at {datetime.datetime.now().strftime('%H:%M:%S')}")
+    return changed
+
+
+def run_producer(path=MARKET_JSON_PATH, interval=FEED_INTERVAL):
+    # 按固定节拍运行，一次请求的耗时不会累积成漂移
+    next_run = time.monotonic()
+    while True:
+        try:
+            refresh_market_feed(path)
+        except Exception as e:
+            print(f"Market feed refresh failed: {type(e).__name__}: {e}")
+        next_run += interval
+        time.sleep(max(0.0, next_run - time.monotonic()))
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Publish the market ticker snapshot read by the pages.")
+    parser.add_argument("--output", "-o", default=MARKET_JSON_PATH, help="Feed file to write")
+    parser.add_argument("--interval", type=int, default=FEED_INTERVAL, help="Seconds between refreshes")
+    parser.add_argument("--once", action="store_true", help="Refresh once and exit (for cron)")
+    args = parser.parse_args()
+
+    if args.once:
+        refresh_market_feed(args.output)
+    else:
+        try:
+            run_producer(args.output, args.interval)
+        except KeyboardInterrupt:
+            print("Stopped.")
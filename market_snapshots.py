@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import datetime
+
+from market_data import HTTPTransport, fetch_json
+
+# 按日期记录的行情快照（追加写入的 JSONL，每天一行），用于冻结历史页面
+SNAPSHOT_PATH = 'market_snapshots.jsonl'
+
+COINGECKO_HISTORY_URL = "https://api.coingecko.com/api/v3/coins/{coin}/history?date={date}&localization=false"
+FNG_HISTORY_URL = "https://api.alternative.me/fng/?limit=0"
+
+
+def load_snapshots(path=SNAPSHOT_PATH):
+    """Return ``{date: snapshot}``; the first line recorded for a date wins."""
+    snapshots = {}
+    if not os.path.exists(path):
+        return snapshots
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                snapshot = json.loads(line)
+            except ValueError:
+                print(f"Skipping malformed snapshot on line {line_no} of {path}")
+                continue
+            snapshots.setdefault(snapshot.get('date'), snapshot)
+    return snapshots
+
+
+def make_snapshot(date_str, market_data, recorded_at=None):
+    recorded_at = recorded_at or datetime.datetime.now()
+    btc, eth, fng = market_data.get('btc', {}), market_data.get('eth', {}), market_data.get('fng', {})
+    return {
+        "date": date_str,
+        "recorded_at": recorded_at.strftime('%Y-%m-%dT%H:%M:%S'),
+        "btc": {"usd": btc.get('usd', 0), "usd_24h_change": btc.get('usd_24h_change', 0)},
+        "eth": {"usd": eth.get('usd', 0), "usd_24h_change": eth.get('usd_24h_change', 0)},
+        "fng": {"value": fng.get('value', 'N/A'), "value_classification": fng.get('value_classification', 'N/A')},
+    }
+
+
+def record_snapshot(snapshots, date_str, market_data, path=SNAPSHOT_PATH, recorded_at=None):
+    # 每个日期只记录一次，已有记录时不覆盖
+    if date_str in snapshots or not market_data:
+        return False
+    snapshot = make_snapshot(date_str, market_data, recorded_at)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(snapshot, ensure_ascii=False, sort_keys=True) + '\n')
+    snapshots[date_str] = snapshot
+    return True
+
+
+def snapshot_time(snapshot):
+    # 页面上显示的冻结时间 (HH:MM:SS)
+    return snapshot.get('recorded_at', '')[11:19] or '00:00:00'
+
+
+def _coingecko_price(transport, coin, day, log):
+    data = fetch_json(transport, COINGECKO_HISTORY_URL.format(coin=coin, date=day.strftime('%d-%m-%Y')), 15, log=log)
+    try:
+        return data['market_data']['current_price']['usd']
+    except (TypeError, KeyError):
+        return None
+
+
+def backfill_snapshots(dates, path=SNAPSHOT_PATH, transport=None, delay=2.0):
+    """Record snapshots for past dates from the CoinGecko / alternative.me history APIs.
+
+    The 24h change is derived from the previous day's price. ``delay`` spaces
+    out the CoinGecko calls to stay under the public rate limit.
+    """
+    snapshots = load_snapshots(path)
+    missing = sorted(d for d in set(dates) if d not in snapshots)
+    if not missing:
+        print("All requested dates already have snapshots.")
+        return 0
+
+    # 只关闭自己创建的连接，调用方传入的 transport 由调用方管理
+    own_transport = transport is None
+    transport = transport or HTTPTransport()
+    log = []
+    fng_history = fetch_json(transport, FNG_HISTORY_URL, 15, log=log) or {}
+    fng_by_date = {}
+    for item in fng_history.get('data', []):
+        day = datetime.datetime.fromtimestamp(int(item['timestamp']), datetime.timezone.utc).strftime('%Y-%m-%d')
+        fng_by_date[day] = item
+
+    recorded = 0
+    for date_str in missing:
+        day = datetime.datetime.strptime(date_str, '%Y-%m-%d')
+        market_data = {"fng": fng_by_date.get(date_str, {})}
+        for key, coin in (("btc", "bitcoin"), ("eth", "ethereum")):
+            price = _coingecko_price(transport, coin, day, log)
+            time.sleep(delay)
+            prev_price = _coingecko_price(transport, coin, day - datetime.timedelta(days=1), log)
+            time.sleep(delay)
+            if price is not None:
+                change = (price - prev_price) / prev_price * 100 if prev_price else 0
+                market_data[key] = {"usd": round(price, 2), "usd_24h_change": change}
+
+        if "btc" not in market_data or "eth" not in market_data:
+            print(f"Could not backfill {date_str}")
+            continue
+        if record_snapshot(snapshots, date_str, market_data, path, recorded_at=day.replace(hour=23, minute=59, second=59)):
+            recorded += 1
+            print(f"Recorded snapshot for {date_str}")
+
+    for line in log:
+        print(line)
+    if own_transport:
+        transport.close()
+    return recorded
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Backfill per-date market snapshots used to freeze historical pages.")
+    parser.add_argument("dates", nargs="*", help="Dates to backfill (YYYY-MM-DD); defaults to every content/ date without a snapshot")
+    parser.add_argument("--path", default=SNAPSHOT_PATH, help="Snapshot store to append to")
+    args = parser.parse_args()
+
+    dates = args.dates
+    if not dates:
+        import re
+        for root, dirs, files in os.walk('content'):
+            date_match = re.search(r'(\d{4})/(\d{2})/(\d{2})$', root.replace('\\', '/'))
+            if date_match and 'index.html' in files:
+                dates.append("-".join(date_match.groups()))
+    print(f"Backfilled {backfill_snapshots(dates, path=args.path)} snapshot(s).")
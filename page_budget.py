@@ -0,0 +1,241 @@
+import os
+import sys
+import json
+import datetime
+import urllib.parse
+
+from html_rewriter import HTMLRewriter
+from precompress import compress_bytes, compressed_formats, sibling_current
+
+# 页面体积预算：统计每个生成的 HTML 的原始/压缩体积、内联脚本和样式、外部请求数和引用的图片字节数，
+# 超出预算时警告或让构建失败，并把结果写入趋势报告，体积回退在上线前就能发现
+PAGE_BUDGET_PATH = 'page_budgets.json'
+PAGE_BUDGET_REPORT_PATH = 'page_budget_report.json'
+PAGE_BUDGET_VERSION = 1
+# 趋势报告最多保留的历史记录条数
+TREND_LENGTH = 200
+
+# 每项指标的 warn/fail 阈值；page_budgets.json 可以覆盖，
+# 格式 {"budgets": {metric: {"warn", "fail"}}, "pages": {path: {metric: {...}}}}
+DEFAULT_BUDGETS = {
+    "raw_bytes": {"warn": 48 * 1024, "fail": 96 * 1024},
+    "gz_bytes": {"warn": 12 * 1024, "fail": 24 * 1024},
+    "inline_script_bytes": {"warn": 12 * 1024, "fail": 24 * 1024},
+    "inline_style_bytes": {"warn": 8 * 1024, "fail": 16 * 1024},
+    "requests": {"warn": 20, "fail": 30},
+    "third_party_requests": {"warn": 12, "fail": 16},
+    "image_bytes": {"warn": 1536 * 1024, "fail": 3072 * 1024},
+}
+# 带 rel 的 <link> 中会产生请求的类型
+REQUEST_LINK_RELS = {'stylesheet', 'preload', 'modulepreload', 'icon', 'manifest'}
+
+
+def find_html_pages(content_dir='content'):
+    paths = ['index.html'] if os.path.exists('index.html') else []
+    for root, dirs, files in os.walk(content_dir):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename.endswith('.html'):
+                paths.append(os.path.join(root, filename).replace('\\', '/'))
+    return paths
+
+
+def load_budgets(path=PAGE_BUDGET_PATH):
+    """Return ``(budgets, page_budgets)``: the defaults merged with ``path`` if it exists."""
+    budgets = {metric: dict(limits) for metric, limits in DEFAULT_BUDGETS.items()}
+    pages = {}
+    if path and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        for metric, limits in config.get('budgets', {}).items():
+            budgets.setdefault(metric, {}).update(limits)
+        pages = config.get('pages', {})
+    return budgets, pages
+
+
+def budgets_for(path, budgets, page_budgets):
+    limits = {metric: dict(values) for metric, values in budgets.items()}
+    for metric, values in page_budgets.get(path, {}).items():
+        limits.setdefault(metric, {}).update(values)
+    return limits
+
+
+def resolve_local(url, page_path):
+    # 页面中的相对/根路径 URL 转成仓库内的文件路径；外部 URL 返回 None
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    path = urllib.parse.unquote(parts.path)
+    if path.startswith('/'):
+        return path.lstrip('/')
+    return os.path.normpath(os.path.join(os.path.dirname(page_path), path)).replace('\\', '/')
+
+
+def compressed_size(path, data, fmt):
+    # precompress 已写出的最新副本直接取其大小，否则在内存中压缩一次
+    sibling = f"{path}.{fmt}"
+    if sibling_current(path, sibling):
+        return os.path.getsize(sibling)
+    return len(compress_bytes(data, fmt))
+
+
+def measure_page(path):
+    """Return the weight metrics of one generated HTML file."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    metrics = {"raw_bytes": len(data)}
+    for fmt in compressed_formats():
+        metrics[f"{fmt}_bytes"] = compressed_size(path, data, fmt)
+
+    inline = {"script": 0, "style": 0}
+    requests = set()
+    images = {}
+
+    def add_request(url):
+        if url and not url.startswith(('data:', '#', 'javascript:')):
+            requests.add(url)
+
+    def count_inline(tag):
+        def handler(text):
+            inline[tag] += len(text.encode('utf-8'))
+            return text
+        return handler
+
+    def on_script(element):
+        add_request(element.get_attribute('src'))
+
+    def on_link(element):
+        rels = set((element.get_attribute('rel') or '').lower().split())
+        if rels & REQUEST_LINK_RELS:
+            add_request(element.get_attribute('href'))
+
+    def on_image(element):
+        src = element.get_attribute('src')
+        if not src or src.startswith('data:'):
+            return
+        add_request(src)
+        local = resolve_local(src, path)
+        images[src] = os.path.getsize(local) if local and os.path.isfile(local) else None
+
+    def on_iframe(element):
+        add_request(element.get_attribute('src'))
+
+    rewriter = HTMLRewriter()
+    rewriter.on_element('script', on_script)
+    rewriter.on_element('link', on_link)
+    rewriter.on_element('img', on_image)
+    rewriter.on_element('iframe', on_iframe)
+    rewriter.on_text('script', count_inline('script'))
+    rewriter.on_text('style', count_inline('style'))
+    rewriter.transform(data.decode('utf-8'))
+
+    metrics.update(
+        inline_script_bytes=inline['script'],
+        inline_style_bytes=inline['style'],
+        requests=len(requests),
+        third_party_requests=sum(resolve_local(url, path) is None for url in requests),
+        image_bytes=sum(size for size in images.values() if size),
+        # 外部图片的大小在构建时无法得知，只计数
+        remote_images=sum(size is None for size in images.values()),
+    )
+    return metrics
+
+
+def check_budgets(metrics, limits):
+    """Return ``[(level, metric, value, limit)]`` for the metrics over budget."""
+    violations = []
+    for metric, values in limits.items():
+        if metric not in metrics:
+            continue
+        for level in ('fail', 'warn'):
+            if level in values and metrics[metric] > values[level]:
+                violations.append((level, metric, metrics[metric], values[level]))
+                break
+    return violations
+
+
+def load_budget_report(path=PAGE_BUDGET_REPORT_PATH):
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return report if report.get('version') == PAGE_BUDGET_VERSION else {}
+
+
+def summarize(pages):
+    totals, largest = {}, {}
+    for metrics in pages.values():
+        for metric, value in metrics.items():
+            totals[metric] = totals.get(metric, 0) + value
+            largest[metric] = max(largest.get(metric, 0), value)
+    return {"pages": len(pages), "total": totals, "max": largest}
+
+
+def analyze_pages(paths=None, budget_path=PAGE_BUDGET_PATH, report_path=PAGE_BUDGET_REPORT_PATH):
+    """Measure every page, check the budgets and update the trend report.
+
+    Returns the report; ``report["failed"]`` is True when any page is over
+    a ``fail`` budget. A trend entry is appended only when the summary
+    differs from the previous one, so repeated no-op builds do not grow it.
+    """
+    budgets, page_budgets = load_budgets(budget_path)
+    previous = load_budget_report(report_path)
+    pages = {path: measure_page(path) for path in (paths if paths is not None else find_html_pages())}
+
+    violations = []
+    for path, metrics in pages.items():
+        for level, metric, value, limit in check_budgets(metrics, budgets_for(path, budgets, page_budgets)):
+            violations.append({"path": path, "level": level, "metric": metric, "value": value, "limit": limit})
+
+    now = datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+    summary = summarize(pages)
+    trend = previous.get('trend', [])
+    if not trend or {k: v for k, v in trend[-1].items() if k != 'at'} != summary:
+        trend = (trend + [dict(summary, at=now)])[-TREND_LENGTH:]
+
+    report = {
+        "version": PAGE_BUDGET_VERSION,
+        "generated_at": now,
+        "failed": any(v['level'] == 'fail' for v in violations),
+        "budgets": budgets,
+        "violations": violations,
+        "summary": summary,
+        "pages": pages,
+        "trend": trend,
+    }
+    if report_path:
+        tmp_path = report_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, report_path)
+
+    # 与上次报告相比压缩后体积变大的页面
+    size_metric = f"{compressed_formats()[0]}_bytes"
+    for path, metrics in pages.items():
+        before = previous.get('pages', {}).get(path, {}).get(size_metric)
+        if before and metrics[size_metric] > before:
+            print(f"📈 {path}: {size_metric} {before} -> {metrics[size_metric]} (+{metrics[size_metric] - before})")
+    for v in violations:
+        icon = "❌" if v['level'] == 'fail' else "⚠️ "
+        print(f"{icon} {v['path']}: {v['metric']} {v['value']} over the {v['level']} budget of {v['limit']}")
+    fails = sum(v['level'] == 'fail' for v in violations)
+    print(f"Page budget: {len(pages)} page(s), {fails} over budget, {len(violations) - fails} warning(s)"
+          f"{f' ({report_path})' if report_path else ''}")
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Check the weight and request count of the generated pages against budgets.")
+    parser.add_argument("--budgets", default=PAGE_BUDGET_PATH, metavar="PATH",
+                        help="JSON file overriding the default budgets (used if it exists)")
+    parser.add_argument("--report", default=PAGE_BUDGET_REPORT_PATH, metavar="PATH", help="Where to write the JSON trend report")
+    parser.add_argument("--warn-only", action="store_true", help="Exit 0 even if a page is over a fail budget")
+    parser.add_argument("pages", nargs="*", help="HTML files to check (default: index.html and content/)")
+    args = parser.parse_args()
+
+    report = analyze_pages(args.pages or None, args.budgets, args.report)
+    sys.exit(1 if report['failed'] and not args.warn_only else 0)
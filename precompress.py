@@ -0,0 +1,166 @@
+import os
+import gzip
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 预压缩：为生成的 HTML/JS/SVG（以及 archive/、search/ 的 JSON 分片）写出 .br 和 .gz 文件，
+# 自托管时由服务器直接发送 (nginx gzip_static/brotli_static)，不必每次请求都压缩
+PRECOMPRESS_ROOTS = ('index.html', 'sw.js', 'sw-manifest.json', 'content', 'css', 'js', 'assets', 'imgs', 'archive', 'search')
+PRECOMPRESS_EXTENSIONS = ('.html', '.js', '.svg', '.json')
+COMPRESSION_REPORT_PATH = 'compression_report.json'
+# 太小的文件压缩后省下的字节不如响应头多
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+
+def compressed_formats():
+    return ('br', 'gz') if brotli else ('gz',)
+
+
+def compress_bytes(data, fmt):
+    if fmt == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    # mtime=0：内容不变时 .gz 文件逐字节相同
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def find_compressible(roots=PRECOMPRESS_ROOTS):
+    """Return ``(sources, siblings)``: the files to compress and every existing .br/.gz file."""
+    sources, siblings = [], []
+
+    def add(path):
+        if path.endswith(('.br', '.gz')):
+            siblings.append(path)
+        elif path.lower().endswith(PRECOMPRESS_EXTENSIONS):
+            sources.append(path)
+
+    for root in roots:
+        if os.path.isfile(root):
+            add(root)
+            for fmt in ('br', 'gz'):
+                if os.path.exists(f"{root}.{fmt}"):
+                    siblings.append(f"{root}.{fmt}")
+            continue
+        for dirpath, dirs, files in os.walk(root):
+            dirs.sort()
+            for filename in sorted(files):
+                add(os.path.join(dirpath, filename).replace('\\', '/'))
+    return sources, siblings
+
+
+def sibling_current(path, sibling):
+    # 压缩文件的修改时间与源文件一致时视为最新（写入后用 os.utime 同步）
+    try:
+        return os.stat(sibling).st_mtime_ns == os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def compress_file(task):
+    """Write the requested siblings of one file (runs in a pool worker).
+
+    Returns ``{"path", "size", "br", "gz", "error"}`` with the compressed
+    sizes of the siblings written.
+    """
+    path, formats = task
+    result = {"path": path, "size": None, "error": None}
+    try:
+        stat = os.stat(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+        result['size'] = len(data)
+        for fmt in formats:
+            compressed = compress_bytes(data, fmt)
+            sibling = f"{path}.{fmt}"
+            tmp_path = sibling + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(compressed)
+            os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            os.replace(tmp_path, sibling)
+            result[fmt] = len(compressed)
+    except OSError as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def precompress(roots=PRECOMPRESS_ROOTS, jobs=1, report_path=None):
+    """Bring the .br/.gz siblings under ``roots`` up to date and return the per-file results.
+
+    Files whose siblings are current are skipped without reading them;
+    siblings of deleted or too small files are removed. Without the
+    ``brotli`` package only gzip siblings are written.
+    """
+    formats = compressed_formats()
+    sources, siblings = find_compressible(roots)
+
+    tasks = []
+    wanted = set()
+    for path in sources:
+        if os.path.getsize(path) < MIN_COMPRESS_SIZE:
+            continue
+        wanted.add(path)
+        todo = tuple(fmt for fmt in formats if not sibling_current(path, f"{path}.{fmt}"))
+        if todo:
+            tasks.append((path, todo))
+
+    removed = 0
+    for sibling in siblings:
+        # 源文件已删除或太小时删除；没有 brotli 时保留仍与源文件一致的 .br
+        source, fmt = sibling[:-3], sibling[-2:]
+        if source not in wanted or (fmt not in formats and not sibling_current(source, sibling)):
+            os.remove(sibling)
+            removed += 1
+
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(compress_file, tasks, chunksize=max(1, len(tasks) // (jobs * 4))))
+    else:
+        results = [compress_file(task) for task in tasks]
+
+    # 每种格式分别累计 (原始字节, 压缩后字节)
+    totals = {fmt: [0, 0] for fmt in formats}
+    for result in results:
+        if result['error']:
+            print(f"Could not compress {result['path']}: {result['error']}")
+            continue
+        written = [fmt for fmt in formats if fmt in result]
+        ratios = ", ".join(f"{fmt} {result[fmt] / result['size']:.1%}" for fmt in written)
+        print(f"Compressed {result['path']}: {result['size']} bytes -> {ratios}")
+        for fmt in written:
+            totals[fmt][0] += result['size']
+            totals[fmt][1] += result[fmt]
+
+    compressed = [r for r in results if not r['error']]
+    summary = f"Precompressed {len(compressed)} file(s) ({'/'.join(formats)}), {len(sources) - len(tasks)} unchanged or too small"
+    if removed:
+        summary += f", removed {removed} stale sibling(s)"
+    if any(raw for raw, _ in totals.values()):
+        summary += ": " + ", ".join(f"{fmt} {size / raw:.1%}" for fmt, (raw, size) in totals.items() if raw)
+    print(summary + ".")
+    if not brotli:
+        print("brotli is not installed, only gzip siblings were written (pip install brotli).")
+
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump({"formats": list(formats), "removed": removed, "files": results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"Wrote {report_path}")
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Write .br/.gz siblings for the generated HTML, JS, SVG and JSON files.")
+    parser.add_argument("roots", nargs="*", help=f"Files or directories to compress (default: {' '.join(PRECOMPRESS_ROOTS)})")
+    parser.add_argument("--jobs", "-j", type=int, default=0, help="Compressor processes (0 = one per CPU)")
+    parser.add_argument("--report", nargs="?", const=COMPRESSION_REPORT_PATH, metavar="PATH",
+                        help=f"Write the per-file sizes as JSON (default: {COMPRESSION_REPORT_PATH})")
+    args = parser.parse_args()
+
+    precompress(tuple(args.roots) or PRECOMPRESS_ROOTS, args.jobs or os.cpu_count() or 1, args.report)
@@ -0,0 +1,146 @@
+import re
+import json
+
+# 站内搜索的倒排索引：对标题和摘要分词（中文按二元组、英文按单词），
+# 按词项前缀分片输出到 search/，前端只需下载查询用到的分片
+SEARCH_DIR = 'search'
+SEARCH_SCRIPT = 'js/search.js'
+# 索引格式变化时递增，前端据此判断分片格式
+SEARCH_INDEX_VERSION = 1
+# 每个文档分片包含的文档数
+DOC_CHUNK_SIZE = 500
+SNIPPET_LENGTH = 80
+# 中文词项按首字符码位右移 SHARD_BITS 位分片（每 512 个连续码位一个分片，常用汉字约 40 个分片）；
+# 分得更细时大部分分片只有几十到几百字节，一次查询要多发很多请求
+SHARD_BITS = 9
+
+CJK_RUN_PATTERN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+LATIN_WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text, unigrams=False):
+    """Split text into search terms: CJK bigrams plus lowercase Latin words.
+
+    A CJK run of a single character is kept as a unigram; Latin words need
+    at least two characters. The query side must stay in sync with
+    ``tokenize`` in js/search.js. The index is built with ``unigrams=True``
+    so that a one-character query also matches inside longer runs.
+    """
+    text = text.lower()
+    terms = []
+    for run in CJK_RUN_PATTERN.findall(text):
+        if len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+            if unigrams:
+                terms.extend(run)
+    terms.extend(w for w in LATIN_WORD_PATTERN.findall(text) if len(w) > 1)
+    return terms
+
+
+def shard_key(term):
+    # 英文/数字按首字符分片，中文按首字符码位的高位分片
+    first = term[0]
+    if first.isascii():
+        return first
+    return 'u' + format(ord(first) >> SHARD_BITS, 'x')
+
+
+def delta_encode(doc_ids):
+    previous = 0
+    deltas = []
+    for doc_id in doc_ids:
+        deltas.append(doc_id - previous)
+        previous = doc_id
+    return deltas
+
+
+def collect_documents(entries, digests):
+    """One search document per news item, oldest day first.
+
+    Ids grow with the date, so publishing a new day only appends documents
+    and leaves the existing doc chunks and most term shards unchanged.
+    Days without parsed items fall back to their portal summaries.
+    """
+    docs = []
+    for entry in sorted(entries, key=lambda e: e['date']):
+        day = digests['days'].get(entry['date'])
+        if not day:
+            continue
+        items = day.get('items') or [{"title": None, "summary": s} for s in day.get('summaries', [])]
+        for item in items:
+            title = item.get('title') or day.get('title') or entry['date']
+            summary = item.get('summary') or ''
+            docs.append({"date": entry['date'], "url": entry['url'], "title": title, "summary": summary})
+    return docs
+
+
+def render_search_index(entries, digests):
+    """Return ``{path: json}`` for meta.json, the doc chunks and the term shards."""
+    docs = collect_documents(entries, digests)
+
+    postings = {}
+    for doc_id, doc in enumerate(docs):
+        for term in set(tokenize(doc['title'] + '\n' + doc['summary'], unigrams=True)):
+            postings.setdefault(term, []).append(doc_id)
+
+    shards = {}
+    for term in sorted(postings):
+        shards.setdefault(shard_key(term), {})[term] = delta_encode(postings[term])
+
+    files = {}
+    for key, terms in shards.items():
+        files[f"{SEARCH_DIR}/t-{key}.json"] = json.dumps(terms, ensure_ascii=False, separators=(',', ':'))
+    for start in range(0, len(docs), DOC_CHUNK_SIZE):
+        chunk = [
+            [doc['date'], doc['url'], doc['title'], _snippet(doc['summary'])]
+            for doc in docs[start:start + DOC_CHUNK_SIZE]
+        ]
+        files[f"{SEARCH_DIR}/d-{start // DOC_CHUNK_SIZE}.json"] = json.dumps(chunk, ensure_ascii=False, separators=(',', ':'))
+    meta = {
+        "version": SEARCH_INDEX_VERSION,
+        "docs": len(docs),
+        "doc_chunk": DOC_CHUNK_SIZE,
+        "shard_bits": SHARD_BITS,
+        "shards": sorted(shards),
+    }
+    files[f"{SEARCH_DIR}/meta.json"] = json.dumps(meta, separators=(',', ':'))
+    return files
+
+
+def _snippet(text):
+    return text if len(text) <= SNIPPET_LENGTH else text[:SNIPPET_LENGTH - 3] + "..."
+
+
+def search(query, directory=SEARCH_DIR, limit=20):
+    """Query the generated shards the way js/search.js does; newest hits first."""
+    def load(name):
+        with open(f"{directory}/{name}", 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    meta = load('meta.json')
+    hits = None
+    for term in set(tokenize(query)):
+        key = shard_key(term)
+        deltas = load(f"t-{key}.json").get(term, []) if key in meta['shards'] else []
+        doc_ids, current = set(), 0
+        for delta in deltas:
+            current += delta
+            doc_ids.add(current)
+        hits = doc_ids if hits is None else hits & doc_ids
+    results = []
+    for doc_id in sorted(hits or (), reverse=True)[:limit]:
+        chunk = load(f"d-{doc_id // meta['doc_chunk']}.json")
+        results.append(chunk[doc_id % meta['doc_chunk']])
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Query the generated search index (for debugging).")
+    parser.add_argument("query", help="Search terms")
+    args = parser.parse_args()
+
+    for date_str, url, title, snippet in search(args.query):
+        print(f"{date_str}  {title}\n            {snippet}")
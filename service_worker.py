@@ -0,0 +1,184 @@
+import os
+import json
+
+from build_manifest import file_sha256, file_unchanged, sha256_bytes
+
+# Service Worker：由构建生成 sw.js 和带版本号的预缓存清单 sw-manifest.json。
+# 页面外壳（门户、/latest、带哈希的脚本和样式）安装时就缓存，最近几天的页面激活后预取，
+# 更早的页面第一次访问后缓存，之后先返回缓存再后台更新 (stale-while-revalidate)。
+# 清单中每个条目带内容版本号，新版本只重新下载版本号变化的条目
+SW_PATH = 'sw.js'
+SW_MANIFEST_PATH = 'sw-manifest.json'
+SW_MANIFEST_VERSION = 1
+RECENT_DAYS = 7
+REVISION_LENGTH = 10
+
+SW_TEMPLATE = r"""// 由 service_worker.py 生成，不要手动修改
+const VERSION = '__VERSION__';
+const MANIFEST_URL = '/__MANIFEST_PATH__?v=' + VERSION;
+// 页面和外壳放在跨版本保留的缓存中，内容没变的条目升级时不重新下载
+const CACHE = 'ci-pages';
+const RUNTIME_CACHE = 'ci-runtime';
+const RUNTIME_LIMIT = 200;
+// 上次激活的清单中各条目的版本号
+const REVISIONS_KEY = '/__sw-revisions';
+const IMMUTABLE_PREFIXES = ['/assets/', '/imgs/store/', '/imgs/_variants/'];
+const REVALIDATE_PREFIXES = ['/archive/', '/search/'];
+const NETWORK_ONLY = ['/market.json', '/sw.js', '/__MANIFEST_PATH__'];
+
+// 与 vercel.json 的 cleanUrls 一致：/content/x/index.html 和 /content/x.html 都对应 /content/x
+function canonical(url) {
+    let path = url.pathname.replace(/\/index\.html$/, '/').replace(/\.html$/, '');
+    if (path.length > 1 && path.endsWith('/')) path = path.slice(0, -1);
+    return path;
+}
+
+async function loadManifest() {
+    const response = await fetch(MANIFEST_URL, { cache: 'no-store' });
+    if (!response.ok) throw new Error('HTTP ' + response.status);
+    return response.json();
+}
+
+async function loadRevisions(cache) {
+    const response = await cache.match(REVISIONS_KEY);
+    return response ? response.json() : {};
+}
+
+// 只下载版本号变化或尚未缓存的条目，返回失败的条目数
+async function syncEntries(cache, entries, revisions) {
+    const results = await Promise.allSettled(entries.map(async (entry) => {
+        if (revisions[entry.url] === entry.revision && await cache.match(entry.url)) return;
+        const response = await fetch(entry.url, { cache: 'no-cache' });
+        if (!response.ok || response.redirected) throw new Error(entry.url + ': HTTP ' + response.status);
+        await cache.put(entry.url, response);
+    }));
+    return results.filter((result) => result.status === 'rejected').length;
+}
+
+async function trimCache(cache, limit) {
+    const keys = await cache.keys();
+    for (const request of keys.slice(0, Math.max(0, keys.length - limit))) {
+        await cache.delete(request);
+    }
+}
+
+self.addEventListener('install', (event) => {
+    event.waitUntil((async () => {
+        const manifest = await loadManifest();
+        const cache = await caches.open(CACHE);
+        // 外壳缺一不可，下载失败时放弃安装，继续使用旧版本
+        const failed = await syncEntries(cache, manifest.shell, await loadRevisions(cache));
+        if (failed) throw new Error(failed + ' shell entries could not be cached');
+        await self.skipWaiting();
+    })());
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil((async () => {
+        for (const name of await caches.keys()) {
+            if (name !== CACHE && name !== RUNTIME_CACHE) await caches.delete(name);
+        }
+        const manifest = await loadManifest();
+        const cache = await caches.open(CACHE);
+        const previous = await loadRevisions(cache);
+        const wanted = {};
+        for (const entry of [...manifest.shell, ...manifest.recent, ...manifest.pages]) wanted[entry.url] = entry.revision;
+        const shell = new Set(manifest.shell.map((entry) => entry.url));
+        // 删除已不在清单中或内容已变化的条目；外壳在安装时已经更新
+        for (const request of await cache.keys()) {
+            const path = new URL(request.url).pathname;
+            if (path === REVISIONS_KEY || shell.has(path)) continue;
+            if (!(path in wanted) || previous[path] !== wanted[path]) await cache.delete(request);
+        }
+        await self.clients.claim();
+        // 预取最近几天的页面，失败的条目下次访问时再缓存
+        await syncEntries(cache, manifest.recent, previous);
+        await cache.put(REVISIONS_KEY, new Response(JSON.stringify(wanted), { headers: { 'Content-Type': 'application/json' } }));
+    })());
+});
+
+async function cacheFirst(request, cacheName) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(request);
+    if (cached) return cached;
+    const response = await fetch(request);
+    if (response.ok) {
+        await cache.put(request, response.clone());
+        if (cacheName === RUNTIME_CACHE) trimCache(cache, RUNTIME_LIMIT);
+    }
+    return response;
+}
+
+async function staleWhileRevalidate(event, key) {
+    const cache = await caches.open(CACHE);
+    const cached = await cache.match(key);
+    const update = fetch(key, { cache: 'no-cache' }).then(async (response) => {
+        if (response.ok && !response.redirected) await cache.put(key, response.clone());
+        return response;
+    });
+    if (cached) {
+        event.waitUntil(update.catch(() => {}));
+        return cached;
+    }
+    const response = await update;
+    // 导航请求不能直接返回经过重定向的响应
+    return response.redirected ? Response.redirect(response.url, 302) : response;
+}
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (request.method !== 'GET' || url.origin !== self.location.origin || NETWORK_ONLY.includes(url.pathname)) return;
+    if (IMMUTABLE_PREFIXES.some((prefix) => url.pathname.startsWith(prefix))) {
+        event.respondWith(cacheFirst(request, url.pathname.startsWith('/assets/') ? CACHE : RUNTIME_CACHE));
+    } else if (request.mode === 'navigate' || url.pathname.endsWith('.html')) {
+        event.respondWith(staleWhileRevalidate(event, canonical(url)));
+    } else if (REVALIDATE_PREFIXES.some((prefix) => url.pathname.startsWith(prefix))) {
+        event.respondWith(staleWhileRevalidate(event, url.pathname));
+    }
+});
+"""
+
+
+def page_url(file_path):
+    # 与 cleanUrls 一致：content/2026/02/08/index.html -> /content/2026/02/08，index.html -> /
+    path = '/' + file_path.replace('\\', '/')
+    if path.endswith('/index.html'):
+        path = path[:-len('index.html')]
+    return path.rstrip('/') or '/'
+
+
+def output_revision(path, record):
+    # 优先使用构建清单中记录的哈希，文件与记录一致时不重新读取
+    if file_unchanged(path, record):
+        return record['sha256'][:REVISION_LENGTH]
+    return file_sha256(path)[:REVISION_LENGTH]
+
+
+def render_precache_manifest(entries, manifest, assets, recent_days=RECENT_DAYS):
+    """Return the precache manifest for the pages in ``entries`` (newest first).
+
+    Revisions are content hashes taken from the build manifest records;
+    fingerprinted assets carry their hash in the name and get no revision.
+    """
+    portal = {"url": "/", "revision": output_revision('index.html', manifest['outputs'].get('index.html'))}
+    pages = []
+    for entry in entries:
+        file_path = entry['url'].lstrip('/')
+        if not os.path.exists(file_path):
+            continue
+        record = manifest['pages'].get(file_path) or {}
+        pages.append({"url": page_url(file_path), "revision": output_revision(file_path, record.get('file'))})
+
+    shell = [portal] + [{"url": f"/{path}", "revision": None} for source, path in sorted(assets.items())]
+    if pages:
+        # /latest 由 vercel.json 改写到最新一天的页面
+        shell.append({"url": "/latest", "revision": pages[0]['revision']})
+    precache = {"shell": shell, "recent": pages[:recent_days], "pages": pages[recent_days:]}
+    version = sha256_bytes(json.dumps(precache, sort_keys=True))[:REVISION_LENGTH]
+    return dict(version=version, format=SW_MANIFEST_VERSION, **precache)
+
+
+def render_service_worker(precache):
+    # 清单版本写入 sw.js：清单变化时 sw.js 的内容随之变化，浏览器才会安装新版本
+    return SW_TEMPLATE.replace('__VERSION__', precache['version']).replace('__MANIFEST_PATH__', SW_MANIFEST_PATH)
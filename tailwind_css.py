@@ -0,0 +1,163 @@
+import os
+import re
+import json
+import shutil
+import tempfile
+import subprocess
+
+from build_manifest import file_fingerprint, file_unchanged, sha256_bytes, write_if_changed
+
+# 构建时生成 Tailwind 样式表：收集页面和模板中出现的类名，交给 Tailwind CLI (v3) 生成压缩后的 CSS，
+# 页面改为引用指纹化的 css/site.css，不再在浏览器中加载 cdn.tailwindcss.com 实时编译
+TAILWIND_CDN = 'https://cdn.tailwindcss.com'
+CSS_SOURCE = 'css/site.css'
+TAILWIND_INDEX_PATH = '.tailwind_classes.json'
+# 提取规则或生成参数变化时递增，旧索引整体失效
+TAILWIND_INDEX_VERSION = 1
+# 与页面中 tailwind.config 的设置一致
+TAILWIND_CONFIG = {"darkMode": "class"}
+# 模板和脚本中的类名：Sidebar/Portal/Auth 模板，以及运行时切换类名的脚本
+TEMPLATE_SOURCES = ('update_latest.py', 'js')
+# 与 Tailwind 默认的提取方式相同：按引号、空白和尖括号切分，保留可能是类名的片段
+TOKEN_SPLIT = re.compile(r'''[\s"'`<>=;{}\\]+''')
+CANDIDATE = re.compile(r'^!?-?[a-z@\[][\w:/.\[\]#%(),!-]*$')
+
+
+def extract_candidates(text):
+    return {token for token in TOKEN_SPLIT.split(text) if CANDIDATE.match(token)}
+
+
+def find_template_sources(sources=TEMPLATE_SOURCES):
+    paths = []
+    for source in sources:
+        if os.path.isfile(source):
+            paths.append(source)
+            continue
+        for dirpath, dirs, files in os.walk(source):
+            dirs.sort()
+            paths += [os.path.join(dirpath, f).replace('\\', '/') for f in sorted(files) if f.endswith('.js')]
+    return paths
+
+
+def find_tailwind_cli():
+    # TAILWIND_CLI 可以是独立可执行文件或 "npx tailwindcss@3" 之类的命令
+    if os.environ.get('TAILWIND_CLI'):
+        return os.environ['TAILWIND_CLI'].split()
+    for candidate in (shutil.which('tailwindcss'), 'node_modules/.bin/tailwindcss'):
+        if candidate and os.path.exists(candidate):
+            return [candidate]
+    return None
+
+
+def load_tailwind_index(path=TAILWIND_INDEX_PATH):
+    if not os.path.exists(path):
+        return {"version": TAILWIND_INDEX_VERSION, "files": {}, "classes": []}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    if index.get('version') != TAILWIND_INDEX_VERSION:
+        return {"version": TAILWIND_INDEX_VERSION, "files": {}, "classes": []}
+    return index
+
+
+def save_tailwind_index(index, path=TAILWIND_INDEX_PATH):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'), sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def collect_classes(pages, force=False, index_path=TAILWIND_INDEX_PATH):
+    """Return the sorted class candidates found in ``pages`` and the template sources.
+
+    Only files whose fingerprint changed are read again. Incremental runs
+    only add candidates (a class that disappeared costs a few bytes of CSS);
+    ``force`` rescans every file and drops the unused ones.
+    """
+    index = load_tailwind_index(index_path)
+    if force:
+        index.update(files={}, classes=[])
+    files = {}
+    classes = set(index['classes'])
+    for path in list(pages) + find_template_sources():
+        record = index['files'].get(path)
+        if record and file_unchanged(path, record):
+            files[path] = record
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            classes |= extract_candidates(f.read())
+        files[path] = file_fingerprint(path)
+    classes = sorted(classes)
+    if files != index['files'] or classes != index['classes']:
+        index.update(files=files, classes=classes)
+        save_tailwind_index(index, index_path)
+    return classes
+
+
+def run_tailwind(cli, classes):
+    # 类名作为 raw content 传给 CLI，配置和输入文件写在临时目录中
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, 'tailwind.config.js')
+        input_path = os.path.join(tmp, 'input.css')
+        output_path = os.path.join(tmp, 'site.css')
+        config = dict(TAILWIND_CONFIG, content=[{"raw": " ".join(classes), "extension": "html"}])
+        with open(config_path, 'w', encoding='utf-8') as f:
+            f.write(f"module.exports = {json.dumps(config, ensure_ascii=False)};\n")
+        with open(input_path, 'w', encoding='utf-8') as f:
+            f.write("@tailwind base;\n@tailwind components;\n@tailwind utilities;\n")
+        subprocess.run(cli + ['-c', config_path, '-i', input_path, '-o', output_path, '--minify'],
+                       check=True, capture_output=True, timeout=300)
+        with open(output_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+
+def build_stylesheet(pages, force=False, index_path=TAILWIND_INDEX_PATH):
+    """Regenerate ``css/site.css`` when the class candidates changed; returns True if it exists.
+
+    Without a Tailwind CLI the existing stylesheet (if any) is kept and the
+    pages that have none keep loading the CDN script.
+    """
+    classes = collect_classes(pages, force, index_path)
+    inputs = sha256_bytes(json.dumps([TAILWIND_CONFIG, classes], sort_keys=True))
+    index = load_tailwind_index(index_path)
+    if index.get('inputs') == inputs and os.path.exists(CSS_SOURCE):
+        return True
+
+    cli = find_tailwind_cli()
+    if not cli:
+        if os.path.exists(CSS_SOURCE):
+            print(f"Tailwind CLI not found, keeping the existing {CSS_SOURCE} (classes changed since it was built).")
+            return True
+        print("Tailwind CLI not found (install tailwindcss v3 or set TAILWIND_CLI), pages keep the CDN script.")
+        return False
+    try:
+        css = run_tailwind(cli, classes)
+    except (OSError, subprocess.SubprocessError) as e:
+        stderr = getattr(e, 'stderr', None)
+        print(f"Tailwind CLI failed: {stderr.decode('utf-8', 'replace').strip() if stderr else e}")
+        return os.path.exists(CSS_SOURCE)
+
+    os.makedirs(os.path.dirname(CSS_SOURCE), exist_ok=True)
+    if write_if_changed(CSS_SOURCE, css):
+        print(f"Generated {CSS_SOURCE} ({len(css.encode('utf-8'))} bytes, {len(classes)} class candidate(s))")
+    index['inputs'] = inputs
+    save_tailwind_index(index, index_path)
+    return True
+
+
+def drop_tailwind_config(script):
+    # 页面内联的 tailwind.config 只供 CDN 编译器使用，改用样式表后整个 <script> 删除
+    return None if script.strip().startswith('tailwind.config') else script
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Build css/site.css from the Tailwind classes used by the site.")
+    parser.add_argument("--force", action="store_true", help="Rescan every page instead of only the changed ones")
+    args = parser.parse_args()
+
+    pages = sorted(os.path.join(root, 'index.html').replace('\\', '/')
+                   for root, dirs, files in os.walk('content') if 'index.html' in files)
+    build_stylesheet(pages + ['index.html'], force=args.force)
@@ -0,0 +1,8 @@
+import bench_build
+
+
+def test_benchmark_runs_on_a_tiny_corpus():
+    result = bench_build.run_benchmark(3)
+    assert result['days'] == 3
+    assert set(result['phases']) >= {'walk', 'summaries', 'sidebar', 'rewrite'}
+    assert result['full_build'] > 0 and result['incremental_noop'] > 0
@@ -0,0 +1,37 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from dev_server import serve
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    page_dir = tmp_path / 'content' / '2026' / '02' / '01'
+    page_dir.mkdir(parents=True)
+    (page_dir / 'index.html').write_text('<p>day</p>', encoding='utf-8')
+    (tmp_path / 'index.html').write_text('<p>portal</p>', encoding='utf-8')
+    (tmp_path / 'vercel.json').write_text(json.dumps({"cleanUrls": True}), encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+    server = serve(0)
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(url, etag=None):
+    request = urllib.request.Request(url, headers={"If-None-Match": etag} if etag else {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers.get('ETag'), response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers.get('ETag'), b''
+
+
+@pytest.mark.parametrize('path', ['/', '/content/2026/02/01', '/content/2026/02/01/'])
+def test_directory_index_responses_revalidate(site, path):
+    status, etag, body = fetch(site + path)
+    assert status == 200 and etag and body.startswith(b'<p>')
+    assert fetch(site + path, etag)[0] == 304
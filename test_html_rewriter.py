@@ -0,0 +1,66 @@
+from html_rewriter import HTMLRewriter
+
+
+def rewrite(html, selector, handler):
+    return HTMLRewriter().on_element(selector, handler).transform(html)
+
+
+def test_set_attribute_ignores_names_inside_values():
+    html = '<img alt="chart width loading" src="a.jpg">'
+
+    def handler(element):
+        element.set_attribute('width', '800')
+        element.set_attribute('loading', 'lazy')
+
+    assert rewrite(html, 'img', handler) == '<img alt="chart width loading" src="a.jpg" width="800" loading="lazy">'
+
+
+def test_set_attribute_does_not_match_attribute_prefix():
+    html = '<img srcset="a.jpg 1x" src="b.jpg">'
+    out = rewrite(html, 'img', lambda element: element.set_attribute('src', 'NEW.jpg'))
+    assert out == '<img srcset="a.jpg 1x" src="NEW.jpg">'
+
+
+def test_set_attribute_adds_missing_attribute_before_self_closing_slash():
+    html = '<source srcset="a.webp"/>'
+    out = rewrite(html, 'source', lambda element: element.set_attribute('src', 'a.jpg'))
+    assert out == '<source srcset="a.webp" src="a.jpg"/>'
+
+
+def test_set_attribute_replaces_unquoted_and_case_insensitive():
+    html = '<IMG SRC=old.jpg alt=x>'
+    out = rewrite(html, 'img', lambda element: element.set_attribute('src', 'new.jpg'))
+    assert out == '<IMG src="new.jpg" alt=x>'
+
+
+def test_set_attribute_twice_updates_the_same_attribute():
+    html = '<img src="a.jpg">'
+
+    def handler(element):
+        element.set_attribute('src', 'b.jpg')
+        element.set_attribute('src', 'c.jpg')
+
+    assert rewrite(html, 'img', handler) == '<img src="c.jpg">'
+
+
+def test_replace_with_empty_removes_the_line():
+    html = '<body>\n    <p>a</p>\n    <script src="x.js"></script>\n    <p>b</p>\n</body>'
+    out = rewrite(html, 'script', lambda element: element.replace(''))
+    assert out == '<body>\n    <p>a</p>\n    <p>b</p>\n</body>'
+
+
+def test_replace_with_empty_takes_marker_comment():
+    html = '<body>\n    <!-- Modal -->\n    <div id="m"><p>x</p></div>\n    <p>b</p>\n</body>'
+    out = rewrite(html, 'div#m', lambda element: element.replace('', with_comment='<!-- Modal -->'))
+    assert out == '<body>\n    <p>b</p>\n</body>'
+
+
+def test_remove_attribute_keeps_the_others():
+    html = '<img srcset="a.webp 400w" src="a.jpg" sizes="100vw" alt="x">'
+
+    def handler(element):
+        element.remove_attribute('srcset')
+        element.remove_attribute('sizes')
+        element.remove_attribute('loading')
+
+    assert rewrite(html, 'img', handler) == '<img src="a.jpg" alt="x">'
@@ -0,0 +1,123 @@
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from link_check import check_links, classify, check_url
+
+# 路径 -> 状态码；/nohead 不支持 HEAD，/moved 重定向到 /ok
+STATUSES = {'/ok': 200, '/gone': 404, '/blocked': 403, '/limited': 429, '/error': 500}
+
+
+class StubSite:
+    def __init__(self, delay=0.0):
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        lock = threading.Lock()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def respond(self, send_body):
+                with lock:
+                    site.requests.append((self.command, self.path))
+                    site.in_flight += 1
+                    site.max_in_flight = max(site.max_in_flight, site.in_flight)
+                time.sleep(delay)
+                if self.path == '/moved':
+                    self.send_response(301)
+                    self.send_header('Location', '/ok')
+                elif self.path == '/nohead' and self.command == 'HEAD':
+                    self.send_response(405)
+                else:
+                    self.send_response(200 if self.path == '/nohead' else STATUSES.get(self.path.split('?')[0], 404))
+                self.send_header('Content-Length', '2' if send_body else '0')
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(b'ok')
+                with lock:
+                    site.in_flight -= 1
+
+            def do_HEAD(self):
+                self.respond(False)
+
+            def do_GET(self):
+                self.respond(True)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'link_cache.json')
+
+
+def test_classifies_ok_broken_and_blocked(cache_path):
+    with StubSite() as site:
+        links = {site.url(path): ['2026-02-01.md'] for path in ('/ok', '/moved', '/nohead', '/gone', '/error', '/blocked', '/limited')}
+        results = check_links(links, delay=0, timeout=5, cache_path=cache_path)
+    states = {url.rsplit('/', 1)[1]: r['state'] for url, r in results.items()}
+    assert states == {'ok': 'ok', 'moved': 'ok', 'nohead': 'ok', 'gone': 'broken', 'error': 'broken',
+                      'blocked': 'blocked', 'limited': 'blocked'}
+    assert results[site.url('/moved')]['final_url'] == site.url('/ok')
+    # 不支持 HEAD 时改用 GET
+    assert ('GET', '/nohead') in site.requests
+
+
+def test_unreachable_host_is_broken():
+    with StubSite() as site:
+        url = site.url('/ok')
+    result = check_url(url, timeout=2)
+    assert result['status'] is None and result['error']
+    assert classify(result) == 'broken'
+
+
+def test_per_host_concurrency_and_delay(cache_path):
+    with StubSite(delay=0.2) as a, StubSite(delay=0.2) as b:
+        links = {site.url(f'/ok?n={n}'): [] for site in (a, b) for n in range(6)}
+        start = time.perf_counter()
+        check_links(links, jobs=16, per_host=2, delay=0, timeout=5, cache_path=cache_path)
+        elapsed = time.perf_counter() - start
+    # 每个站点最多 2 个并发，两个站点同时进行：6 个请求 / 2 并发 * 0.2s
+    assert a.max_in_flight == 2 and b.max_in_flight == 2
+    assert 0.55 < elapsed < 1.0
+
+    with StubSite() as site:
+        links = {site.url(f'/ok?n={n}'): [] for n in range(3)}
+        start = time.perf_counter()
+        check_links(links, per_host=1, delay=0.15, timeout=5, cache_path=None)
+        elapsed = time.perf_counter() - start
+    # 同一站点的请求之间至少间隔 delay
+    assert elapsed >= 0.3
+
+
+def test_cache_skips_fresh_links_and_rechecks_expired(cache_path):
+    with StubSite() as site:
+        links = {site.url('/ok'): [], site.url('/gone'): []}
+        check_links(links, delay=0, timeout=5, cache_path=cache_path)
+        first = len(site.requests)
+
+        results = check_links(links, delay=0, timeout=5, cache_path=cache_path)
+        assert len(site.requests) == first
+        assert all(r['cached'] for r in results.values())
+
+        # 失效链接的缓存时间更短，过期后只重新检查它
+        results = check_links(links, delay=0, timeout=5, cache_path=cache_path, broken_ttl=0)
+        assert not results[site.url('/gone')]['cached']
+        assert results[site.url('/ok')]['cached']
@@ -0,0 +1,120 @@
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from market_data import HTTPTransport, fetch_json, get_market_data
+
+PRICE = {"bitcoin": {"usd": 65000, "usd_24h_change": -1.5}, "ethereum": {"usd": 2000, "usd_24h_change": 0.8}}
+FNG = {"data": [{"value": "20", "value_classification": "Extreme Fear"}]}
+
+
+class StubServer:
+    """Local HTTP server: ``routes[path]`` is a list of ``(status, payload)`` served in order, the last one repeats."""
+
+    def __init__(self, routes, delay=0.0):
+        self.routes = {path: list(responses) for path, responses in routes.items()}
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with lock:
+                    stub.requests.append(self.path)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                time.sleep(delay)
+                responses = stub.routes.get(self.path.split('?')[0], [(404, {})])
+                status, payload = responses.pop(0) if len(responses) > 1 else responses[0]
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with lock:
+                    stub.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+    def sources(self):
+        return {"price": {"url": self.url('/price'), "timeout": 5}, "fng": {"url": self.url('/fng'), "timeout": 5}}
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'market_cache.json')
+
+
+def test_sources_are_fetched_concurrently(cache_path):
+    with StubServer({'/price': [(200, PRICE)], '/fng': [(200, FNG)]}, delay=0.3) as stub:
+        start = time.perf_counter()
+        data = get_market_data(sources=stub.sources(), cache_path=cache_path)
+        elapsed = time.perf_counter() - start
+    assert data == {"btc": PRICE['bitcoin'], "eth": PRICE['ethereum'], "fng": FNG['data'][0]}
+    # 两个数据源同时请求，每个数据源一个线程
+    assert stub.max_in_flight == 2
+    assert elapsed < 0.55
+
+
+def test_retries_with_backoff_until_success():
+    log = []
+    with StubServer({'/price': [(500, {}), (503, {}), (200, PRICE)]}) as stub:
+        start = time.perf_counter()
+        data = fetch_json(HTTPTransport(), stub.url('/price'), 5, retries=3, backoff=0.05, log=log)
+        elapsed = time.perf_counter() - start
+    assert data == PRICE
+    assert len(stub.requests) == 3
+    assert log[0].startswith('HTTP 500') and log[1].startswith('HTTP 503')
+    # 退避 0.05s + 0.1s
+    assert elapsed >= 0.15
+
+
+def test_gives_up_after_the_last_retry(cache_path):
+    with StubServer({'/price': [(500, {})], '/fng': [(200, FNG)]}) as stub:
+        data = get_market_data(sources=stub.sources(), cache_path=cache_path, retries=2, backoff=0.01)
+        requests = list(stub.requests)
+    assert data is None
+    assert requests.count('/price') == 2
+
+
+def test_cache_is_used_within_ttl_and_refreshed_after(cache_path):
+    with StubServer({'/price': [(200, PRICE)], '/fng': [(200, FNG)]}) as stub:
+        first = get_market_data(sources=stub.sources(), cache_path=cache_path)
+        cached = get_market_data(sources=stub.sources(), cache_path=cache_path, ttl=300)
+        assert cached == first
+        assert len(stub.requests) == 2
+        get_market_data(sources=stub.sources(), cache_path=cache_path, ttl=0)
+        assert len(stub.requests) == 4
+
+
+def test_transport_reuses_the_connection():
+    with StubServer({'/price': [(200, PRICE)]}) as stub:
+        transport = HTTPTransport()
+        for _ in range(3):
+            assert transport.get(stub.url('/price'), 5)[0] == 200
+        idle = [conn for conns in transport._idle.values() for conn in conns]
+        transport.close()
+    assert len(idle) == 1
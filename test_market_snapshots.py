@@ -0,0 +1,30 @@
+import json
+
+from market_snapshots import backfill_snapshots, load_snapshots
+
+
+class StubTransport:
+    def __init__(self):
+        self.closed = False
+        self.urls = []
+
+    def get(self, url, timeout):
+        self.urls.append(url)
+        if 'alternative.me' in url:
+            return 200, json.dumps({"data": [{"timestamp": "1769904000", "value": "20",
+                                              "value_classification": "Extreme Fear"}]}).encode()
+        price = 100.0 if 'date=01-02-2026' in url else 80.0
+        return 200, json.dumps({"market_data": {"current_price": {"usd": price}}}).encode()
+
+    def close(self):
+        self.closed = True
+
+
+def test_backfill_leaves_a_caller_transport_open(tmp_path):
+    path = str(tmp_path / 'snapshots.jsonl')
+    transport = StubTransport()
+    assert backfill_snapshots(['2026-02-01'], path=path, transport=transport, delay=0) == 1
+    assert not transport.closed
+    snapshot = load_snapshots(path)['2026-02-01']
+    assert snapshot['btc'] == {"usd": 100.0, "usd_24h_change": 25.0}
+    assert snapshot['fng']['value'] == '20'
@@ -0,0 +1,24 @@
+import os
+
+from search_index import render_search_index, search, tokenize, SEARCH_DIR
+
+
+def build_index(tmp_path, days):
+    entries = [{"date": date, "url": f"/content/{date.replace('-', '/')}/index.html"} for date in days]
+    digests = {"days": {date: {"items": [{"title": title, "summary": ""}]} for date, title in days.items()}}
+    for path, data in render_search_index(entries, digests).items():
+        target = tmp_path / os.path.relpath(path, SEARCH_DIR)
+        target.write_text(data, encoding='utf-8')
+    return str(tmp_path)
+
+
+def test_query_tokens_are_bigrams_only():
+    assert tokenize('比特币') == ['比特', '特币']
+    assert tokenize('币') == ['币']
+
+
+def test_single_character_query_matches_inside_longer_runs(tmp_path):
+    directory = build_index(tmp_path, {"2026-02-01": "比特币大跌", "2026-02-02": "以太坊上涨"})
+    assert [hit[0] for hit in search('币', directory)] == ['2026-02-01']
+    assert [hit[0] for hit in search('比特币', directory)] == ['2026-02-01']
+    assert search('狗', directory) == []
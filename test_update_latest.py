@@ -0,0 +1,17 @@
+from update_latest import build_page_rewriter
+
+PAGE = '''<body>
+    <!-- Sidebar -->
+    <aside class="hidden lg:flex sidebar sticky"><nav>old</nav></aside>
+    <main>
+        <aside class="note">Related coverage</aside>
+    </main>
+</body>'''
+
+
+def test_only_the_sidebar_aside_is_replaced():
+    new_sidebar = '<!-- Sidebar -->\n    <aside class="sidebar"><nav>new</nav></aside>'
+    out = build_page_rewriter(PAGE, 'content/2026/02/01/index.html', new_sidebar).transform(PAGE)
+    assert out.count('<!-- Sidebar -->') == 1
+    assert '<nav>new</nav>' in out and '<nav>old</nav>' not in out
+    assert '<aside class="note">Related coverage</aside>' in out
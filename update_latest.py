@@ -1,192 +1,108 @@
 import os
 import re
+import sys
 import json
-import urllib.request
 
-def get_market_data():
-    import time
-    import subprocess
-    
-    def fetch_with_curl(url):
-        try:
-            result = subprocess.run(['curl', '-sS', url], capture_output=True, text=True, timeout=15)
-            if result.returncode == 0:
-                return json.loads(result.stdout)
-            else:
-                print(f"Curl error for {url}: {result.stderr}")
-        except Exception as e:
-            print(f"Curl fetch failed for {url}: {e}")
-        return None
+from market_data import get_market_data
+from market_snapshots import load_snapshots, record_snapshot, snapshot_time
+from market_feed import publish_market_feed, MARKET_JSON_PATH
+from digest_index import build_digest_index, get_summaries
+from html_rewriter import HTMLRewriter
+from asset_store import build_asset_store, prune_originals, store_digest, use_store_source, STORE_DIR
+from asset_fingerprint import build_fingerprinted_assets, assets_digest, asset_url, use_fingerprinted_asset, ASSET_DIR
+from image_pipeline import build_image_variants, images_digest, responsive_attributes, DEFAULT_SIZES, MIME_TYPES, VARIANT_DIR
+from search_index import render_search_index, SEARCH_DIR, SEARCH_SCRIPT, SEARCH_INDEX_VERSION
+from precompress import precompress
+from deploy_delta import write_deploy_delta
+from page_budget import analyze_pages
+from service_worker import render_precache_manifest, render_service_worker, SW_PATH, SW_MANIFEST_PATH
+from tailwind_css import build_stylesheet, drop_tailwind_config, CSS_SOURCE, TAILWIND_CDN
+from build_manifest import (
+    load_manifest, save_manifest, file_fingerprint, file_unchanged, file_sha256, sha256_bytes, write_if_changed,
+)
+from build_report import BuildReport, Timer, print_summary, profiled, BUILD_REPORT_PATH
 
-    for attempt in range(3):
-        try:
-            # Coingecko
-            price_data = fetch_with_curl('https://api.coingecko.com/api/v3/simple/price?ids=bitcoin,ethereum&vs_currencies=usd&include_24hr_change=true')
-            
-            # Alternative.me (FnG)
-            fng_data = fetch_with_curl('https://api.alternative.me/fng/')
-                
-            if price_data and fng_data:
-                return {
-                    "btc": price_data.get('bitcoin', {}),
-                    "eth": price_data.get('ethereum', {}),
-                    "fng": fng_data.get('data', [{}])[0]
-                }
-        except Exception as e:
-            print(f"Attempt {attempt + 1} failed: {e}")
-            if attempt < 2:
-                time.sleep(2)
-    
-    print("All market data fetch attempts failed.")
-    return None
+# 页面中仍待冻结的行情占位符
+FREEZE_MARKER = 'id="btc-price-display">$Loading...'
 
-def get_summary_from_md(date_str):
-    md_path = f"{date_str}.md"
-    if not os.path.exists(md_path):
-        return ["暂无摘要信息"]
-    
-    with open(md_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-        
-    # 提取前三个摘要作为精选
-    summaries = re.findall(r'\*\*摘要\*\*：(.*?)(?=\n|$)', content)
-    if not summaries:
-        # 兼容旧格式或不同符号
-        summaries = re.findall(r'\*\*摘要\*\*:(.*?)(?=\n|$)', content)
-    
-    if summaries:
-        # 只取前三个，并限制字数
-        selected = []
-        for s in summaries[:3]:
-            s = s.strip()
-            if len(s) > 80:
-                s = s[:77] + "..."
-            selected.append(s)
-        return selected
-    return ["暂无摘要信息"]
-
-def update_latest():
-    content_dir = 'content'
-    all_indices = []
+def write_output(path, data, manifest, force=True):
+    # 写入生成的文件并记录指纹；增量模式下先按清单判断，内容与磁盘上相同时都不写入（保留 mtime）
+    record = manifest['outputs'].get(path)
+    if not force and file_unchanged(path, record) and record.get('sha256') == sha256_bytes(data):
+        return False
+    written = write_if_changed(path, data)
+    manifest['outputs'][path] = file_fingerprint(path)
+    return written
 
-    # 递归查找 content 目录下所有的 index.html
-    for root, dirs, files in os.walk(content_dir):
-        if 'index.html' in files:
-            # 获取相对路径，例如 content/2026/01/24/index.html
-            rel_path = os.path.relpath(os.path.join(root, 'index.html'))
-            all_indices.append(rel_path)
+# 侧边栏链接样式
+NAV_ACTIVE_CLASS = "flex items-center gap-3 text-sm font-semibold text-orange-500 bg-orange-500/10 p-2 rounded-xl"
+NAV_LINK_CLASS = "flex items-center gap-3 text-sm text-gray-400 p-2 hover:text-orange-500 dark:hover:text-white transition-colors"
 
-    if not all_indices:
-        print("No index.html files found in content/ directory.")
-        return
+# 侧边栏模板占位符的 (默认值, 当前页面值)
+SIDEBAR_SLOT_STATES = {
+    "open": ("", "open"),
+    "portal": (NAV_LINK_CLASS, NAV_ACTIVE_CLASS),
+    "recent": (NAV_LINK_CLASS, NAV_ACTIVE_CLASS),
+}
 
-    # 按路径排序（路径本身包含 YYYY/MM/DD 结构，所以字母序即为日期序）
-    all_indices.sort(reverse=True) # 最新的在前
-    
-    entries = []
-    for path in all_indices:
-        date_match = re.search(r'(\d{4})/(\d{2})/(\d{2})', path)
-        if date_match:
-            date_str = "-".join(date_match.groups())
-            url = '/' + path.replace('\\', '/')
-            summary = get_summary_from_md(date_str)
-            entries.append({"date": date_str, "url": url, "summaries": summary})
+def _slot(kind, key=""):
+    # 模板中的占位符，形如 \x00kind:key\x00
+    return f"\x00{kind}:{key}\x00"
 
-    if not entries:
-        print("No entries found.")
-        return
+def get_week_label(date_obj):
+    # 获取该日期属于当月的第几周
+    first_day = date_obj.replace(day=1)
+    adjusted_dom = date_obj.day + first_day.weekday()
+    week_num = int((adjusted_dom - 1) / 7) + 1
+    return f"第{week_num}周"
 
-    latest_entry = entries[0]
-    past_entries = entries[1:]
-    print(f"Detected {len(entries)} entries. Latest: {latest_entry['date']}")
+def build_date_index(entries, recent_count=8):
+    """Group entries into the recent list and the year/month/week history tree.
 
-    # Fetch market data once for freezing historical pages
-    market_data = get_market_data()
-    if market_data:
-        print("Market data fetched successfully for freezing.")
+    Built once per build. ``paths`` maps every date to the keys of the
+    ``<details>`` nodes that have to be open when it is the current page;
+    the year/month/week nodes live in the lazily loaded archive shards, so
+    history dates only open the History Archive section itself.
+    """
+    import datetime
+    recent = entries[:recent_count]
+    history = {}
+    paths = {}
+    for entry in recent:
+        paths[entry['date']] = ("recent",)
+    for entry in entries[recent_count:]:
+        date_obj = datetime.datetime.strptime(entry['date'], '%Y-%m-%d')
+        y = str(date_obj.year)
+        m = str(date_obj.month).zfill(2)
+        w = get_week_label(date_obj)
+        history.setdefault(y, {}).setdefault(m, {}).setdefault(w, []).append(entry)
+        paths[entry['date']] = ("history",)
+    return {"recent": recent, "history": history, "paths": paths}
 
-    # 生成通用的 Auth 模态框和脚本引用
-    def get_auth_assets(base_path="./"):
-        return f'''
-    <!-- Image Fallback Script -->
-    <script>
-        function handleImageError(img) {{
-            console.warn('Image failed to load:', img.src);
-            const fallbackUrls = [
-                'https://images.unsplash.com/photo-1639762681485-074b7f938ba0?auto=format&fit=crop&w=800&q=80',
-                'https://images.unsplash.com/photo-1621416894569-0f39ed31d247?auto=format&fit=crop&w=800&q=80',
-                'https://images.unsplash.com/photo-1622790698141-94e30457ef12?auto=format&fit=crop&w=800&q=80'
-            ];
-            if (img.dataset.triedFallback) {{
-                img.src = 'https://via.placeholder.com/800x450/1a1a1a/ffffff?text=Image+Unavailable';
-                return;
-            }}
-            img.dataset.triedFallback = 'true';
-            img.src = fallbackUrls[Math.floor(Math.random() * fallbackUrls.length)];
-        }}
-    </script>
-    <!-- Supabase SDK -->
-    <script src="https://cdn.jsdelivr.net/npm/@supabase/supabase-js@2"></script>
-    <script src="{base_path}js/config.js"></script>
-    <script src="{base_path}js/auth.js"></script>
-
-    <!-- Auth Modal -->
-    <div id="authModal" class="hidden fixed inset-0 z-[100] items-center justify-center p-4 bg-black/60 backdrop-blur-sm">
-        <div class="w-full max-w-md bento-card p-8 relative overflow-hidden">
-            <button onclick="toggleAuthModal()" class="absolute top-4 right-4 text-gray-500 hover:text-white transition-colors">
-                <i class="fa-solid fa-xmark text-xl"></i>
-            </button>
-            <div class="text-center mb-8">
-                <div class="w-16 h-16 bg-orange-500/10 rounded-2xl flex items-center justify-center mx-auto mb-4">
-                    <i class="fa-solid fa-shield-halved text-orange-500 text-3xl"></i>
-                </div>
-                <h2 id="authTitle" class="text-2xl font-black tracking-tight">登录</h2>
-                <p class="text-gray-500 text-sm mt-2">加入 Crypto Insights，解锁更多深度内容</p>
-            </div>
-            <form onsubmit="handleAuthSubmit(event)" class="space-y-4">
-                <div>
-                    <label class="block text-xs font-bold text-gray-500 uppercase tracking-widest mb-2">邮箱地址</label>
-                    <input id="authEmail" type="email" required placeholder="name@example.com" class="w-full bg-black/20 dark:bg-white/5 border border-white/10 rounded-xl px-4 py-3 text-sm focus:border-orange-500 outline-none transition-colors">
-                </div>
-                <div>
-                    <label class="block text-xs font-bold text-gray-500 uppercase tracking-widest mb-2">密码</label>
-                    <input id="authPassword" type="password" required placeholder="••••••••" class="w-full bg-black/20 dark:bg-white/5 border border-white/10 rounded-xl px-4 py-3 text-sm focus:border-orange-500 outline-none transition-colors">
-                </div>
-                <button id="authSubmitBtn" type="submit" class="w-full bg-orange-500 hover:bg-orange-600 text-black font-bold py-3 rounded-xl transition-all active:scale-95">立即登录</button>
-            </form>
-            <div class="mt-6 text-center">
-                <button id="authToggleText" onclick="toggleAuthMode()" class="text-xs text-gray-500 hover:text-orange-500 transition-colors">没有账号？去注册</button>
+# 站内搜索框 (Portal 和所有页面共用)，由 js/search.js 按需加载 search/ 下的索引分片
+def get_search_box_html(assets=None):
+    return f'''<div class="relative mb-6" data-search-root>
+                <input type="search" placeholder="搜索日报..." autocomplete="off" data-search-input
+                    class="w-full text-sm bg-white/5 border border-white/10 rounded-xl px-3 py-2 focus:outline-none focus:border-orange-500/50">
+                <div class="hidden absolute left-0 right-0 mt-2 z-50 max-h-[360px] overflow-y-auto custom-scrollbar rounded-xl bg-white dark:bg-[#111] border border-white/10 p-2 space-y-1 text-sm" data-search-results></div>
             </div>
-        </div>
-    </div>
-    '''
+            <script src="{asset_url(SEARCH_SCRIPT, assets)}" defer></script>'''
 
-    # 更新所有页面的内容（添加 onerror 到所有图片）
-    def inject_image_handlers(content):
-        # 为没有 onerror 的 img 标签添加 onerror 处理器
-        content = re.sub(r'<img\s+(?![^>]*onerror=)([^>]+)>', r'<img \1 onerror="handleImageError(this)">', content)
-        return content
-
-    # 生成导航栏 HTML (用于 Portal 和所有页面)
-    def generate_nav_html(current_date=None, is_portal=False):
-        portal_link_class = "flex items-center gap-3 text-sm font-semibold text-orange-500 bg-orange-500/10 p-2 rounded-xl" if is_portal else "flex items-center gap-3 text-sm text-gray-400 p-2 hover:text-orange-500 dark:hover:text-white transition-colors"
-        
-        # 日期条目 (最近 8 天)
-        display_entries = entries[:8]
-        recent_items = []
-        for entry in display_entries:
-            active_class = "flex items-center gap-3 text-sm font-semibold text-orange-500 bg-orange-500/10 p-2 rounded-xl" if current_date == entry['date'] else "flex items-center gap-3 text-sm text-gray-400 p-2 hover:text-orange-500 dark:hover:text-white transition-colors"
-            recent_items.append(f'''
-                <a href="{entry['url']}" class="{active_class}">
+# 生成导航栏 HTML 模板 (用于 Portal 和所有页面)，当前页面相关的部分以占位符表示
+def render_nav_template(date_index, assets=None):
+    # 日期条目 (最近 8 天)
+    recent_items = []
+    for entry in date_index['recent']:
+        recent_items.append(f'''
+                <a href="{entry['url']}" class="{_slot('recent', entry['date'])}">
                     <i class="fa-solid fa-calendar-day"></i> {entry['date'].replace('-', '.')}
                 </a>
             ''')
-        
-        # 将最近 8 天做成折叠结构 (2层)
-        # 如果当前日期在最近 8 天内，默认展开
-        is_recent_active = any(e['date'] == current_date for e in display_entries)
-        recent_section = f'''
-            <details class="group/recent" name="sidebar-nav" {"open" if is_recent_active else ""}>
+    
+    # 将最近 8 天做成折叠结构 (2层)
+    # 如果当前日期在最近 8 天内，默认展开
+    recent_section = f'''
+            <details class="group/recent" name="sidebar-nav" {_slot('open', 'recent')}>
                 <summary class="flex items-center justify-between text-xs font-bold text-gray-500 uppercase tracking-widest mb-4 cursor-pointer hover:text-orange-500 transition-colors list-none">
                     <span class="flex items-center gap-2">
                         <i class="fa-solid fa-clock-rotate-left"></i> Recent Info
@@ -198,111 +114,33 @@ def update_latest():
                 </div>
             </details>
         '''
-        
-        # 基础导航项 (Portal)
-        portal_item = f'''
-            <a href="/" class="{portal_link_class}">
+    
+    # 基础导航项 (Portal)
+    portal_item = f'''
+            <a href="/" class="{_slot('portal')}">
                 <i class="fa-solid fa-house"></i> Portal
             </a>
         '''
 
-        # History 区域 (8天以前的所有条目)
-        # ... (此处逻辑保持不变)
-        
-        # History 区域 (8天以前的所有条目)
-        history_section = ""
-        if len(entries) > 8:
-            import datetime
-            history_entries = entries[8:]
-            history_data = {}
-            for entry in history_entries: 
-                date_obj = datetime.datetime.strptime(entry['date'], '%Y-%m-%d')
-                y = str(date_obj.year)
-                m = str(date_obj.month).zfill(2)
-                # 获取该日期属于当月的第几周
-                first_day = date_obj.replace(day=1)
-                dom = date_obj.day
-                adjusted_dom = dom + first_day.weekday()
-                week_num = int((adjusted_dom - 1) / 7) + 1
-                w = f"第{week_num}周"
-                
-                if y not in history_data: history_data[y] = {}
-                if m not in history_data[y]: history_data[y][m] = {}
-                if w not in history_data[y][m]: history_data[y][m][w] = []
-                history_data[y][m][w].append(entry)
-            
-            # 对年份、月份、周进行倒序排序
-            sorted_years = sorted(history_data.keys(), reverse=True)
-            years_html = []
-            is_history_active = any(e['date'] == current_date for e in history_entries)
-            
-            for year in sorted_years:
-                months = history_data[year]
-                sorted_months = sorted(months.keys(), reverse=True)
-                months_html = []
-                for month in sorted_months:
-                    weeks = months[month]
-                    sorted_weeks = sorted(weeks.keys(), reverse=True)
-                    weeks_html = []
-                    for week in sorted_weeks:
-                        days = weeks[week]
-                        days_html = []
-                        for day_entry in days:
-                            is_current_day = day_entry['date'] == current_date
-                            day_active_class = "text-orange-500 bg-orange-500/10 font-bold" if is_current_day else "text-gray-500 hover:text-orange-500 hover:bg-orange-500/5"
-                            days_html.append(f'''
-                                <a href="{day_entry['url']}" class="block text-[11px] {day_active_class} py-1 border-l border-white/5 pl-3 -ml-[1px] rounded-md transition-all">
-                                    {day_entry['date']}
-                                </a>
-                            ''')
-                        
-                        # 如果当前日期在这一周，默认展开周
-                        is_week_active = any(d['date'] == current_date for d in days)
-                        weeks_html.append(f'''
-                            <details class="group/week ml-2" {"open" if is_week_active else ""}>
-                                <summary class="flex items-center justify-between text-[11px] text-gray-500 p-1 cursor-pointer hover:text-orange-500 dark:hover:text-white list-none">
-                                    <span>{week}</span>
-                                    <i class="fa-solid fa-chevron-right text-[7px] transition-transform group-open/week:rotate-90"></i>
-                                </summary>
-                                <div class="pl-2 mt-1 space-y-1">{" ".join(days_html)}</div>
-                            </details>
-                        ''')
-                    
-                    # 如果当前日期在这个月，默认展开月
-                    is_month_active = any(any(d['date'] == current_date for d in w_days) for w_days in weeks.values())
-                    months_html.append(f'''<details class="group/month ml-2" {"open" if is_month_active else ""}>
-                        <summary class="flex items-center justify-between text-[12px] text-gray-400 p-1 cursor-pointer hover:text-orange-500 dark:hover:text-white list-none">
-                            <span>{month}月</span>
-                            <i class="fa-solid fa-chevron-right text-[8px] transition-transform group-open/month:rotate-90"></i>
-                        </summary>
-                        <div class="pl-2 mt-1 space-y-1">{" ".join(weeks_html)}</div>
-                    </details>''')
-                
-                # 如果当前日期在这一年，默认展开年
-                is_year_active = any(any(any(d['date'] == current_date for d in w_days) for w_days in m_weeks.values()) for m_weeks in months.values())
-                years_html.append(f'''<details class="group/year" {"open" if is_year_active else ""}>
-                    <summary class="flex items-center justify-between text-sm text-gray-300 p-2 cursor-pointer hover:text-orange-500 dark:hover:text-white list-none">
-                        <span class="flex items-center gap-2"><i class="fa-solid fa-folder text-xs text-orange-500/50"></i> {year}年</span>
-                        <i class="fa-solid fa-chevron-right text-[10px] transition-transform group-open/year:rotate-90"></i>
-                    </summary>
-                    <div class="pl-2 mt-1 space-y-1">{" ".join(months_html)}</div>
-                </details>''')
-            
-            history_section = f'''
-            <details class="group/history mt-4 pt-4 border-t border-white/5" name="sidebar-nav" {"open" if is_history_active else ""}>
+    # History 区域 (8天以前的所有条目)：只输出折叠框，展开时由 js/archive.js 加载 archive/ 分片
+    history_section = ""
+    if date_index['history']:
+        history_section = f'''
+            <details class="group/history mt-4 pt-4 border-t border-white/5" name="sidebar-nav" {_slot('open', 'history')}>
                 <summary class="flex items-center justify-between text-xs font-bold text-gray-500 uppercase tracking-widest mb-4 cursor-pointer hover:text-orange-500 transition-colors list-none">
                     <span class="flex items-center gap-2">
                         <i class="fa-solid fa-box-archive"></i> History Archive
                     </span>
                     <i class="fa-solid fa-chevron-right text-[10px] transition-transform group-open/history:rotate-90"></i>
                 </summary>
-                <div class="max-h-[300px] overflow-y-auto pr-2 custom-scrollbar space-y-1">
-                    {" ".join(years_html)}
+                <div class="max-h-[300px] overflow-y-auto pr-2 custom-scrollbar space-y-1" data-archive-root>
+                    <p class="text-[11px] text-gray-500 p-2">加载中...</p>
                 </div>
-            </details>'''
-        
-        # 用户 Auth UI (登录按钮和用户信息)
-        auth_ui = f'''
+            </details>
+            <script src="{asset_url(ARCHIVE_SCRIPT, assets)}" defer></script>'''
+    
+    # 用户 Auth UI (登录按钮和用户信息)
+    auth_ui = f'''
         <div class="mt-6 pt-6 border-t border-white/5">
             <p class="text-xs font-bold text-gray-500 uppercase tracking-widest mb-4">Account</p>
             <div id="authBtnContainer">
@@ -324,8 +162,9 @@ def update_latest():
         </div>
         '''
 
-        return f'''
+    return f'''
         <div class="space-y-2">
+            {get_search_box_html(assets)}
             <div class="mb-6">
                 <p class="text-xs font-bold text-gray-500 uppercase tracking-widest mb-4">Navigation</p>
                 <div class="space-y-1">
@@ -338,9 +177,48 @@ def update_latest():
         </div>
         '''
 
-    # 生成侧边栏 HTML
-    def generate_sidebar_html(current_date=None):
-        return f'''<!-- Sidebar -->
+# History Archive 分片：archive/index.json 列出年份和月份，archive/YYYY-MM.json 是当月各周的日期
+ARCHIVE_DIR = 'archive'
+ARCHIVE_SCRIPT = 'js/archive.js'
+
+def render_archive_shards(date_index):
+    """Return ``{path: json}`` for the archive index and one shard per month."""
+    history = date_index['history']
+    shards = {}
+    years = []
+    for year in sorted(history, reverse=True):
+        months = []
+        for month in sorted(history[year], reverse=True):
+            weeks = history[year][month]
+            weeks_data = [
+                {"label": week, "days": [{"date": e['date'], "url": e['url']} for e in weeks[week]]}
+                for week in sorted(weeks, reverse=True)
+            ]
+            months.append({"month": month, "count": sum(len(w['days']) for w in weeks_data)})
+            shard = {"year": year, "month": month, "weeks": weeks_data}
+            shards[f"{ARCHIVE_DIR}/{year}-{month}.json"] = json.dumps(shard, ensure_ascii=False, separators=(',', ':'))
+        years.append({"year": year, "months": months})
+    shards[f"{ARCHIVE_DIR}/index.json"] = json.dumps({"years": years}, ensure_ascii=False, separators=(',', ':'))
+    return shards
+
+def write_generated_dir(directory, files, manifest, force=True):
+    # 写入生成目录下的 JSON 分片，并删除本次没有生成的旧分片；返回写入的字节数
+    os.makedirs(directory, exist_ok=True)
+    written = 0
+    for path, data in files.items():
+        if write_output(path, data, manifest, force=force):
+            written += len(data.encode('utf-8'))
+    for name in os.listdir(directory):
+        path = f"{directory}/{name}"
+        if name.endswith('.json') and path not in files:
+            os.remove(path)
+            manifest['outputs'].pop(path, None)
+            print(f"Removed stale shard {path}")
+    return written
+
+# 生成侧边栏 HTML 模板
+def render_sidebar_template(date_index, assets=None):
+    return f'''<!-- Sidebar -->
     <aside class="hidden lg:flex flex-col w-64 p-6 sidebar sticky top-0 h-screen">
         <a href="/" class="flex items-center gap-3 mb-10 hover:opacity-80 transition-opacity">
             <div class="w-8 h-8 bg-orange-500 rounded-lg flex items-center justify-center">
@@ -349,7 +227,7 @@ def update_latest():
             <span class="font-extrabold text-xl tracking-tighter">INSIGHT</span>
         </a>
         <nav class="space-y-6">
-            {generate_nav_html(current_date)}
+            {render_nav_template(date_index, assets)}
         </nav>
         <div class="mt-auto pt-6 border-t border-white/5">
             <div class="flex items-center gap-3">
@@ -362,11 +240,347 @@ def update_latest():
         </div>
     </aside>'''
 
+def compile_sidebar(date_index, assets=None):
+    """Render the sidebar once and split it into static parts and slots.
+
+    Every slot starts out in its default (inactive) state; ``render_sidebar``
+    only patches the handful of slots on the current page's active path.
+    """
+    template = render_sidebar_template(date_index, assets)
+    parts = template.split("\x00")
+    slots = {}
+    for i in range(1, len(parts), 2):
+        kind, _, key = parts[i].partition(":")
+        slots.setdefault((kind, key), []).append(i)
+        parts[i] = SIDEBAR_SLOT_STATES[kind][0]
+    return {"parts": parts, "slots": slots, "paths": date_index['paths'], "digest": sha256_bytes(template)}
+
+def render_sidebar(sidebar, current_date=None, is_portal=False):
+    active = [("open", key) for key in sidebar['paths'].get(current_date, ())]
+    active.append(("recent", current_date))
+    if is_portal:
+        active.append(("portal", ""))
+
+    parts = list(sidebar['parts'])
+    for kind, key in active:
+        for i in sidebar['slots'].get((kind, key), ()):
+            parts[i] = SIDEBAR_SLOT_STATES[kind][1]
+    return "".join(parts)
+
+# Tailwind 样式：有构建生成的样式表时引用它，否则退回 CDN 实时编译
+def get_stylesheet_html(base_path="./", assets=None):
+    if assets and CSS_SOURCE in assets:
+        return f'<link rel="stylesheet" href="{asset_url(CSS_SOURCE, assets, base_path)}">'
+    return f'''<script src="{TAILWIND_CDN}"></script>
+    <script>
+        tailwind.config = {{
+            darkMode: 'class',
+        }}
+    </script>'''
+
+# 生成通用的 Auth 脚本引用：登录框和图片加载失败的处理函数都在 js/auth.js 中，
+# 跟随带哈希的脚本文件被浏览器缓存，不再重复写入每个页面
+def get_auth_assets(base_path="./", assets=None):
+    return f'''
+    <!-- Supabase SDK -->
+    <script src="https://cdn.jsdelivr.net/npm/@supabase/supabase-js@2"></script>
+    <script src="{asset_url('js/config.js', assets, base_path)}"></script>
+    <script src="{asset_url('js/auth.js', assets, base_path)}"></script>
+    '''
+
+# 旧页面中内联的登录框和图片回退脚本，改由 js/auth.js 提供
+AUTH_MODAL_COMMENT = '<!-- Auth Modal -->'
+IMAGE_FALLBACK_COMMENT = '<!-- Image Fallback Script -->'
+INLINE_IMAGE_FALLBACK = 'function handleImageError('
+
+def get_market_display_html(market_data, now_str):
+    # BTC 数据
+    btc = market_data['btc']
+    btc_price = f"{btc.get('usd', 0):,}"
+    btc_change = btc.get('usd_24h_change', 0)
+    btc_color = "text-green-500" if btc_change >= 0 else "text-red-500"
+    btc_sign = "+" if btc_change >= 0 else ""
+    btc_html = f"${btc_price} <span class=\"text-xs font-normal {btc_color}\">{btc_sign}{btc_change:.2f}%</span>"
+
+    # ETH 数据
+    eth = market_data['eth']
+    eth_price = f"{eth.get('usd', 0):,}"
+    eth_change = eth.get('usd_24h_change', 0)
+    eth_color = "text-green-500" if eth_change >= 0 else "text-red-500"
+    eth_sign = "+" if eth_change >= 0 else ""
+    eth_html = f"${eth_price} <span class=\"text-xs font-normal {eth_color}\">{eth_sign}{eth_change:.2f}%</span>"
+
+    # FnG 数据
+    fng = market_data['fng']
+    fng_val = fng.get('value', 'N/A')
+    fng_class = fng.get('value_classification', 'N/A')
+    fng_html = f"{fng_class} <span class=\"text-xs font-normal text-gray-400\">Index: {fng_val}</span>"
+
+    return {
+        "btc-price-display": btc_html,
+        "eth-price-display": eth_html,
+        "sentiment-display": fng_html,
+        "last-update-time": f"{now_str} (Frozen)",
+    }
+
+def disable_market_refresh(script):
+    # 禁用 JS 自动刷新（已经注释掉的调用不再重复处理）
+    script = re.sub(r'(?<!// )fetchMarketData\(\);', '// fetchMarketData(); // Frozen for history', script)
+    return re.sub(r'(?<!// )setInterval\(fetchMarketData, 60000\);', '// setInterval(fetchMarketData, 60000); // Frozen for history', script)
+
+MARKET_SCRIPT = 'js/market.js'
+INLINE_MARKET_FETCH = 'async function fetchMarketData()'
+
+def remove_inline_function(script, signature):
+    # 按花括号配对找到函数结尾，连同函数独占的行一起删除
+    start = script.find(signature)
+    if start < 0:
+        return script
+    depth = 0
+    for i in range(script.index('{', start), len(script)):
+        if script[i] == '{':
+            depth += 1
+        elif script[i] == '}':
+            depth -= 1
+            if depth == 0:
+                break
+    else:
+        return script
+    end = i + 1
+    line_start = script.rfind('\n', 0, start) + 1
+    if not script[line_start:start].strip():
+        start = line_start
+    if script.startswith('\n', end):
+        end += 1
+    return script[:start] + script[end:]
+
+def remove_inline_market_fetch(script):
+    # 删除页面内联的 fetchMarketData（直接请求上游 API），改由 js/market.js 读取 market.json；
+    # 页面原有的调用保持不变
+    return remove_inline_function(script, INLINE_MARKET_FETCH)
+
+def remove_inline_image_fallback(script):
+    # 删除页面内联的 handleImageError（js/auth.js 提供同一个函数）；只剩这个函数的脚本整个删除
+    if INLINE_IMAGE_FALLBACK not in script:
+        return script
+    script = remove_inline_function(script, INLINE_IMAGE_FALLBACK)
+    return script if script.strip() else None
+
+# js/market.js 或其指纹文件 assets/js/market.<哈希>.js，相对或绝对路径
+MARKET_SCRIPT_SRC = re.compile(r'(?:^|/)(?:assets/)?js/market(?:\.[0-9a-f]+)?\.js$')
+
+def drop_market_script(element):
+    if MARKET_SCRIPT_SRC.search(element.get_attribute('src') or ''):
+        element.replace('')
+
+def replace_sidebar(element, new_sidebar):
+    # 侧边栏由 class 中的 sidebar 标识
+    if 'sidebar' in (element.get_attribute('class') or '').split():
+        element.replace(new_sidebar, with_comment='<!-- Sidebar -->')
+
+def use_stylesheet(element, link_html):
+    # CDN 编译脚本换成构建生成的样式表
+    if element.get_attribute('src') == TAILWIND_CDN:
+        element.replace(link_html)
+
+def add_image_handler(element):
+    # 为没有 onerror 的 img 标签添加 onerror 处理器
+    if not element.has_attribute('onerror'):
+        element.set_attribute('onerror', 'handleImageError(this)')
+
+# <picture> 中 <source> 的顺序：浏览器取第一个支持的格式，体积小的放前面
+PICTURE_FORMATS = ('avif', 'webp')
+
+def add_responsive_image(element, images, page_dir, state):
+    # 本地图片有生成的变体时包一层 <picture>：AVIF、WebP 的 <source>，最后是原格式的 <img> 作为回退。
+    # 页面的第一张图片一般在首屏，不懒加载
+    first = not state['images']
+    state['images'] += 1
+    src = element.get_attribute('src')
+    if not src or '://' in src or src.startswith(('data:', '/')):
+        return
+    record = images.get(os.path.normpath(os.path.join(page_dir, src)).replace('\\', '/'))
+    if not record:
+        return
+    srcsets, width, height = responsive_attributes(record, page_dir)
+    element.set_attribute('width', str(width))
+    element.set_attribute('height', str(height))
+    if first:
+        element.remove_attribute('loading')
+    else:
+        element.set_attribute('loading', 'lazy')
+    element.set_attribute('decoding', 'async')
+    # 变体只放在 <source> 上，<img> 只用原图（旧版本在 <img> 上写的 WebP srcset 一并去掉）
+    element.remove_attribute('srcset')
+    element.remove_attribute('sizes')
+    sources = "".join(f'<source type="{MIME_TYPES[fmt]}" srcset="{srcsets[fmt]}" sizes="{DEFAULT_SIZES}" '
+                      f'data-variant-of="{src}">' for fmt in PICTURE_FORMATS if fmt in srcsets)
+    # 已经在 <picture> 中的图片：原有的 <source> 已由 drop_picture_source 删除，在 <img> 前重新输出
+    if element.has_attribute('data-responsive'):
+        element.replace(sources + element.start_tag())
+    else:
+        element.set_attribute('data-responsive', '')
+        element.replace(f'<picture>{sources}{element.start_tag()}</picture>')
+
+def drop_picture_source(element):
+    # 生成的 <source> 每次按当前的变体重新输出，格式增减和顺序变化都能反映到页面上
+    if element.has_attribute('data-variant-of'):
+        element.replace('')
+
+def build_page_rewriter(page_content, file_path, new_sidebar, freeze=None, images=None, store=None, assets=None, is_latest=False):
+    """Register every per-page transform on one HTMLRewriter.
+
+    Whether the auth scripts are needed, or an inline auth modal and
+    fallback script are left to remove, is decided up front with substring
+    checks, so the document is only scanned once.
+    """
+    rewriter = HTMLRewriter()
+
+    # 0. 冻结市场数据：用页面日期的行情快照覆盖行情元素
+    if freeze:
+        market_data, now_str = freeze
+        displays = get_market_display_html(market_data, now_str)
+
+        def freeze_element(element):
+            element.set_inner_content(displays[element.get_attribute('id')])
+
+        for element_id in displays:
+            rewriter.on_element('#' + element_id, freeze_element)
+        rewriter.on_text('script', disable_market_refresh)
+
+    # 1. 注入图片处理逻辑，本地图片指向内容寻址存储并改用响应式变体
+    rewriter.on_element('img', add_image_handler)
+    page_dir = os.path.dirname(file_path)
+    if store:
+        rewriter.on_element('img', lambda element: use_store_source(element, store, page_dir))
+        rewriter.on_element('source', lambda element: use_store_source(element, store, page_dir))
+    if images:
+        image_state = {"images": 0}
+        rewriter.on_element('img', lambda element: add_responsive_image(element, images, page_dir, image_state))
+        rewriter.on_element('source', drop_picture_source)
+
+    # 2. 脚本和样式表引用改为带内容哈希的文件名，Tailwind CDN 换成生成的样式表
+    if assets:
+        rewriter.on_element('script', lambda element: use_fingerprinted_asset(element, assets, page_dir))
+        rewriter.on_element('link', lambda element: use_fingerprinted_asset(element, assets, page_dir))
+    if assets and CSS_SOURCE in assets:
+        link_html = get_stylesheet_html("../" * file_path.count('/'), assets)
+        rewriter.on_element('script', lambda element: use_stylesheet(element, link_html))
+        rewriter.on_text('script', drop_tailwind_config)
+
+    # 3. 更新整个 Sidebar（连同前面的 <!-- Sidebar --> 注释）；正文中的其他 <aside> 不动
+    rewriter.on_element('aside', lambda element: replace_sidebar(element, new_sidebar))
+
+    # 4. 行情组件改读 market.json，只有最新一天的页面加载实时行情脚本；
+    # 历史页面冻结后不再刷新，之前作为最新页面时加入的脚本删除
+    if INLINE_MARKET_FETCH in page_content:
+        rewriter.on_text('script', remove_inline_market_fetch)
+    if is_latest and 'id="btc-price-display"' in page_content and 'js/market.' not in page_content:
+        market_script = f'<script src="{asset_url(MARKET_SCRIPT, assets, "../" * file_path.count("/"))}"></script>'
+        rewriter.on_element('body', lambda element: element.append(f'    {market_script}\n'))
+    elif not is_latest and (freeze or FREEZE_MARKER not in page_content) and 'js/market.' in page_content:
+        rewriter.on_element('script', drop_market_script)
+
+    # 5. 注入 Auth 脚本 (如果尚未存在)；旧页面内联的登录框和图片回退脚本删除，由 js/auth.js 提供
+    if 'js/auth.' not in page_content:
+        # 计算相对路径深度以正确引用 js/
+        base_path = "../" * file_path.count('/')
+        auth_assets = get_auth_assets(base_path, assets)
+        # 在 </body> 前插入
+        rewriter.on_element('body', lambda element: element.append(f'{auth_assets}\n'))
+    if 'id="authModal"' in page_content:
+        rewriter.on_element('div#authModal', lambda element: element.replace('', with_comment=AUTH_MODAL_COMMENT))
+    if INLINE_IMAGE_FALLBACK in page_content:
+        rewriter.on_text('script', remove_inline_image_fallback, with_comment=IMAGE_FALLBACK_COMMENT)
+    return rewriter
+
+# 页面重写进程中共享的状态（Sidebar 模板、图片变体索引、图片存储映射、脚本指纹），由 init_page_worker 设置
+_page_state = {}
+
+def init_page_worker(sidebar, images=None, store=None, assets=None):
+    _page_state.update(sidebar=sidebar, images=images or {}, store=store or {}, assets=assets or {})
+
+def _rewrite_page(date_str, file_path, is_latest, inputs, freeze, result, timing):
+    abs_path = os.path.join(os.getcwd(), file_path)
+    if not os.path.exists(abs_path):
+        return
+    with open(abs_path, 'r', encoding='utf-8') as f:
+        page_content = f.read()
+    timing['bytes_read'] = len(page_content.encode('utf-8'))
+
+    # 所有变换在一次扫描中完成：一次读取、一次遍历、一次写入
+    new_sidebar = render_sidebar(_page_state['sidebar'], date_str)
+    freeze = freeze if not is_latest else None
+    rewriter = build_page_rewriter(page_content, file_path, new_sidebar, freeze,
+                                   _page_state['images'], _page_state['store'], _page_state['assets'], is_latest)
+    page_content = rewriter.transform(page_content)
+    if freeze:
+        result['log'].append(f"Froze market data for {date_str}")
+
+    # 结果与原文件相同时不写入，mtime 不变，部署时不会被当作修改
+    if not write_if_changed(abs_path, page_content):
+        result['log'].append(f"{date_str} unchanged")
+    else:
+        timing['bytes_written'] = len(page_content.encode('utf-8'))
+        result['log'].append(f"Updated sidebar and auth for {date_str}")
+    result['record'] = {
+        "inputs": inputs,
+        "pending_freeze": not is_latest and FREEZE_MARKER in page_content,
+        "file": file_fingerprint(abs_path),
+    }
+
+def rewrite_page(task):
+    """Freeze, re-sidebar and inject auth assets into one daily page.
+
+    Runs in a pool worker when ``--jobs`` > 1, so log lines are collected and
+    returned instead of printed; the parent prints them in entry order.
+    ``timing`` holds the page's wall/CPU seconds and bytes read/written.
+    """
+    date_str, file_path, is_latest, inputs, freeze = task
+    result = {"date": date_str, "file_path": file_path, "log": [], "record": None, "error": None}
+    timing = {"bytes_read": 0, "bytes_written": 0}
+    with Timer() as timer:
+        try:
+            _rewrite_page(date_str, file_path, is_latest, inputs, freeze, result, timing)
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+    result['timing'] = dict(timing, wall=round(timer.wall, 6), cpu=round(timer.cpu, 6))
+    return result
+
+def find_pages(content_dir='content'):
+    all_indices = []
+
+    # 递归查找 content 目录下所有的 index.html
+    for root, dirs, files in os.walk(content_dir):
+        if 'index.html' in files:
+            # 获取相对路径，例如 content/2026/01/24/index.html
+            rel_path = os.path.relpath(os.path.join(root, 'index.html'))
+            all_indices.append(rel_path)
+
+    # 按路径排序（路径本身包含 YYYY/MM/DD 结构，所以字母序即为日期序）
+    all_indices.sort(reverse=True) # 最新的在前
+    return all_indices
+
+def build_entries(all_indices, digests):
+    entries = []
+    for path in all_indices:
+        date_match = re.search(r'(\d{4})/(\d{2})/(\d{2})', path)
+        if date_match:
+            date_str = "-".join(date_match.groups())
+            url = '/' + path.replace('\\', '/')
+            summary = get_summaries(digests, date_str)
+            entries.append({"date": date_str, "url": url, "summaries": summary})
+    return entries
+
+# 生成 Portal HTML
+def render_portal_html(entries, assets=None):
+    latest_entry = entries[0]
+
     # 生成摘要 HTML
     latest_summaries_html = "".join([f'<li class="flex items-start gap-2 mb-2"><i class="fa-solid fa-circle-dot text-[8px] mt-2 text-orange-500/60"></i><span>{s}</span></li>' for s in latest_entry['summaries']])
 
     # 生成 Archive Grid (仅显示最近 9 天)
-    archive_entries = past_entries[:8] # 1个最新的 + 8个历史 = 9个
+    archive_entries = entries[1:9] # 1个最新的 + 8个历史 = 9个
     archive_grid_html = " ".join([f'''
                 <a href="{item['url']}" class="glass-card p-6 rounded-2xl group flex flex-col h-full">
                     <div class="flex justify-between items-start mb-4">
@@ -390,12 +604,7 @@ def update_latest():
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Crypto Insights Portal | 加密货币深度观察</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <script>
-        tailwind.config = {{
-            darkMode: 'class',
-        }}
-    </script>
+    {get_stylesheet_html("./", assets)}
     <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
     <style>
         body {{ transition: background-color 0.3s, color 0.3s; }}
@@ -485,6 +694,9 @@ def update_latest():
                 <h1 class="text-4xl font-black tracking-tight mb-2">Crypto <span class="text-orange-500">Insights</span> Portal</h1>
             </a>
             <p class="text-gray-500 dark:text-gray-400">每日加密货币市场深度分析与宏观动态追踪</p>
+            <div class="max-w-md mx-auto mt-8 text-left">
+                {get_search_box_html(assets)}
+            </div>
         </header>
 
         <!-- Featured Latest -->
@@ -538,109 +750,348 @@ def update_latest():
             <p>&copy; 2026 Crypto Insights. All rights reserved.</p>
         </footer>
     </div>
-    {get_auth_assets()}
+    {get_auth_assets(assets=assets)}
 </body>
 </html>
 """
-    with open('index.html', 'w', encoding='utf-8') as f:
-        f.write(portal_html)
-    print("Generated Portal index.html at root")
+    return portal_html
 
-    # 更新所有页面的 Sidebar 和 Auth Assets
-    for entry in entries:
-        is_latest = (entry['date'] == latest_entry['date'])
-        file_path = entry['url'].lstrip('/')
-        abs_path = os.path.join(os.getcwd(), file_path)
-        if os.path.exists(abs_path):
-            with open(abs_path, 'r', encoding='utf-8') as f:
-                page_content = f.read()
-            
-            # 0. 如果不是最新页面，冻结市场数据
-            if not is_latest and market_data:
-                try:
-                    import datetime
-                    now_str = datetime.datetime.now().strftime('%H:%M:%S')
-                    
-                    # BTC 数据
-                    btc = market_data['btc']
-                    btc_price = f"{btc.get('usd', 0):,}"
-                    btc_change = btc.get('usd_24h_change', 0)
-                    btc_color = "text-green-500" if btc_change >= 0 else "text-red-500"
-                    btc_sign = "+" if btc_change >= 0 else ""
-                    btc_html = f"${btc_price} <span class=\"text-xs font-normal {btc_color}\">{btc_sign}{btc_change:.2f}%</span>"
-                    
-                    # ETH 数据
-                    eth = market_data['eth']
-                    eth_price = f"{eth.get('usd', 0):,}"
-                    eth_change = eth.get('usd_24h_change', 0)
-                    eth_color = "text-green-500" if eth_change >= 0 else "text-red-500"
-                    eth_sign = "+" if eth_change >= 0 else ""
-                    eth_html = f"${eth_price} <span class=\"text-xs font-normal {eth_color}\">{eth_sign}{eth_change:.2f}%</span>"
-                    
-                    # FnG 数据
-                    fng = market_data['fng']
-                    fng_val = fng.get('value', 'N/A')
-                    fng_class = fng.get('value_classification', 'N/A')
-                    fng_html = f"{fng_class} <span class=\"text-xs font-normal text-gray-400\">Index: {fng_val}</span>"
-                    
-                    # 替换内容
-                    page_content = page_content.replace('id="btc-price-display">$Loading... <span class="text-xs font-normal text-gray-400">Loading...</span>', f'id="btc-price-display">{btc_html}')
-                    page_content = page_content.replace('id="eth-price-display">$Loading... <span class="text-xs font-normal text-gray-400">Loading...</span>', f'id="eth-price-display">{eth_html}')
-                    page_content = page_content.replace('id="sentiment-display">Loading... <span class="text-xs font-normal text-gray-400">Loading...</span>', f'id="sentiment-display">{fng_html}')
-                    page_content = page_content.replace('id="last-update-time">Loading...</span>', f'id="last-update-time">{now_str} (Frozen)</span>')
-                    
-                    # 禁用 JS 自动刷新
-                    page_content = page_content.replace('fetchMarketData();', '// fetchMarketData(); // Frozen for history')
-                    page_content = page_content.replace('setInterval(fetchMarketData, 60000);', '// setInterval(fetchMarketData, 60000); // Frozen for history')
-                    
-                    print(f"Froze market data for {entry['date']}")
-                except Exception as e:
-                    print(f"Failed to freeze market data for {entry['date']}: {e}")
-
-            # 1. 注入图片处理逻辑
-            page_content = inject_image_handlers(page_content)
-            
-            # 2. 更新整个 Sidebar
-            sidebar_pattern = r'<!-- Sidebar -->\s*<aside.*?>.*?</aside>'
-            new_sidebar = generate_sidebar_html(entry["date"])
-            
-            if re.search(sidebar_pattern, page_content, flags=re.DOTALL):
-                page_content = re.sub(sidebar_pattern, new_sidebar, page_content, flags=re.DOTALL)
-            else:
-                # 备用方案：如果没找到注释，尝试匹配 <aside>
-                page_content = re.sub(r'<aside.*?>.*?</aside>', new_sidebar, page_content, flags=re.DOTALL)
-
-            # 3. 注入 Auth Assets (如果尚未存在)
-            if 'id="authModal"' not in page_content:
-                # 计算相对路径深度以正确引用 js/
-                depth = file_path.count('/')
-                base_path = "../" * depth
-                auth_assets = get_auth_assets(base_path)
-                # 在 </body> 前插入
-                page_content = page_content.replace('</body>', f'{auth_assets}\n</body>')
-            else:
-                # 如果已存在，也要确保图片处理脚本在里面
-                if 'function handleImageError' not in page_content:
-                    depth = file_path.count('/')
-                    base_path = "../" * depth
-                    # 插入到 <head> 结束前
-                    page_content = page_content.replace('</head>', f'<script>function handleImageError(img) {{ /* fallback logic */ img.src="https://via.placeholder.com/800x450?text=Error"; }}</script>\n</head>')
-            
-            with open(abs_path, 'w', encoding='utf-8') as f:
-                f.write(page_content)
-            print(f"Updated sidebar and auth for {entry['date']}")
+# 缓存策略：文件名带内容哈希的资源永久缓存，HTML 和未加哈希的文件只缓存很短时间
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+SHORT_CACHE_CONTROL = "public, max-age=300, must-revalidate"
+IMMUTABLE_PATHS = (ASSET_DIR, STORE_DIR, VARIANT_DIR)
+SHORT_CACHE_SOURCES = ("/", "/latest", "/content/(.*)", "/js/(.*)", f"/{ARCHIVE_DIR}/(.*)", f"/{SEARCH_DIR}/(.*)")
+# 行情快照每分钟更新、Service Worker 和预缓存清单随构建更新：每次都向服务器验证，未变化时返回 304
+REVALIDATE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+
+def render_vercel_config(latest_entry):
+    def cache_rule(source, value):
+        return {"source": source, "headers": [{"key": "Cache-Control", "value": value}]}
 
-    # Update vercel.json
     vercel_config = {
         "cleanUrls": True,
         "rewrites": [
             { "source": "/", "destination": "/index.html" },
             { "source": "/latest", "destination": f"/content/{latest_entry['date'].replace('-', '/')}/index.html" }
-        ]
+        ],
+        "headers": [cache_rule(f"/{path}/(.*)", IMMUTABLE_CACHE_CONTROL) for path in IMMUTABLE_PATHS]
+                   + [cache_rule(source, SHORT_CACHE_CONTROL) for source in SHORT_CACHE_SOURCES]
+                   + [cache_rule(f"/{path}", REVALIDATE_CACHE_CONTROL) for path in (MARKET_JSON_PATH, SW_PATH, SW_MANIFEST_PATH)]
     }
-    with open('vercel.json', 'w', encoding='utf-8') as f:
-        json.dump(vercel_config, f, indent=4)
-    print("Updated vercel.json")
+    return json.dumps(vercel_config, indent=4)
+
+def run_page_tasks(tasks, sidebar, jobs=1, images=None, store=None, assets=None):
+    """Yield ``rewrite_page`` results in task order, using a process pool when ``jobs`` > 1."""
+    if jobs > 1 and len(tasks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_page_worker, initargs=(sidebar, images, store, assets)) as pool:
+            # map 按任务顺序返回结果，保证日志输出顺序与串行一致
+            yield from pool.map(rewrite_page, tasks, chunksize=max(1, len(tasks) // (jobs * 4)))
+    else:
+        init_page_worker(sidebar, images, store, assets)
+        yield from map(rewrite_page, tasks)
+
+# 决定生成结果的模块：任何一个变化都使构建清单失效
+GENERATOR_MODULES = (
+    'update_latest.py', 'html_rewriter.py', 'digest_index.py', 'search_index.py', 'image_pipeline.py',
+    'asset_store.py', 'asset_fingerprint.py', 'tailwind_css.py', 'market_snapshots.py', 'service_worker.py',
+    'build_manifest.py',
+)
+
+def generator_digest(modules=GENERATOR_MODULES):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    return sha256_bytes("\n".join(f"{name} {file_sha256(os.path.join(base_dir, name))}" for name in modules))
+
+# 监视模式下上一次构建的图片存储和变体映射，图片没有变化时直接沿用
+_watch_state = {}
+
+def update_latest(incremental=False, jobs=1, report=None, image_formats=("webp",), compress=False, budget=True,
+                  changed_dates=None, images_changed=True, prune=False):
+    """Rebuild the portal, page sidebars and vercel.json.
+
+    Phase timings, per-page timings and byte counters are recorded on
+    ``report`` (a BuildReport) when one is given. ``image_formats`` are the
+    responsive variants generated for local images (empty to skip the
+    stage). With ``compress`` the generated files get .br/.gz siblings
+    (only useful when self-hosting; Vercel compresses on its own).
+    With ``prune`` the originals of stored images are deleted once every
+    page references the store (the store index is then the only record of
+    the old paths, so this is opt-in).
+    Files are only written when their bytes change, and the changes since
+    the last acknowledged deploy are listed in deploy_delta.json.
+    ``changed_dates`` marks a --watch rebuild: only the pages of those dates
+    are re-checked on disk (others are rebuilt when their inputs change),
+    the image phases reuse the previous result unless ``images_changed``,
+    and the live market fetch, budget check and deploy delta are skipped.
+    Returns the dates of the pages that failed, or None when there is
+    nothing to build.
+    """
+    report = report or BuildReport()
+    report.info.update(incremental=incremental, jobs=jobs)
+
+    with report.phase('walk'):
+        all_indices = find_pages()
+
+    if not all_indices:
+        print("No index.html files found in content/ directory.")
+        return
+
+    with report.phase('manifest'):
+        manifest = load_manifest()
+        # 生成脚本或参与渲染的模块变化（模板、重写规则修改）时，所有页面都需要重新生成
+        generator = generator_digest()
+    force = not incremental or manifest.get('generator') != generator
+    if incremental and force:
+        print("Generator changed or no build manifest found, doing a full rebuild.")
+
+    # 摘要来自增量维护的 digest 索引，只重新解析有变化的 markdown
+    with report.phase('summaries'):
+        digests = build_digest_index()
+        entries = build_entries(all_indices, digests)
+
+    if not entries:
+        print("No entries found.")
+        return
+
+    latest_entry = entries[0]
+    print(f"Detected {len(entries)} entries. Latest: {latest_entry['date']}")
+
+    # 只含页面实际用到的类名的 Tailwind 样式表，取代浏览器端的 CDN 编译
+    with report.phase('tailwind'):
+        build_stylesheet([entry['url'].lstrip('/') for entry in entries], force=force)
+
+    # 脚本和样式表按内容哈希复制到 assets/，页面和 Sidebar 引用带哈希的文件名
+    with report.phase('assets'):
+        assets = build_fingerprinted_assets()
+
+    # 日期索引和侧边栏模板每次构建只生成一次，各页面只替换当前日期相关的部分
+    with report.phase('sidebar'):
+        date_index = build_date_index(entries)
+        sidebar = compile_sidebar(date_index, assets)
+
+    with report.phase('archive'):
+        shards = render_archive_shards(date_index)
+        written = write_generated_dir(ARCHIVE_DIR, shards, manifest, force=force)
+        report.count('bytes_written', written)
+        if written:
+            print(f"Updated history archive ({len(shards)} shard(s))")
+
+    # 站内搜索索引：按词项前缀分片，未变化的分片不重写
+    with report.phase('search'):
+        # 索引只依赖页面列表和各日 markdown 的内容，都没变化时跳过分词
+        search_inputs = sha256_bytes(json.dumps(
+            [SEARCH_INDEX_VERSION] + [(e['date'], e['url'], digests['days'].get(e['date'], {}).get('sha256')) for e in entries]))
+        if force or manifest.get('search') != search_inputs or not os.path.exists(f"{SEARCH_DIR}/meta.json"):
+            search_files = render_search_index(entries, digests)
+            written = write_generated_dir(SEARCH_DIR, search_files, manifest, force=force)
+            report.count('bytes_written', written)
+            manifest['search'] = search_inputs
+            if written:
+                print(f"Updated search index ({len(search_files)} file(s))")
+
+    with report.phase('portal'):
+        portal_html = render_portal_html(entries, assets)
+        if write_output('index.html', portal_html, manifest, force=force):
+            report.count('bytes_written', len(portal_html.encode('utf-8')))
+            print("Generated Portal index.html at root")
+        else:
+            print("Portal index.html unchanged")
+
+    # 本地图片存入内容寻址存储（相同内容只保留一份），页面引用统一改为存储路径
+    watching = changed_dates is not None
+    reuse_images = watching and not images_changed and 'store' in _watch_state
+    with report.phase('store'):
+        store = _watch_state['store'] if reuse_images else build_asset_store()
+
+    # 本地图片的响应式变体，按源图内容哈希缓存；源图取存储中的文件，原图删除后变体仍然可用，
+    # 页面中的 src 先改为存储路径，再按存储路径查找变体
+    with report.phase('images'):
+        if reuse_images:
+            images = _watch_state['images']
+        else:
+            images = build_image_variants(formats=image_formats, jobs=jobs, sources=sorted(set(store.values()))) if image_formats else {}
+        _watch_state.update(store=store, images=images)
+
+    # 历史页面只用各自日期的行情快照冻结。实时行情记为最新一期日报日期的快照，
+    # 且只在该日期就是今天时记录（补跑旧数据时不会把今天的行情记到更早的日期上）
+    import datetime
+    with report.phase('market'):
+        snapshots = load_snapshots()
+        latest_date = latest_entry['date']
+        latest_current = latest_date == datetime.datetime.now().strftime('%Y-%m-%d')
+        # 监视模式下不请求实时行情
+        if not watching and latest_current and latest_date not in snapshots:
+            market_data = get_market_data()
+            if market_data:
+                print("Market data fetched successfully for the latest snapshot.")
+                # 顺便更新行情快照文件，部署时页面就有可用的数据
+                if publish_market_feed(market_data):
+                    print(f"Updated {MARKET_JSON_PATH}")
+                if record_snapshot(snapshots, latest_date, market_data):
+                    print(f"Recorded market snapshot for {latest_date}")
+
+    # 计算每个页面的输入（Sidebar 内容、图片变体和存储、脚本指纹、是否最新、当日行情快照），只重新生成输入发生变化的页面
+    with report.phase('dirty_check'):
+        asset_inputs = sha256_bytes(images_digest(images) + store_digest(store) + assets_digest(assets))
+        pages = {}
+        dirty_entries = []
+        for entry in entries:
+            is_latest = (entry['date'] == latest_entry['date'])
+            file_path = entry['url'].lstrip('/')
+            # 页面的 Sidebar 由模板和当前日期唯一确定；历史页面的行情取自当日快照，补录或修改快照后重新冻结
+            snapshot = None if is_latest else snapshots.get(entry['date'])
+            snapshot_digest = sha256_bytes(json.dumps(snapshot, sort_keys=True)) if snapshot else None
+            inputs = sha256_bytes(f"{is_latest}\n{sidebar['digest']}\n{asset_inputs}\n{entry['date']}\n{snapshot_digest}")
+            record = manifest['pages'].get(file_path)
+            pages[file_path] = record
+            # 监视模式下只重新检查改动涉及的日期的页面文件
+            check_file = not watching or entry['date'] in changed_dates
+            if (force or not record or record.get('inputs') != inputs
+                    or check_file and (record.get('pending_freeze')
+                                       or not file_unchanged(file_path, record.get('file')))):
+                dirty_entries.append((entry, is_latest, inputs))
+        # 已删除的页面从清单中移除
+        manifest['pages'] = pages
+
+    if incremental and not force:
+        print(f"{len(dirty_entries)} of {len(entries)} pages need rebuilding.")
+
+    # 没有快照的历史页面不冻结：已冻结的页面保留原来的数值，仍是占位符的页面记为 pending_freeze，补录快照后的下一次构建再冻结
+    unfrozen = [entry['date'] for entry, is_latest, _ in dirty_entries if not is_latest and entry['date'] not in snapshots]
+    if unfrozen:
+        print(f"{len(unfrozen)} page(s) have no market snapshot, their market figures are left as they are; "
+              f"run `python market_snapshots.py` to backfill them.")
+
+    def get_freeze(date_str):
+        snapshot = snapshots.get(date_str)
+        return (snapshot, snapshot_time(snapshot)) if snapshot else None
+
+    # 更新所有页面的 Sidebar 和 Auth Assets
+    tasks = [(entry['date'], entry['url'].lstrip('/'), is_latest, inputs, None if is_latest else get_freeze(entry['date']))
+             for entry, is_latest, inputs in dirty_entries]
+
+    failed = []
+    with report.phase('rewrite'):
+        for result in run_page_tasks(tasks, sidebar, jobs, images, store, assets):
+            for line in result['log']:
+                print(line)
+            report.add_page(result['date'], result['timing'])
+            if result['error']:
+                print(f"Failed to update {result['date']}: {result['error']}")
+                failed.append(result['date'])
+                # 失败的页面下次构建时重试
+                manifest['pages'].pop(result['file_path'], None)
+            elif result['record']:
+                manifest['pages'][result['file_path']] = result['record']
+
+    # 所有页面都已改为引用存储后删除原图（需要显式开启）；有页面失败时保留原图，下次构建重试
+    if prune and not failed and not reuse_images:
+        with report.phase('store'):
+            pruned = prune_originals(store)
+            if pruned:
+                print(f"Asset store: pruned {pruned} original image(s) now served from {STORE_DIR}/")
+
+    # Service Worker 和预缓存清单：版本号取自上面记录的页面哈希，内容没变时两个文件都不重写
+    with report.phase('service_worker'):
+        precache = render_precache_manifest(entries, manifest, assets)
+        precache_json = json.dumps(precache, indent=1)
+        sw_js = render_service_worker(precache)
+        written = [path for path, data in ((SW_MANIFEST_PATH, precache_json), (SW_PATH, sw_js))
+                   if write_output(path, data, manifest, force=force)]
+        report.count('bytes_written', sum(os.path.getsize(path) for path in written))
+        if written:
+            print(f"Updated service worker (precache version {precache['version']})")
+
+    # Update vercel.json
+    with report.phase('vercel'):
+        vercel_json = render_vercel_config(latest_entry)
+        if write_output('vercel.json', vercel_json, manifest, force=force):
+            report.count('bytes_written', len(vercel_json.encode('utf-8')))
+            print("Updated vercel.json")
+
+    # 生成的 HTML/JS/SVG/JSON 预压缩，只压缩修改时间变化的文件。
+    # 只有自托管 (nginx gzip_static/brotli_static) 才需要，Vercel 会自行压缩，默认不做
+    if compress:
+        with report.phase('compress'):
+            compressed = [r for r in precompress(jobs=jobs) if not r['error']]
+            report.count('files_compressed', len(compressed))
+            report.count('bytes_written', sum(r.get('br', 0) + r.get('gz', 0) for r in compressed))
+
+    # 页面体积预算：超出 fail 阈值时记入报告，命令行据此返回非零
+    if budget and not watching:
+        with report.phase('budget'):
+            budget_report = analyze_pages()
+            report.info['budget'] = {"failed": budget_report['failed'], "violations": len(budget_report['violations'])}
+
+    # 与上次确认部署的状态比较，写出 deploy_delta.json，部署时只上传有变化的文件
+    if not watching:
+        with report.phase('delta'):
+            delta = write_deploy_delta()
+            report.info['deploy'] = {key: len(delta[key]) for key in ('added', 'changed', 'removed')}
+
+    with report.phase('manifest'):
+        manifest['generator'] = generator
+        save_manifest(manifest)
+
+    report.info.update(entries=len(entries), rebuilt=len(dirty_entries), failed=failed)
+    if failed:
+        print(f"{len(failed)} page(s) failed: {', '.join(failed)}")
+    return failed
 
 if __name__ == "__main__":
-    update_latest()
+    import argparse
+    parser = argparse.ArgumentParser(description="Regenerate the portal, sidebars and vercel.json.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only rebuild pages whose inputs changed since the last build (uses .build_manifest.json)")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Rewrite pages in N worker processes (0 = one per CPU)")
+    parser.add_argument("--avif", action="store_true",
+                        help="Also generate AVIF image variants (served through <picture>)")
+    parser.add_argument("--no-images", action="store_true",
+                        help="Skip generating responsive image variants")
+    parser.add_argument("--precompress", action="store_true",
+                        help="Also write .br/.gz siblings of the generated files (for self-hosting; Vercel compresses on its own)")
+    parser.add_argument("--prune-originals", action="store_true",
+                        help="Delete the original images once every page references imgs/store (the paths are then only kept in .asset_store.json)")
+    parser.add_argument("--no-budget", action="store_true",
+                        help="Skip the page weight budget check (page_budget.py)")
+    parser.add_argument("--watch", action="store_true",
+                        help="After building, watch content/, the .md reports, imgs/ and js/ and rebuild incrementally; serves a local preview")
+    parser.add_argument("--port", type=int, default=8000, help="Port of the --watch preview server")
+    parser.add_argument("--report", default=BUILD_REPORT_PATH, metavar="PATH",
+                        help="Where to write the JSON build report (phase/page timings, bytes read and written)")
+    parser.add_argument("--profile", nargs="?", const="update_latest.prof", metavar="PATH",
+                        help="Run under cProfile and dump the stats to PATH (default: update_latest.prof)")
+    args = parser.parse_args()
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    image_formats = () if args.no_images else (("avif", "webp") if args.avif else ("webp",))
+    report = BuildReport()
+    options = dict(incremental=args.incremental, jobs=jobs, report=report,
+                   image_formats=image_formats, compress=args.precompress, budget=not args.no_budget,
+                   prune=args.prune_originals)
+    if args.profile:
+        with profiled(args.profile):
+            failed = update_latest(**options)
+    else:
+        failed = update_latest(**options)
+    print_summary(report.save(args.report))
+
+    if args.watch:
+        from dev_server import changed_scope, serve, watch
+        serve(args.port)
+        # 监视模式下每次都是增量构建：只重写改动涉及的页面，不做预压缩，不删除刚加入的原图
+        options.update(incremental=True, compress=False, prune=False)
+
+        def rebuild(changed):
+            changed_dates, images_changed = changed_scope(changed)
+            options['report'] = BuildReport()
+            update_latest(changed_dates=changed_dates, images_changed=images_changed, **options)
+
+        try:
+            watch(rebuild)
+        except KeyboardInterrupt:
+            print("Stopped watching.")
+    elif failed or report.info.get('budget', {}).get('failed'):
+        sys.exit(1)
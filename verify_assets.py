@@ -1,44 +1,190 @@
 import os
-import imghdr
 import sys
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def verify_images(directory):
+from image_pipeline import VARIANT_DIR
+
+# 校验结果缓存：按路径记录文件大小和修改时间，未变化的文件不再读取
+ASSET_CACHE_PATH = '.asset_cache.json'
+ASSET_REPORT_PATH = 'asset_report.json'
+# 校验规则变化时递增，旧缓存整体失效
+ASSET_CACHE_VERSION = 1
+
+VALID_TYPES = ('jpeg', 'png', 'gif', 'webp', 'avif', 'svg')
+# 位图小于 1KB 多半是下载到的错误页面；SVG 是文本，允许更小
+MIN_RASTER_SIZE = 1024
+MIN_SVG_SIZE = 64
+HEADER_SIZE = 512
+
+EXTENSION_TYPES = {
+    '.jpg': 'jpeg', '.jpeg': 'jpeg', '.png': 'png', '.gif': 'gif',
+    '.webp': 'webp', '.avif': 'avif', '.svg': 'svg',
+}
+
+
+def sniff_image_type(header):
+    """Detect the image format from the first bytes of a file (replaces imghdr)."""
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if header[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    if header[4:8] == b'ftyp' and header[8:12] in (b'avif', b'avis'):
+        return 'avif'
+    # SVG：跳过 BOM、空白、XML 声明、注释和 DOCTYPE 后应以 <svg 开头
+    text = header.lstrip(b'\xef\xbb\xbf').lstrip()
+    while text.startswith((b'<?', b'<!')):
+        end = text.find(b'-->') + 3 if text.startswith(b'<!--') else text.find(b'>') + 1
+        if end <= 0:
+            break
+        text = text[end:].lstrip()
+    if text[:4].lower() == b'<svg':
+        return 'svg'
+    if text.startswith(b'<'):
+        return 'html'
+    return None
+
+
+def check_image(filepath, size):
+    # 返回 {"type", "ok", "error", "warning"}，只读取文件头部
+    if size == 0:
+        return {"type": None, "ok": False, "error": "Empty file (0 bytes).", "warning": None}
+    with open(filepath, 'rb') as f:
+        img_type = sniff_image_type(f.read(HEADER_SIZE))
+    result = {"type": img_type, "ok": False, "error": None, "warning": None}
+    if img_type not in VALID_TYPES:
+        result['error'] = f"Not a valid image (detected as {img_type})."
+        return result
+    min_size = MIN_SVG_SIZE if img_type == 'svg' else MIN_RASTER_SIZE
+    if size < min_size:
+        result['error'] = f"Too small ({size} bytes). Likely an error page."
+        return result
+    expected = EXTENSION_TYPES.get(os.path.splitext(filepath)[1].lower())
+    if expected and expected != img_type:
+        result['warning'] = f"Extension suggests {expected} but content is {img_type}."
+    result['ok'] = True
+    return result
+
+
+def load_asset_cache(path=ASSET_CACHE_PATH):
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get('version') != ASSET_CACHE_VERSION:
+        return {}
+    return cache.get('files', {})
+
+
+def save_asset_cache(files, path=ASSET_CACHE_PATH):
+    if not path:
+        return
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"version": ASSET_CACHE_VERSION, "files": files}, f, separators=(',', ':'), sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def find_images(directory):
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        # 生成的响应式变体不参与校验；imgs/store 中是实际部署的图片，照常校验
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d).replace('\\', '/') != VARIANT_DIR)
+        for filename in sorted(files):
+            # .br/.gz 是 precompress.py 生成的压缩副本
+            if not filename.startswith('.') and not filename.endswith(('.br', '.gz')):
+                paths.append(os.path.join(root, filename).replace('\\', '/'))
+    return paths
+
+
+def verify_images(directory='imgs', jobs=8, cache_path=ASSET_CACHE_PATH, report_path=None):
+    """Verify every file under ``directory``; returns True when all are valid images.
+
+    Files whose size and mtime match the cache are not re-read. Checks run
+    in a thread pool; results are printed in path order.
+    """
     print(f"--- Verifying images in {directory} ---")
     if not os.path.exists(directory):
         print(f"Error: Directory {directory} does not exist.")
         return False
 
-    files = [f for f in os.listdir(directory) if os.path.isfile(os.path.join(directory, f))]
-    all_ok = True
+    start = time.perf_counter()
+    cache = load_asset_cache(cache_path)
+    new_cache = {}
+    results = {}
+    pending = []
+    for filepath in find_images(directory):
+        stat = os.stat(filepath)
+        cached = cache.get(filepath)
+        if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            new_cache[filepath] = cached
+            results[filepath] = dict(cached, cached=True)
+        else:
+            pending.append((filepath, stat))
 
-    for filename in files:
-        filepath = os.path.join(directory, filename)
-        size = os.path.getsize(filepath)
-        
-        # Check size > 1KB
-        if size < 1024:
-            print(f"❌ {filename}: Too small ({size} bytes). Likely an error page.")
-            all_ok = False
-            continue
-            
-        # Check file type
-        img_type = imghdr.what(filepath)
-        if img_type not in ['jpeg', 'png', 'gif', 'webp']:
-            print(f"❌ {filename}: Not a valid image (detected as {img_type}).")
+    def check(item):
+        filepath, stat = item
+        try:
+            return filepath, dict(check_image(filepath, stat.st_size), size=stat.st_size, mtime_ns=stat.st_mtime_ns), True
+        except OSError as e:
+            # 读取失败的文件不写入缓存，下次重试
+            result = {"type": None, "ok": False, "error": f"Unreadable: {e}", "warning": None}
+            return filepath, dict(result, size=stat.st_size, mtime_ns=stat.st_mtime_ns), False
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for filepath, result, cacheable in pool.map(check, pending):
+            if cacheable:
+                new_cache[filepath] = result
+            results[filepath] = dict(result, cached=False)
+
+    all_ok = True
+    for filepath in sorted(results):
+        result = results[filepath]
+        name = os.path.relpath(filepath, directory)
+        if not result['ok']:
+            print(f"❌ {name}: {result['error']}")
             all_ok = False
             continue
-            
-        print(f"✅ {filename}: OK ({img_type}, {size/1024:.1f} KB)")
+        print(f"✅ {name}: OK ({result['type']}, {result['size']/1024:.1f} KB)")
+        if result['warning']:
+            print(f"⚠️  {name}: {result['warning']}")
+
+    save_asset_cache(new_cache, cache_path)
 
+    if report_path:
+        report = {
+            "directory": directory,
+            "ok": all_ok,
+            "checked": len(pending),
+            "cached": len(results) - len(pending),
+            "seconds": round(time.perf_counter() - start, 6),
+            "files": results,
+        }
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"Wrote {report_path}")
+    print(f"{len(results)} file(s), {len(pending)} checked, {len(results) - len(pending)} from cache")
     return all_ok
 
 if __name__ == "__main__":
     import argparse
-    parser = argparse.ArgumentParser(description="Verify images in a directory.")
-    parser.add_argument("--dir", type=str, default="imgs/2026/01/26", help="Directory to verify")
+    parser = argparse.ArgumentParser(description="Verify every image under a directory tree.")
+    parser.add_argument("--dir", type=str, default="imgs", help="Directory to verify (recursively)")
+    parser.add_argument("--jobs", "-j", type=int, default=8, help="Number of checker threads")
+    parser.add_argument("--report", nargs="?", const=ASSET_REPORT_PATH, metavar="PATH",
+                        help=f"Write a JSON report (default: {ASSET_REPORT_PATH})")
+    parser.add_argument("--no-cache", action="store_true", help="Re-check every file and do not update the cache")
     args = parser.parse_args()
-    
-    if not verify_images(args.dir):
+
+    if not verify_images(args.dir, args.jobs, None if args.no_cache else ASSET_CACHE_PATH, args.report):
         sys.exit(1)
     else:
         print(f"--- All images in {args.dir} verified successfully ---")